@@ -0,0 +1,322 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from model import compiled
+from model.board import Board
+from model.player import Player
+from model.engine import GameEngine
+from model.policy import AlwaysBuyPolicy
+from model.state import GameState
+from model import savefile
+from model.dice import GameRandom
+from model.gameboardDesign import GameboardDesigner
+from model.journal import GameJournal
+from model.render import BoardRenderer
+from model.simulate import play_chunk
+
+SIZES = (20, 1000, 100000)
+QUICK_SIZES = (20, 1000)
+
+
+def new_game(template, num_players=4):
+    """A fresh game state (board squares and players) built from a template board."""
+    squares = [Board.make_square(s.name, s.position, getattr(s, "price", None), getattr(s, "rent", None))
+               for s in template.squares]
+    return Board(squares=squares), [Player(f"Player {seat + 1}") for seat in range(num_players)]
+
+
+def generated_board(size, seed=0):
+    """A board of any size with the usual square types spread around it."""
+    rng = random.Random(seed)
+    squares = []
+    for position in range(size):
+        if position == 0:
+            squares.append(Board.make_square("Go", position))
+        elif position == size // 4:
+            squares.append(Board.make_square("In Jail", position))
+        elif position == 3 * size // 4:
+            squares.append(Board.make_square("Go To Jail", position))
+        elif position % 7 == 0:
+            squares.append(Board.make_square("Chance", position))
+        elif position % 11 == 0:
+            squares.append(Board.make_square("Income Tax", position))
+        else:
+            price = rng.randrange(100, 900, 50)
+            squares.append(Board.make_square(f"Property {position}", position, price, price // 10))
+    return Board(squares=squares)
+
+
+def owned_game(size, num_players=4, seed=0):
+    """A mid-game position on a generated board with about half the properties owned."""
+    rng = random.Random(seed)
+    board = generated_board(size, seed)
+    players = [Player(f"Player {seat + 1}", money=rng.randrange(0, 3000), position=rng.randrange(size))
+               for seat in range(num_players)]
+    for square in board.squares:
+        if hasattr(square, "owner") and rng.random() < 0.5:
+            board.set_owner(square, rng.choice(players))
+    return board, players
+
+
+def save_load(sizes=(20, 1000, 100000), repeat=5):
+    """Save and load latency and file size of the JSON and binary formats per board size."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            board, players = owned_game(size)
+            for extension in (".json", ".bin"):
+                path = os.path.join(directory, f"game{extension}")
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    savefile.save(path, board, players, players)
+                saved = time.perf_counter()
+                for _ in range(repeat):
+                    savefile.load(path)
+                loaded = time.perf_counter()
+                results.append({"squares": size, "format": extension[1:], "bytes": os.path.getsize(path),
+                                "save_ms": (saved - start) / repeat * 1000,
+                                "load_ms": (loaded - saved) / repeat * 1000})
+    return results
+
+
+def measure_bytes(make, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [make() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def bytes_per_game(board_file="DefaultBoard.csv", games=10000, num_players=4):
+    """Average memory held by one live game kept as Board, square and Player objects."""
+    template = Board(board_file)
+    return measure_bytes(lambda: new_game(template, num_players), games)
+
+
+def bytes_per_state(board_file="DefaultBoard.csv", games=10000, num_players=4):
+    """Average memory held by one live game kept as a packed GameState."""
+    board, players = new_game(Board(board_file), num_players)
+    return measure_bytes(lambda: GameState.capture(board, players, players), games)
+
+
+def turns_per_second(board_file="DefaultBoard.csv", turns=200000, num_players=4, seed=0):
+    """Turns played per second by the headless engine, restarting games as they end."""
+    template = Board(board_file)
+    rng = GameRandom(seed)
+    played = 0
+    start = time.perf_counter()
+    while played < turns:
+        board, players = new_game(template, num_players)
+        engine = GameEngine(board, players, [AlwaysBuyPolicy()] * num_players, rng=rng)
+        while not engine.finished() and played < turns:
+            for player in engine.players[:]:
+                if len(engine.players) > 1:
+                    engine.play_turn(player)
+                    played += 1
+            engine.round += 1
+    return played / (time.perf_counter() - start)
+
+
+def metric(value, unit, higher_is_better=True):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def per_second(function, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return count / (time.perf_counter() - start)
+
+
+def best_ms(function, repeat=5):
+    """Fastest of `repeat` calls, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def write_board_csv(board, path):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["position", "name", "price", "rent"])
+        for square in board.squares:
+            writer.writerow([square.position, square.name, getattr(square, "price", ""), getattr(square, "rent", "")])
+
+
+def bench_engine(quick=False):
+    scale = 10 if quick else 1
+    board = Board("DefaultBoard.csv")
+    players = [Player("Alice", policy=AlwaysBuyPolicy()), Player("Bob", policy=AlwaysBuyPolicy())]
+    engine = GameEngine(board, players, rng=GameRandom(0))
+    alice = players[0]
+
+    def take_turn():
+        alice.money = 1500
+        engine.take_turn(alice)
+        alice.in_jail = False
+
+    def handle_jail():
+        alice.money, alice.in_jail, alice.position = 1500, True, board.jail_position
+        engine.handle_jail(alice)
+
+    midgame = GameEngine(Board("DefaultBoard.csv"), [Player(f"Player {seat + 1}", policy=AlwaysBuyPolicy())
+                                                     for seat in range(4)], rng=GameRandom(1))
+    for _ in range(5):
+        midgame.play_round()
+    snapshot = midgame.snapshot()
+
+    def what_if():
+        midgame.restore(snapshot)
+        midgame.play_round()
+
+    games = 2000 // scale
+    start = time.perf_counter()
+    play_chunk(("DefaultBoard.csv", 4, 0, games, 0, "always-buy", 100, False, False, None, False))
+    return {
+        "engine.take_turn": metric(per_second(take_turn, 200000 // scale), "calls/s"),
+        "engine.handle_jail": metric(per_second(handle_jail, 200000 // scale), "calls/s"),
+        "engine.fork": metric(per_second(lambda: midgame.fork(snapshot=snapshot), 20000 // scale), "forks/s"),
+        "engine.rollback_round": metric(per_second(what_if, 50000 // scale), "rounds/s"),
+        "engine.turns": metric(turns_per_second(turns=200000 // scale), "turns/s"),
+        "engine.full_games": metric(games / (time.perf_counter() - start), "games/s"),
+    }
+
+
+def bench_board_io(sizes=SIZES):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"Size{size}Board.csv")
+            write_board_csv(generated_board(size), path)
+
+            def cold():
+                compiled._LOADED.clear()
+                cache = os.path.join(directory, compiled.CACHE_DIR)
+                for name in os.listdir(cache) if os.path.isdir(cache) else ():
+                    os.remove(os.path.join(cache, name))
+                Board(path)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                designer = GameboardDesigner()
+            repeat = 3 if size > 10000 else 10
+            results[f"board.load_cold.{size}"] = metric(best_ms(cold, repeat), "ms", False)
+            results[f"board.load_warm.{size}"] = metric(best_ms(lambda: Board(path), repeat), "ms", False)
+            results[f"designer.load.{size}"] = metric(
+                best_ms(lambda: designer.load_gameboard_from_csv(path), repeat), "ms", False)
+    return results
+
+
+def bench_persistence(sizes=SIZES, turns=(100, 1000, 10000)):
+    results = {}
+    for row in save_load(sizes, repeat=3):
+        name = f"save.{row['format']}.{row['squares']}"
+        results[name + ".bytes"] = metric(row["bytes"], "bytes", False)
+        results[name + ".save"] = metric(row["save_ms"], "ms", False)
+        results[name + ".load"] = metric(row["load_ms"], "ms", False)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in turns:
+            path = os.path.join(directory, f"game{count}.journal")
+            players = [Player(f"Player {seat + 1}", policy=AlwaysBuyPolicy()) for seat in range(4)]
+            engine = GameEngine(Board("DefaultBoard.csv"), players, rng=GameRandom(0),
+                                journal=GameJournal(path), max_rounds=count)
+            engine.journal.start(engine)
+            start = time.perf_counter()
+            played = 0
+            while played < count:
+                player = engine.players[played % len(engine.players)]
+                player.money = max(player.money, 1500)  # Keep everyone in the game.
+                engine.play_turn(player)
+                played += 1
+            elapsed = time.perf_counter() - start
+            engine.journal.close()
+            results[f"journal.turn.{count}"] = metric(elapsed / count * 1e6, "us", False)
+            results[f"journal.resume.{count}"] = metric(best_ms(lambda: GameJournal.resume(path)), "ms", False)
+    return results
+
+
+def bench_render(sizes=SIZES):
+    results = {}
+    for size in sizes:
+        board, players = owned_game(size)
+        renderer = BoardRenderer(board)
+        results[f"render.full.{size}"] = metric(best_ms(lambda: BoardRenderer(board).frame(players)), "ms", False)
+        renderer.frame(players)
+
+        def diff_frame():
+            players[0].position = (players[0].position + 7) % size
+            renderer.frame(players)
+
+        results[f"render.diff.{size}"] = metric(best_ms(diff_frame), "ms", False)
+    return results
+
+
+def bench_memory():
+    return {
+        "memory.objects": metric(bytes_per_game(), "bytes/game", False),
+        "memory.state": metric(bytes_per_state(), "bytes/game", False),
+    }
+
+
+def run_suite(quick=False):
+    sizes = QUICK_SIZES if quick else SIZES
+    results = {}
+    for bench in (lambda: bench_engine(quick), lambda: bench_board_io(sizes), lambda: bench_persistence(sizes),
+                  lambda: bench_render(sizes), bench_memory):
+        results.update(bench())
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """Names of the metrics that are more than `threshold` (a fraction) worse than the baseline."""
+    regressions = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if new is None or not old["value"]:
+            continue
+        ratio = new["value"] / old["value"]
+        if (ratio < 1 - threshold) if old["higher_is_better"] else (ratio > 1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine, board I/O, persistence and rendering.")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown as a fraction (default 0.2)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer iterations")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick)
+    for name, result in results.items():
+        print(f"{name:<32} {result['value']:>14.3f} {result['unit']}")
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            print(f"REGRESSION {name}: {baseline[name]['value']:.3f} -> {results[name]['value']:.3f} "
+                  f"{results[name]['unit']}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
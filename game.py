@@ -1,12 +1,76 @@
 import random
-import json
-import string
+import sys
 from model.board import Board
 from model.player import Player
-from model.gameboardDesign import GameboardDesigner
+from model.engine import GameEngine
+from model.events import CONSOLE
 import os
 
-def main():
+JOURNAL_FILE = 'saved_game.journal'
+
+# Subcommands that hand their arguments to another module's main(), imported only when used.
+PASSTHROUGH = {
+    "simulate": ("model.simulate", "play many games headless and report statistics"),
+    "analyze": ("model.markov", "exact landing probabilities and expected rent of a board"),
+    "bench": ("benchmark", "run the benchmark suite"),
+}
+
+
+def main(argv=None):
+    """Run a subcommand, or ask for a role when there is none."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return role_menu()
+    command, rest = argv[0], argv[1:]
+    if command in PASSTHROUGH:
+        import importlib
+        return importlib.import_module(PASSTHROUGH[command][0]).main(rest)
+    if command == "design" and rest and rest[0] not in ("-h", "--help"):
+        from model.gameboardDesign import main as design_main
+        return design_main(rest)
+
+    args = parse_command(argv)
+    if args.command == "design":
+        from model.gameboardDesign import GameboardDesigner
+        return GameboardDesigner().start()
+    if args.command == "replay":
+        import json
+        from model.simulate import replay
+        print(json.dumps(replay(args.board, args.players, args.seed, args.game, args.policy, events=CONSOLE)))
+        return
+    if args.command == "odds":
+        return show_odds(args.games, args.workers)
+    return play_game(args.board, args.players, args.names, args.load, args.seed, args.odds, args.telemetry)
+
+
+def parse_command(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="game.py", description="Monopoly. Run without arguments to play.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play = commands.add_parser("play", help="play a game at the terminal")
+    play.add_argument("--board", help="board CSV file (default: choose from a list)")
+    play.add_argument("--players", type=int, help="number of players, 2-6 (default: ask)")
+    play.add_argument("--names", nargs="+", help="player names (default: ask)")
+    play.add_argument("--load", action="store_true", default=None, help="resume the saved game")
+    play.add_argument("--seed", type=int, help="seed the dice for a reproducible game")
+    play.add_argument("--no-odds", dest="odds", action="store_false", help="don't estimate win probabilities")
+    play.add_argument("--telemetry", metavar="DIR", help="append every turn to the columnar table in DIR")
+    commands.add_parser("design", help="design boards; 'design generate|validate -h' for batch use")
+    for name, (module, description) in PASSTHROUGH.items():
+        commands.add_parser(name, help=f"{description}; '{name} -h' for its options")
+    replay = commands.add_parser("replay", help="show one game of a simulate run move by move")
+    replay.add_argument("board", help="board CSV file")
+    replay.add_argument("game", type=int, help="index of the game in the run")
+    replay.add_argument("--players", type=int, default=4)
+    replay.add_argument("--seed", type=int, default=0)
+    replay.add_argument("--policy", default="always-buy")
+    odds = commands.add_parser("odds", help="estimate each player's chance of winning the saved game")
+    odds.add_argument("--games", type=int, default=2000, help="rollouts to play")
+    odds.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    return parser.parse_args(argv)
+
+
+def role_menu():
     print("Welcome to Monopoly!")
     
     """Let the user select their role: Player or Gameboard Designer."""
@@ -15,67 +79,86 @@ def main():
     if choice == "1":
         return play_game()
     elif choice == "2":
+        from model.gameboardDesign import GameboardDesigner
         return GameboardDesigner().start()
     else:
         print("Invalid choice. Please try again.")
-        return main()
+        return role_menu()
     
 
-def play_game():
-    """Play the game."""
+def play_game(board_file=None, num_players=None, names=None, load=None, seed=None, odds=True, telemetry=None):
+    """Play the game. With `odds`, win probabilities estimated in the background are shown each turn;
+    with `telemetry`, every turn is appended to the columnar table in that directory."""
+    from model.journal import GameJournal
+    from model.render import BoardRenderer
+    from model.odds import WinOdds
     print("\n--- Game Start! ---")
     # Initialize or load the game
-    board, players = initialize_game()
-    current_round = 1
-
-    # Game loop
-    while current_round <= 100 and len(players) > 1:
-        print(f"\n--- Round {current_round} ---")
-        for player in players[:]:
-            
-            if len(players) == 1:
-                break
-            
-            visualize_gameboard(board, players)
-            print_all_players_status(players)
-            print(f"\n{player.name}'s turn:")
-            choice = player_turn_menu(player)
-            if choice == 2:  # Stop and save the game
-                save_game(board, players)
-                print("Game saved. Exiting...")
-                return
-            
-            if player.in_jail:
-                handle_jail(player,board)
-            else:
-                take_turn(player, board)
+    if load is None:
+        load = input("Do you want to load a saved game? (y/n): ").lower() == 'y'
+    resumed = saved_journal() if load else None
+    board, seats, players, current_round, next_seat = initialize_game(board_file, num_players, names, load, resumed)
+    # A resumed game carries on in its journal; any other game is journaled aside until the player saves it.
+    journal = GameJournal(resumed or JOURNAL_FILE + ".new")
+
+    renderer = BoardRenderer(board)
+    estimator = WinOdds() if odds else None
+
+    def before_turn(engine, player):
+        renderer.draw(engine.players, estimator.update(engine) if estimator else None)
+        print(f"\n{player.name}'s turn:")
+        choice = player_turn_menu(player)
+        if choice == 2:  # Stop and save the game
+            save_game(journal)
+            print("Game saved. Exiting...")
+            return False
+        return True
+
+    rng = random if seed is None else random.Random(seed)
+    engine = GameEngine(board, players, rng=rng, events=CONSOLE, before_turn=before_turn, journal=journal,
+                        seats=seats, current_round=current_round, next_seat=next_seat)
+    if resumed:
+        journal.attach(engine)
+    else:
+        journal.start(engine)
+    writer = None
+    if telemetry:
+        from model.telemetry import TelemetryWriter
+        writer = TelemetryWriter(telemetry)
+        writer.start(engine, writer.next_game())
+    try:
+        engine.run()
+    finally:
+        if estimator:
+            estimator.close()
+        if writer:
+            writer.close()
+    if engine.stopped:
+        return
+    journal.delete()
 
-            if player.money < 0:
-                print(f"{player.name} is bankrupt and has retired from the game.")
-                players.remove(player)
-                continue
-        
-        current_round += 1
-    
     # Determine winner(s)
     print("\nGame Over!")
-    if len(players) == 1:
-        print(f"The winner is {players[0].name}!")
+    if len(engine.players) == 1:
+        print(f"The winner is {engine.players[0].name}!")
     else:
-        print("Game ended after 100 rounds. Final standings:")
-        for player in sorted(players, key=lambda p: p.money, reverse=True):
+        print(f"Game ended after {engine.max_rounds} rounds. Final standings:")
+        for player in sorted(engine.players, key=lambda p: p.money, reverse=True):
             print(f"{player.name}: ${player.money}")
 
-def initialize_game():
-    choice = input("Do you want to load a saved game? (y/n): ").lower()
-    if choice == 'y':
-        return load_game()
+def initialize_game(board_file=None, num_players=None, names=None, load=None, journal=None):
+    if load is None:
+        load = input("Do you want to load a saved game? (y/n): ").lower() == 'y'
+    if load:
+        return load_game(journal)
     else:
-        board = initialize_board()
-        players = initialize_players()
-        return board, players
+        board = initialize_board(board_file)
+        players = initialize_players(num_players, names)
+        return board, players, players, 1, 0
 
-def initialize_board():
+def initialize_board(board_file=None):
+    if board_file:
+        return Board(board_file)
     print("Choose a game board file from the available options:")
     csv_files = [f for f in os.listdir() if f.endswith('Board.csv')]
     
@@ -96,13 +179,19 @@ def initialize_board():
         except ValueError:
             print("Please enter a valid number.")
 
-def initialize_players():
+def initialize_players(num_players=None, names=None):
+    import string
+    names = list(names or [])
     while True:
         try:
-            num_players = int(input("Enter the number of players (2-6): "))
+            if num_players is None:
+                num_players = len(names) if names else int(input("Enter the number of players (2-6): "))
             if 2<= num_players <=6:
                 players = []
                 for i in range(num_players):
+                    if i < len(names):
+                        players.append(Player(names[i]))
+                        continue
                     name = input(f"Enter name for player {i + 1} or press Enter to randomly generate a name: ")
                     if len(name) == 0:
                         letters = string.ascii_lowercase
@@ -114,6 +203,7 @@ def initialize_players():
                 print("Invalid number of players. Try again.")
         except ValueError:
             print("Please enter a valid number.")
+        num_players = None
 
 def player_turn_menu(player):
     while True:
@@ -126,96 +216,73 @@ def player_turn_menu(player):
         print("Invalid choice. Please try again.")
 
 def take_turn(player, board):
-    dice = roll_dice()
-    print(f"You rolled {dice[0]} and {dice[1]}.")
-    steps = sum(dice)
-    board.move_player(player, steps)
-    board.resolve_square(player)
+    GameEngine(board, [player], rng=random, events=CONSOLE).take_turn(player)
 
 def roll_dice():
     return random.randint(1, 6), random.randint(1, 6)
 
 def handle_jail(player, board):
-    if player.jail_turns == 3 :
-        print(f"{player.name} has reached the third turn in jail. They must pay HKD 150 to get out.")
-        if player.pay_jail_fine():
-            print(f"{player.name} paid HKD 150.")
-            player.release_from_jail()
-            move_out_of_jail(player,board)
-        else:
-            print(f"{player.name} couldn't pay the fine and goes bankrupt.")
-        
-
-    else: 
-        print(f"{player.name} is in jail (Turn {player.jail_turns + 1}/3).")
-        print("Options:")
-        print("1. Try to roll doubles to get out.")
-        print("2. Pay HKD 150 to get out.")
-        print("3. Remain In Jail.")
-
-        choice = input("Enter 1 or 2 or 3: ").strip()
-    if choice == "1":
-        # Attempt to roll doubles
-        dice = roll_dice()
-        print(f"{player.name} rolled {dice[0]} and {dice[1]}.")
-        if dice[0] == dice[1]:
-            print(f"{player.name} rolled doubles and gets out of jail!")
-            player.release_from_jail()
-            move_out_of_jail(player,board, dice)
-        else:
-            print(f"{player.name} did not roll doubles and remains in jail.")
-            player.jail_turns += 1
-
-    elif choice == "2":
-        # Pay the fine and move out of jail
-        if player.pay_jail_fine():
-            print(f"{player.name} paid HKD 150.")
-            player.release_from_jail()
-            move_out_of_jail(player,board)
-        else:
-            print(f"{player.name} couldn't pay the fine and goes bankrupt.")
-
-    else:
-        print("You remain in jail.")
-        player.jail_turns += 1
+    GameEngine(board, [player], rng=random, events=CONSOLE).handle_jail(player)
 
 def move_out_of_jail(player, board, dice=None,):
     """Handle movement for a player who gets out of jail."""
-    if dice == None:
-        dice = roll_dice()
-    print(f"{player.name} rolled {dice[0]} and {dice[1]} to move forward.")
-    board.move_player(player, sum(dice))
-    board.resolve_square(player)
+    GameEngine(board, [player], rng=random, events=CONSOLE).move_out_of_jail(player, dice)
         
 def visualize_gameboard(board, players):
-    print("\n--- Game Board ---")
-    for square in board.squares:
-        player_markers = [player.name[0] for player in players if player.position == square.position]
-        marker_str = ''.join(player_markers)
-        print(f"[{square.name} - ${square.price if hasattr(square, 'price') else 'N/A'}] {marker_str}")
+    from model.render import BoardRenderer
+    print(BoardRenderer(board, diff=False).board_text(players))
 
-def print_all_players_status(players):
+def print_all_players_status(players, odds=None):
+    from model.render import status_line
     print("\n--- Players Status ---")
     for player in players:
-        print(f"{player.name} - Money: ${player.money}, Position: {player.position}, In Jail: {player.in_jail}")
+        print(status_line(player, odds))
+
 
+def show_odds(games=2000, workers=None):
+    """Print the saved game's players with their chances of winning from where it stands."""
+    from model.odds import WinOdds
+    board, seats, players, current_round, next_seat = load_game()
+    engine = GameEngine(board, players, seats=seats, current_round=current_round, next_seat=next_seat)
+    estimator = WinOdds(workers)
+    try:
+        odds = estimator.estimate(engine, games)
+    finally:
+        estimator.close()
+    print(f"Round {current_round}, estimated from {estimator.games(engine)} games:")
+    print_all_players_status(players, odds)
 
-def save_game(board, players):
-    game_data = {
-        "players": [player.to_dict() for player in players],
-        "board": board.to_dict(),
-    }
-    with open('saved_game.json', 'w') as file:
-        json.dump(game_data, file)
+
+def save_game(journal):
+    """Every turn is already in the journal, so saving only has to close it and put it in place."""
+    if journal.path == JOURNAL_FILE:
+        journal.close()
+    else:
+        journal.move(JOURNAL_FILE)
     print("Game saved successfully.")
 
-def load_game():
-    with open('saved_game.json', 'r') as file:
-        game_data = json.load(file)
-    board = Board.from_dict(game_data['board'])
-    players = [Player.from_dict(p) for p in game_data['players']]
+def saved_journal():
+    """The journal to resume: a game that was interrupted before it was ever saved, if the player wants it back,
+    else the saved game. None when there is neither."""
+    if os.path.exists(JOURNAL_FILE + ".new.snapshot"):
+        if input("A game was interrupted before it was saved. Recover it? (y/n): ").lower() == 'y':
+            return JOURNAL_FILE + ".new"
+    if os.path.exists(JOURNAL_FILE + ".snapshot"):
+        return JOURNAL_FILE
+    return None
+
+def load_game(journal=None):
+    """Resume from the game journal, or from a saved_game.json written by older versions."""
+    from model.journal import GameJournal
+    from model import savefile
+    journal = journal or saved_journal()
+    if journal:
+        game = GameJournal.resume(journal)
+        print("Game loaded successfully.")
+        return game
+    board, seats, players, current_round = savefile.load('saved_game.json')
     print("Game loaded successfully.")
-    return board, players
+    return board, seats, players, current_round, 0
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,273 @@
+from collections import OrderedDict
+from time import perf_counter
+from weakref import WeakKeyDictionary, ref
+from model.compiled import PROPERTY, CHANCE, TAX, GO_JAIL
+from model.markov import board_hash, landing_probabilities
+from model.policy import Policy, ROLL_DOUBLES, PAY_FINE, STAY_IN_JAIL
+
+# Dice sums with their probabilities, and the doubles among them.
+SUMS = [(total, (6 - abs(total - 7)) / 36) for total in range(2, 13)]
+DOUBLES = [(2 * die, 1 / 36) for die in range(1, 7)]
+NO_DOUBLES = 30 / 36
+JAIL_OPTIONS = (ROLL_DOUBLES, PAY_FINE, STAY_IN_JAIL)
+
+MONEY_BUCKET = 25
+BANKRUPT = -1e6
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class TranspositionTable:
+    """Values of searched positions, dropping the least recently used beyond `maxsize`."""
+
+    def __init__(self, maxsize=200000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+class BoardModel:
+    """What the search needs to know about a board and its rules, as flat tuples.
+
+    `income` is a property's expected rent per opponent over `horizon` rounds, from the
+    exact landing probabilities, and counts towards its owner's worth.
+    """
+
+    def __init__(self, board, key, horizon=10):
+        compiled = board.compile()
+        self.key = key
+        self.size = len(compiled)
+        self.types = tuple(compiled.types)
+        self.prices = tuple(compiled.prices)
+        self.rents = tuple(compiled.rents)
+        self.jail_position = board.jail_position
+        rules = board.rules
+        self.chance_amounts = rules.chance_amounts
+        self.jail_fine = rules.jail_fine
+        self.jail_turn_limit = rules.jail_turn_limit or float("inf")
+        self.tax_percent = rules.tax_percent
+        self.go_salary = rules.go_salary
+        self.income = tuple(p * rent * horizon for p, rent in zip(landing_probabilities(board), compiled.rents))
+
+
+class Search:
+    """One decision's expectimax search over a compact game state.
+
+    A state is (positions, money, ownership bitmask per seat, jail turns per seat or -1,
+    bitmask of seats still playing). Each ply is one player's turn, averaged over the dice
+    and Chance cards. The searching player picks its own purchases and jail options;
+    everyone else is assumed to buy whatever they can afford and pay out of jail.
+    """
+
+    def __init__(self, model, me, table, deadline):
+        self.model = model
+        self.me = me
+        self.table = table
+        self.deadline = deadline
+        self.nodes = 0
+
+    def value(self, state, seat, depth):
+        """Expected worth for `me` when `seat` is about to play and `depth` turns are left to search."""
+        alive = state[4]
+        if depth <= 0 or not alive & (alive - 1):
+            return self.evaluate(state)
+        self.nodes += 1
+        if not self.nodes & 255 and perf_counter() > self.deadline:
+            raise SearchTimeout
+        positions, money, masks, jail, _ = state
+        key = (self.model.key, self.me, seat, depth, positions, tuple(m // MONEY_BUCKET for m in money),
+               masks, jail, alive)
+        value = self.table.get(key)
+        if value is None:
+            value = self.turn(state, seat, depth)
+            self.table.put(key, value)
+        return value
+
+    def turn(self, state, seat, depth, option=None):
+        turns = state[3][seat]
+        if turns < 0:
+            return sum(p * self.move(state, seat, steps, depth) for steps, p in SUMS)
+        if turns >= self.model.jail_turn_limit:
+            return self.pay_out(state, seat, depth)
+        if option is None:
+            if seat != self.me:
+                return self.pay_out(state, seat, depth)
+            return max(self.turn(state, seat, depth, option) for option in JAIL_OPTIONS)
+        if option == PAY_FINE:
+            return self.pay_out(state, seat, depth)
+        stuck = with_field(state, 3, seat, turns + 1)
+        if option == STAY_IN_JAIL:
+            return self.end_turn(stuck, seat, depth)
+        freed = with_field(state, 3, seat, -1)
+        return NO_DOUBLES * self.end_turn(stuck, seat, depth) + sum(
+            p * self.move(freed, seat, steps, depth) for steps, p in DOUBLES)
+
+    def pay_out(self, state, seat, depth):
+        fine = self.model.jail_fine
+        if state[1][seat] < fine:
+            return self.end_turn(retire(state, seat), seat, depth)
+        state = with_field(with_field(state, 1, seat, state[1][seat] - fine), 3, seat, -1)
+        return sum(p * self.move(state, seat, steps, depth) for steps, p in SUMS)
+
+    def move(self, state, seat, steps, depth):
+        model = self.model
+        moved = state[0][seat] + steps
+        position = moved % model.size
+        state = with_field(state, 0, seat, position)
+        if model.go_salary and moved >= model.size:
+            state = with_field(state, 1, seat, state[1][seat] + model.go_salary)
+        kind = model.types[position]
+        money = state[1]
+        if kind == PROPERTY:
+            masks = state[2]
+            bit = 1 << position
+            owner = next((other for other, mask in enumerate(masks) if mask & bit), None)
+            if owner is None:
+                if money[seat] >= model.prices[position]:
+                    bought = with_field(with_field(state, 1, seat, money[seat] - model.prices[position]),
+                                        2, seat, masks[seat] | bit)
+                    if seat != self.me:
+                        return self.end_turn(bought, seat, depth)
+                    return max(self.end_turn(bought, seat, depth), self.end_turn(state, seat, depth))
+            elif owner != seat:
+                rent = model.rents[position]
+                state = with_field(with_field(state, 1, seat, money[seat] - rent), 1, owner, money[owner] + rent)
+        elif kind == CHANCE:
+            return sum(self.end_turn(with_field(state, 1, seat, money[seat] + amount), seat, depth)
+                       for amount in model.chance_amounts) / len(model.chance_amounts)
+        elif kind == TAX:
+            state = with_field(state, 1, seat, money[seat] - money[seat] * model.tax_percent // 100)
+        elif kind == GO_JAIL and model.jail_position is not None:
+            state = with_field(with_field(state, 0, seat, model.jail_position), 3, seat, 0)
+        return self.end_turn(state, seat, depth)
+
+    def end_turn(self, state, seat, depth):
+        if state[1][seat] < 0 and state[4] >> seat & 1:
+            state = retire(state, seat)
+        seats = len(state[0])
+        alive = state[4]
+        following = next((seat + step) % seats for step in range(1, seats + 1) if alive >> ((seat + step) % seats) & 1)
+        return self.value(state, following, depth - 1)
+
+    def evaluate(self, state):
+        """Worth of `me` (money plus expected rent income) against the average opponent still playing."""
+        _, money, masks, _, alive = state
+        if not alive >> self.me & 1:
+            return BANKRUPT
+        opponents = bin(alive).count("1") - 1
+        if not opponents:
+            return -BANKRUPT
+        income = self.model.income
+        worth = []
+        for seat, mask in enumerate(masks):
+            if alive >> seat & 1:
+                total = money[seat]
+                while mask:
+                    low = mask & -mask
+                    total += income[low.bit_length() - 1] * opponents
+                    mask ^= low
+                worth.append(total)
+            else:
+                worth.append(None)
+        mine = worth[self.me]
+        return mine - (sum(w for w in worth if w is not None) - mine) / opponents
+
+
+def with_field(state, field, seat, value):
+    values = state[field]
+    return state[:field] + (values[:seat] + (value,) + values[seat + 1:],) + state[field + 1:]
+
+
+def retire(state, seat):
+    positions, money, masks, jail, alive = state
+    return positions, money, masks[:seat] + (0,) + masks[seat + 1:], jail, alive & ~(1 << seat)
+
+
+class ExpectimaxPolicy(Policy):
+    """Computer player that searches a few turns ahead over the dice, Chance cards and its own choices.
+
+    Searches deepen one turn at a time until `time_budget` seconds are used up (or
+    `max_depth` is reached), and the deepest finished search decides, so a decision never
+    takes much longer than the budget. Positions already valued are kept in a
+    transposition table shared by all of this policy's decisions and games. A board's
+    model is built when a game is joined, so its Markov solve is never timed.
+    """
+
+    def __init__(self, max_depth=4, time_budget=0.05, table_size=50000, horizon=10):
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.horizon = horizon
+        self.table = TranspositionTable(table_size)
+        self.games = WeakKeyDictionary()
+        self.models = {}
+        self.depth = 0
+
+    def join(self, engine, player):
+        board = engine.board
+        key = (board_hash(board), board.rules)
+        model = self.models.get(key)
+        if model is None:
+            model = self.models[key] = BoardModel(board, len(self.models), self.horizon)
+        # The engine holds on to its players, so it is only referenced weakly here.
+        self.games[player] = (ref(engine), model)
+
+    def game(self, player):
+        """The engine `player` is playing in and its board's model, or (None, None)."""
+        engine, model = self.games.get(player, (lambda: None, None))
+        return engine(), model
+
+    def buy_property(self, player, square):
+        engine, model = self.game(player)
+        if engine is None:
+            return True
+        state, seat = self.state(engine, player)
+        bit = 1 << square.position
+        bought = with_field(with_field(state, 1, seat, state[1][seat] - square.price), 2, seat, state[2][seat] | bit)
+        return self.choose(model, seat, [True, False], lambda search, buy, depth: search.end_turn(
+            bought if buy else state, seat, depth + 1))
+
+    def jail_option(self, player):
+        engine, model = self.game(player)
+        if engine is None:
+            return PAY_FINE
+        state, seat = self.state(engine, player)
+        return self.choose(model, seat, JAIL_OPTIONS, lambda search, option, depth: search.turn(
+            state, seat, depth + 1, option))
+
+    def choose(self, model, seat, options, score):
+        """The option with the best score from the deepest search that finished in time."""
+        deadline = perf_counter() + self.time_budget
+        best = options[0]
+        for depth in range(self.max_depth + 1):
+            search = Search(model, seat, self.table, deadline if depth else float("inf"))
+            try:
+                values = [score(search, option, depth) for option in options]
+            except SearchTimeout:
+                break
+            best = options[values.index(max(values))]
+            self.depth = depth
+        return best
+
+    def state(self, engine, player):
+        board = engine.board
+        seats = engine.seats
+        state = (tuple(p.position for p in seats),
+                 tuple(p.money for p in seats),
+                 tuple(sum(1 << position for position in board.properties_of(p)) for p in seats),
+                 tuple(p.jail_turns if p.in_jail else -1 for p in seats),
+                 sum(1 << seat for seat, p in enumerate(seats) if p in engine.players))
+        return state, seats.index(player)
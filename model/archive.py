@@ -0,0 +1,209 @@
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from model.board import Board
+from model.markov import board_hash
+
+MAX_SEATS = 6
+NAMES_BYTES = 192  # Room for six names of up to 31 bytes each in UTF-8.
+
+# board id, seed, game index, players, winner (-1 for none), rounds, final money, bankrupt round
+# per seat (0 for never), seats in the order they went bankrupt (-1 padded), ';'-joined names.
+RECORD = struct.Struct(f"<16sqqBbH{MAX_SEATS}i{MAX_SEATS}H{MAX_SEATS}b{NAMES_BYTES}s")
+
+GameRecord = namedtuple("GameRecord", ["board", "seed", "game", "players", "winner", "rounds", "money",
+                                       "bankrupt_round", "bankrupt_order", "names"])
+
+# Index entries are int64 keys of (rounds << RECORD_BITS) | record number, kept sorted.
+RECORD_BITS = 40
+ANY = object()
+FORMAT = "format.json"
+
+
+def board_id(board):
+    """16-byte id of a board's content and rules; a Board or a board CSV file."""
+    if isinstance(board, str):
+        board = Board(board)
+    rules = json.dumps(board.rules.to_dict(), sort_keys=True)
+    return hashlib.sha256(f"{board_hash(board)}:{rules}".encode()).digest()[:16]
+
+
+def pack_names(names):
+    if any(";" in name for name in names):
+        raise ValueError("Archived player names cannot contain ';'.")
+    packed = ";".join(names).encode()
+    if len(packed) > NAMES_BYTES:
+        raise ValueError(f"The archive holds at most {NAMES_BYTES} bytes of player names per game.")
+    return packed
+
+
+def pack(board, seed, game, names, result):
+    """One archive record for a finished game, as returned by GameEngine.result()."""
+    seats = len(result["money"])
+    if seats > MAX_SEATS:
+        raise ValueError(f"The archive holds games of at most {MAX_SEATS} players.")
+    padding = [0] * (MAX_SEATS - seats)
+    order = result["bankrupt_order"] + [-1] * (MAX_SEATS - len(result["bankrupt_order"]))
+    winner = result["winner"]
+    return RECORD.pack(board, seed, game, seats, -1 if winner is None else winner, result["rounds"],
+                       *result["money"], *padding,
+                       *[r or 0 for r in result["bankrupt_round"]], *padding,
+                       *order, pack_names(names))
+
+
+def unpack(data, offset=0):
+    fields = RECORD.unpack_from(data, offset)
+    seats, winner = fields[3], fields[4]
+    money = fields[6:6 + MAX_SEATS]
+    rounds = fields[6 + MAX_SEATS:6 + 2 * MAX_SEATS]
+    order = fields[6 + 2 * MAX_SEATS:6 + 3 * MAX_SEATS]
+    return GameRecord(fields[0], fields[1], fields[2], seats, None if winner < 0 else winner, fields[5],
+                      list(money[:seats]), [r or None for r in rounds[:seats]],
+                      [seat for seat in order if seat >= 0], fields[-1].rstrip(b"\0").decode().split(";"))
+
+
+class GameArchive:
+    """Append-only archive of finished games: fixed-width records in `games.bin`, read through mmap.
+
+    Each board and each winner seat has an index file of sorted int64 keys that combine
+    the game's length with its record number, so a query such as "games on this board
+    that ended before round 30" is a binary search and a slice of one mapped file, with
+    only the matching records read. New records are indexed when the archive is flushed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        check_format(directory)
+        self.path = os.path.join(directory, "games.bin")
+        self.file = open(self.path, "ab")
+        self.count = os.path.getsize(self.path) // RECORD.size
+        self.pending = {}
+        self.map = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, board, seed, game, names, result):
+        """Archive one game; `board` is a board_id()."""
+        self.extend(pack(board, seed, game, names, result))
+
+    def extend(self, records):
+        """Archive packed records, e.g. a batch sent back by a worker process."""
+        self.file.write(records)
+        for offset in range(0, len(records), RECORD.size):
+            board, winner, rounds = unpack_keys(records, offset)
+            key = rounds << RECORD_BITS | self.count
+            self.pending.setdefault(board_index(board), []).append(key)
+            self.pending.setdefault(winner_index(winner), []).append(key)
+            self.count += 1
+
+    def flush(self):
+        """Write the new records and merge their keys into the index files."""
+        self.file.flush()
+        for name, keys in self.pending.items():
+            path = os.path.join(self.directory, name)
+            merged = array("q", heapq.merge(read_index(path), sorted(keys)))
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                merged.tofile(file)
+            os.replace(temporary, path)
+        self.pending = {}
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def record(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(number)
+        if self.map is None or len(self.map) < (number + 1) * RECORD.size:
+            self.flush()
+            if self.map is not None:
+                self.map.close()
+            with open(self.path, "rb") as file:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return unpack(self.map, number * RECORD.size)
+
+    def query(self, board=None, winner=ANY, rounds=None):
+        """Record numbers of the games matching every condition given, in order of game length.
+
+        `board` is a Board, a board CSV file or a board_id(); `winner` a seat or None for
+        games without a winner; `rounds` a range of game lengths, e.g. range(30) for games
+        that ended before round 30.
+        """
+        self.flush()
+        if board is not None and not isinstance(board, bytes):
+            board = board_id(board)
+        if board is not None:
+            name = board_index(board)
+        elif winner is not ANY:
+            name = winner_index(-1 if winner is None else winner)
+        else:
+            raise ValueError("Give a board or a winner to query by.")
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return []
+        mask = (1 << RECORD_BITS) - 1
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            keys = memoryview(mapped).cast("q")
+            start, stop = 0, len(keys)
+            if rounds is not None:
+                start = bisect_left(keys, rounds.start << RECORD_BITS)
+                stop = bisect_left(keys, rounds.stop << RECORD_BITS)
+            numbers = [key & mask for key in keys[start:stop]]
+            keys.release()
+        if board is not None and winner is not ANY:
+            numbers = [number for number in numbers if self.record(number).winner == winner]
+        return numbers
+
+    def games(self, **conditions):
+        """The GameRecords a query() matches."""
+        return [self.record(number) for number in self.query(**conditions)]
+
+
+def check_format(directory):
+    """Record the layout of a new archive, or refuse to open one written with another layout."""
+    path = os.path.join(directory, FORMAT)
+    if os.path.exists(path):
+        with open(path) as file:
+            if json.load(file)["record"] != RECORD.format:
+                raise ValueError(f"The archive in {directory} was written with another record layout.")
+    elif os.path.exists(os.path.join(directory, "games.bin")):
+        raise ValueError(f"The archive in {directory} was written with another record layout.")
+    else:
+        with open(path, "w") as file:
+            json.dump({"record": RECORD.format}, file)
+
+
+def unpack_keys(records, offset):
+    """The board id, winner seat and rounds of a packed record, without unpacking the rest."""
+    board = records[offset:offset + 16]
+    winner, rounds = struct.unpack_from("<bH", records, offset + 33)
+    return bytes(board), winner, rounds
+
+
+def board_index(board):
+    return f"board-{board.hex()}.idx"
+
+
+def winner_index(winner):
+    return f"winner-{'none' if winner < 0 else winner}.idx"
+
+
+def read_index(path):
+    if not os.path.exists(path):
+        return array("q")
+    keys = array("q")
+    with open(path, "rb") as file:
+        keys.frombytes(file.read())
+    return keys
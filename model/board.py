@@ -1,59 +1,159 @@
-import csv
-from model.squares import Square, PropertySquare, ChanceSquare, TaxSquare, GoJailSquare, InJailSqaure
+import random
+from time import perf_counter
+from model import compiled as compiled_board
+from model.squares import PropertySquare
+from model.events import CONSOLE
+from model.metrics import METRICS
+from model.rules import STANDARD, load_rules
+
 
 class Board:
-    def __init__(self, csv_file=None, squares=None):
-        self.squares = self.load_board_from_csv(csv_file) if csv_file else squares
+    def __init__(self, csv_file=None, squares=None, rng=None, events=CONSOLE, rules=None):
         self.jail_position = None
+        self.rules = rules or (load_rules(csv_file) if csv_file else STANDARD)
+        self.compiled = None
+        self.squares = self.load_board_from_csv(csv_file) if csv_file else squares
+        if self.jail_position is None:
+            self.jail_position = next((s.position for s in self.squares if s.name == "In Jail"), None)
+        self.rng = rng or random
+        self.events = events
+        self.holdings = {}
+        self.property_values = {}
+        self.rent_totals = {}
+        self.purchased = set()
+        self.owner_changes = None
+        owned = []
+        for square in self.squares:
+            square.board = self
+            if getattr(square, "owner", None) is not None:
+                owned.append((square, square.owner))
+                square.owner = None
+        for _, owner in owned:
+            owner.properties.clear()  # Rebuilt from the squares below.
+        for square, owner in owned:
+            self.set_owner(square, owner)
 
     def load_board_from_csv(self, csv_file):
-        squares = []
-        with open(csv_file, 'r') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                position = int(row['position'])
-                name = row['name']
-                price = row['price']
-                rent = row['rent']
-
-                if name == "Chance":
-                    squares.append(ChanceSquare(name,position))
-                elif name == "Income Tax":
-                    squares.append(TaxSquare(name,position))
-                elif name == "Go":
-                    squares.append(Square(name,position))
-                elif name == "Go To Jail":
-                    squares.append(GoJailSquare(name,position))
-                elif name == "In Jail":
-                    self.jail_position = position
-                    squares.append(InJailSqaure(name,position))
-                elif price and rent:  # Property square
-                    squares.append(PropertySquare(name, position, int(price), int(rent)))
-                else:
-                    squares.append(Square(name, position))  # Default square type for unclassified cases
-        return squares
-
-    def to_dict(self):
-        return [square.to_dict() for square in self.squares]
+        self.compiled = compiled_board.load(csv_file)
+        self.jail_position = self.compiled.jail_position
+        return self.compiled.build_squares()
+
+    def compile(self):
+        """The compact CompiledBoard form of this board's squares."""
+        if self.compiled is None:
+            self.compiled = compiled_board.CompiledBoard.from_squares(self.squares)
+        return self.compiled
+
+    @staticmethod
+    def make_square(name, position, price=None, rent=None):
+        """Build the square a board row describes; price and rent may be strings or ints."""
+        code = compiled_board.square_type(name, price, rent)
+        if code == compiled_board.PROPERTY:
+            return PropertySquare(name, position, int(price), int(rent))
+        return compiled_board.SQUARE_CLASSES[code](name, position)
+
+    def to_dict(self, seats=None):
+        return [square.to_dict(seats) for square in self.squares]
 
     @classmethod
-    def from_dict(cls, board_data):
+    def from_dict(cls, board_data, seats=None):
+        """Rebuild a board; owners are looked up by seat number in `seats`."""
         squares = []
         for data in board_data:
-            if "rent" in data:
-                squares.append(PropertySquare.from_dict(data))
-            else:squares.append(Square.from_dict(data))
+            square = cls.make_square(data['name'], data['position'], data.get('price'), data.get('rent'))
+            if isinstance(square, PropertySquare):
+                square = PropertySquare.from_dict(data, seats)
+            squares.append(square)
         return cls(squares=squares)
 
+    def reset(self):
+        """Clear all ownership so the same board can host a new game."""
+        for player in list(self.holdings):
+            self.release(player)
+        self.purchased.clear()
+
+    def set_owner(self, square, player):
+        """Give a property to a player (or back to the bank with None), keeping the ownership index up to date."""
+        previous = square.owner
+        if previous is not None:
+            self.holdings[previous].discard(square.position)
+            self.property_values[previous] -= square.price
+            self.rent_totals[previous] -= square.rent
+            previous.properties.remove(square.name)
+        square.owner = player
+        if player is not None:
+            self.holdings.setdefault(player, set()).add(square.position)
+            self.property_values[player] = self.property_values.get(player, 0) + square.price
+            self.rent_totals[player] = self.rent_totals.get(player, 0) + square.rent
+            player.properties.append(square.name)
+            self.purchased.add(square.position)
+        if self.owner_changes is not None:
+            self.owner_changes.append((square.position, player))
+
+    def release(self, player):
+        """Return all of a player's properties to the bank, e.g. on bankruptcy."""
+        for position in self.holdings.pop(player, ()):
+            self.squares[position].owner = None
+            if self.owner_changes is not None:
+                self.owner_changes.append((position, None))
+        self.property_values.pop(player, None)
+        self.rent_totals.pop(player, None)
+        player.properties.clear()
+
+    def owner_of(self, position):
+        return getattr(self.squares[position], "owner", None)
+
+    def properties_of(self, player):
+        """Positions of the squares a player owns."""
+        return self.holdings.get(player, set())
+
+    def property_value(self, player):
+        return self.property_values.get(player, 0)
+
+    def rent_exposure(self, player):
+        """Total rent the player's properties charge, i.e. what opponents are exposed to."""
+        return self.rent_totals.get(player, 0)
+
+    def net_worth(self, player):
+        return player.money + self.property_value(player)
+
+    def standings(self, players):
+        """Players ordered from the highest net worth to the lowest."""
+        return sorted(players, key=self.net_worth, reverse=True)
+
+    def move_player_paying_salary(self, player, steps):
+        """move_player for games with a GO salary: passing or landing on Go pays the salary."""
+        passed = (player.position + steps) // len(self.squares)
+        self.move_player(player, steps)
+        if passed:
+            player.money += passed * self.rules.go_salary
+            events = self.events
+            if events.enabled:
+                events.emit("salary", player=player.name, amount=passed * self.rules.go_salary)
+
     def move_player(self, player, steps):
-        player.position = (player.position + steps) % 20
-        print(f"{player.name} moved to {self.squares[player.position].name}.")
+        timed = METRICS.enabled
+        if timed:
+            start = perf_counter()
+        player.position = (player.position + steps) % len(self.squares)
+        events = self.events
+        if events.enabled:
+            events.emit("moved", player=player.name, square=self.squares[player.position].name)
+        if timed:
+            METRICS.since("move_player", start)
 
     def resolve_square(self, player):
+        timed = METRICS.enabled
+        if timed:
+            start = perf_counter()
         square = self.squares[player.position]
         square.land_on(player)
+        if timed:
+            METRICS.since("resolve_square", start, square=type(square).__name__)
 
         if self.squares[player.position].name == "Go To Jail":
             player.position = self.jail_position
-            print(f"{player.name} moved to {self.jail_position}.")
+            events = self.events
+            if events.enabled:
+                events.emit("sent_to_jail", player=player.name, position=self.jail_position)
 
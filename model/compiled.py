@@ -0,0 +1,146 @@
+import csv
+import hashlib
+import io
+import json
+import os
+from array import array
+from model.squares import Square, PropertySquare, ChanceSquare, TaxSquare, GoJailSquare, InJailSqaure
+
+# Square type codes shared by the compiled boards and the batch simulators.
+PLAIN, PROPERTY, CHANCE, TAX, GO_JAIL, IN_JAIL = range(6)
+
+SPECIAL_SQUARES = {
+    "Chance": CHANCE,
+    "Income Tax": TAX,
+    "Go": PLAIN,
+    "Go To Jail": GO_JAIL,
+    "In Jail": IN_JAIL,
+}
+
+SQUARE_CLASSES = {
+    PLAIN: Square,
+    CHANCE: ChanceSquare,
+    TAX: TaxSquare,
+    GO_JAIL: GoJailSquare,
+    IN_JAIL: InJailSqaure,
+}
+
+CACHE_DIR = ".board_cache"
+
+_LOADED = {}
+
+
+def square_type(name, price, rent):
+    """Type code of a board row; price and rent may be strings or ints."""
+    code = SPECIAL_SQUARES.get(name)
+    if code is None:
+        code = PROPERTY if price and rent else PLAIN
+    return code
+
+
+class CompiledBoard:
+    """Immutable, compact description of a board: one array entry per square.
+
+    Prices and rents are 0 for squares that are not properties. Building the square
+    objects goes through a type-code dispatch table instead of comparing names.
+    """
+
+    __slots__ = ("names", "positions", "types", "prices", "rents", "jail_position")
+
+    def __init__(self, names, positions, types, prices, rents, jail_position):
+        self.names = names
+        self.positions = positions
+        self.types = types
+        self.prices = prices
+        self.rents = rents
+        self.jail_position = jail_position
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Compile (position, name, price, rent) rows as read from a board CSV."""
+        names, positions, types, prices, rents = [], array("q"), array("b"), array("q"), array("q")
+        jail_position = None
+        for position, name, price, rent in rows:
+            code = square_type(name, price, rent)
+            names.append(name)
+            positions.append(int(position))
+            types.append(code)
+            prices.append(int(price) if code == PROPERTY else 0)
+            rents.append(int(rent) if code == PROPERTY else 0)
+            if code == IN_JAIL:
+                jail_position = int(position)
+        return cls(tuple(names), positions, types, prices, rents, jail_position)
+
+    @classmethod
+    def from_squares(cls, squares):
+        return cls.from_rows((square.position, square.name, getattr(square, "price", None),
+                              getattr(square, "rent", None)) for square in squares)
+
+    def to_json(self):
+        return json.dumps({"names": self.names, "positions": self.positions.tolist(), "types": self.types.tolist(),
+                           "prices": self.prices.tolist(), "rents": self.rents.tolist(),
+                           "jail_position": self.jail_position})
+
+    @classmethod
+    def from_json(cls, text):
+        fields = json.loads(text)
+        return cls(tuple(fields["names"]), array("q", fields["positions"]), array("b", fields["types"]),
+                   array("q", fields["prices"]), array("q", fields["rents"]), fields["jail_position"])
+
+    def __len__(self):
+        return len(self.types)
+
+    def build_squares(self):
+        squares = []
+        for name, position, code, price, rent in zip(self.names, self.positions, self.types, self.prices, self.rents):
+            if code == PROPERTY:
+                squares.append(PropertySquare(name, position, price, rent))
+            else:
+                squares.append(SQUARE_CLASSES[code](name, position))
+        return squares
+
+
+def parse_csv(text):
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader)
+    columns = [header.index(column) for column in ("position", "name", "price", "rent")]
+    for row in reader:
+        if not "".join(row).strip():
+            continue  # Blank lines, which the csv module hands back as empty or whitespace-only rows.
+        row += [""] * (len(header) - len(row))
+        yield [row[column] for column in columns]
+
+
+def load(csv_file, cache_dir=None):
+    """Compile a board CSV, reusing earlier work whenever the file has not changed.
+
+    Boards are remembered in memory by path, size and modification time, and on disk
+    under `cache_dir` (default: .board_cache next to the CSV) by content hash, so only
+    the first load of a given board ever parses the CSV. The disk cache is plain JSON, so
+    a cache directory that came from somewhere else can at worst describe a wrong board,
+    never run code.
+    """
+    stat = os.stat(csv_file)
+    key = (os.path.abspath(csv_file), stat.st_mtime_ns, stat.st_size)
+    if key in _LOADED:
+        return _LOADED[key]
+
+    with open(csv_file, "rb") as file:
+        content = file.read()
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_file)), CACHE_DIR)
+    cache_path = os.path.join(cache_dir, hashlib.sha256(content).hexdigest() + ".json")
+    try:
+        with open(cache_path) as file:
+            compiled = CompiledBoard.from_json(file.read())
+    except (OSError, ValueError, KeyError, TypeError, OverflowError):
+        compiled = CompiledBoard.from_rows(parse_csv(content.decode()))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as file:
+                file.write(compiled.to_json())
+            os.replace(temporary, cache_path)
+        except OSError:
+            pass  # A read-only location only loses the cache.
+    _LOADED[key] = compiled
+    return compiled
@@ -0,0 +1,56 @@
+import hashlib
+import random
+from array import array
+
+BLOCK = 4096
+
+
+def derive_seed(master_seed, *path):
+    """Seed of an independent stream, e.g. derive_seed(seed, game_index) for one game of a run.
+
+    Streams are derived by hashing, so neighbouring games or workers share no state and
+    any of them can be recreated from the master seed and its path alone.
+    """
+    key = ":".join(str(part) for part in (master_seed,) + path)
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "little")
+
+
+class GameRandom(random.Random):
+    """Random numbers for one game, with dice and Chance draws served from a pre-generated block.
+
+    Each refill turns one big getrandbits() call into BLOCK unsigned words, so a roll
+    costs a list lookup instead of two randint() calls. Draws are unbiased (out-of-range
+    words are skipped) and a game is exactly replayable from its seed.
+    """
+
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self.words = []
+        self.index = 0
+        self.word_range = 1 << (8 * array("I").itemsize)
+
+    def next_word(self):
+        if self.index >= len(self.words):
+            words = array("I")
+            size = BLOCK * words.itemsize
+            words.frombytes(self.getrandbits(8 * size).to_bytes(size, "little"))
+            self.words = words.tolist()
+            self.index = 0
+        word = self.words[self.index]
+        self.index += 1
+        return word
+
+    def below(self, n):
+        """Uniform integer in [0, n)."""
+        word = self.next_word()
+        limit = self.word_range - self.word_range % n
+        while word >= limit:
+            word = self.next_word()
+        return word % n
+
+    def roll_dice(self):
+        roll = self.below(36)
+        return roll % 6 + 1, roll // 6 + 1
+
+    def choice(self, seq):
+        return seq[self.below(len(seq))]
@@ -0,0 +1,222 @@
+from collections import namedtuple
+from time import perf_counter
+from model.board import Board
+from model.player import Player
+from model.state import GameState
+from model.dice import GameRandom
+from model.events import NULL
+from model.metrics import METRICS
+from model.policy import INTERACTIVE, ROLL_DOUBLES, PAY_FINE
+
+# A game frozen between turns: the packed GameState plus what it does not cover.
+Snapshot = namedtuple("Snapshot", ["state", "next_seat", "purchased"])
+
+
+class GameEngine:
+    """Runs a game from start to finish with every decision taken from the players' policies.
+
+    The engine never reads from the terminal and only reports through the `events`
+    sink, which is disabled by default, so whole games can be played in batch jobs. The
+    interactive game passes a ConsoleSink and uses `before_turn` to show the board and menu.
+    """
+
+    def __init__(self, board, players, policies=None, rng=None, max_rounds=None, events=NULL, before_turn=None,
+                 journal=None, seats=None, current_round=1, next_seat=0, telemetry=None):
+        self.board = board
+        self.players = list(players)
+        self.seats = list(seats or players)
+        if policies is not None:
+            for player, policy in zip(self.players, policies):
+                player.policy = policy
+        self.rng = rng or GameRandom()
+        rules = board.rules
+        self.max_rounds = rules.max_rounds if max_rounds is None else max_rounds
+        # The board's rules, compiled once for the game: a rule that is switched off adds no step to a turn.
+        self.move = board.move_player_paying_salary if rules.go_salary else board.move_player
+        self.jail_fine = rules.jail_fine
+        self.jail_turn_limit = rules.jail_turn_limit or float("inf")
+        self.events = events
+        self.before_turn = before_turn
+        self.round = current_round
+        self.next_seat = next_seat
+        self.stopped = False
+        self.bankrupt_round = {}
+        self.journal = journal
+        self.telemetry = telemetry
+        self.rolls = []
+        self.landing = None
+        board.rng = self.rng
+        board.events = events
+        for player in self.seats:
+            (player.policy or INTERACTIVE).join(self, player)
+
+    def finished(self):
+        return self.stopped or self.round > self.max_rounds or len(self.players) <= 1
+
+    def run(self):
+        """Play rounds until the game is over and return its result."""
+        while not self.finished():
+            self.play_round()
+        return self.result()
+
+    def play_round(self):
+        if self.events.enabled:
+            self.events.emit("round", round=self.round)
+        for player in self.players[:]:
+            if len(self.players) == 1:
+                break
+            seat = self.seats.index(player)
+            if seat < self.next_seat:
+                continue  # Resuming a game part-way through this round.
+            self.next_seat = seat  # So a snapshot taken from here on resumes with this turn.
+            if self.before_turn is not None and self.before_turn(self, player) is False:
+                self.stopped = True
+                return
+            self.play_turn(player)
+        self.next_seat = 0
+        self.round += 1
+
+    def play_turn(self, player):
+        self.rolls = []
+        self.landing = None
+        timed = METRICS.enabled
+        if timed:
+            start = perf_counter()
+        if player.in_jail:
+            self.handle_jail(player)
+            if timed:
+                METRICS.since("jail", start)
+        else:
+            self.take_turn(player)
+        if player.money < 0 and player in self.players:
+            self.retire(player)
+        if timed:
+            METRICS.since("turn", start)
+        if self.journal is not None:
+            self.journal.record_turn(self, player)
+        if self.telemetry is not None:
+            self.telemetry.record_turn(self, player)
+
+    def retire(self, player, reason="bankrupt"):
+        """Take a bankrupt player out of the game and return their properties to the bank."""
+        if self.events.enabled:
+            self.events.emit(reason, player=player.name)
+        self.players.remove(player)
+        self.bankrupt_round[player] = self.round
+        if METRICS.enabled:
+            METRICS.count("retirements", reason=reason)
+        self.board.release(player)
+
+    def roll_dice(self):
+        if isinstance(self.rng, GameRandom):
+            dice = self.rng.roll_dice()
+        else:
+            dice = self.rng.randint(1, 6), self.rng.randint(1, 6)
+        self.rolls.append(dice)
+        if METRICS.enabled:
+            METRICS.count("dice_rolls")
+        return dice
+
+    def take_turn(self, player):
+        dice = self.roll_dice()
+        if self.events.enabled:
+            self.events.emit("rolled", player=player.name, dice=dice)
+        self.move(player, sum(dice))
+        self.land(player)
+
+    def land(self, player):
+        """Apply the square the player's move ended on; always the last step of a move."""
+        self.landing = player.position
+        self.board.resolve_square(player)
+
+    def handle_jail(self, player):
+        if player.jail_turns >= self.jail_turn_limit:
+            if self.events.enabled:
+                self.events.emit("jail_forced", player=player.name, fine=self.jail_fine, turns=self.jail_turn_limit)
+            self.pay_out_of_jail(player)
+            return
+
+        choice = (player.policy or INTERACTIVE).jail_option(player)
+        if choice == ROLL_DOUBLES:
+            dice = self.roll_dice()
+            if self.events.enabled:
+                self.events.emit("jail_rolled", player=player.name, dice=dice)
+            if dice[0] == dice[1]:
+                if self.events.enabled:
+                    self.events.emit("jail_doubles", player=player.name)
+                player.release_from_jail()
+                self.move_out_of_jail(player, dice)
+            else:
+                if self.events.enabled:
+                    self.events.emit("jail_no_doubles", player=player.name)
+                player.jail_turns += 1
+        elif choice == PAY_FINE:
+            self.pay_out_of_jail(player)
+        else:
+            if self.events.enabled:
+                self.events.emit("jail_stay", player=player.name)
+            player.jail_turns += 1
+
+    def pay_out_of_jail(self, player):
+        if player.pay_jail_fine(self.jail_fine):
+            if self.events.enabled:
+                self.events.emit("fine_paid", player=player.name, fine=self.jail_fine)
+            player.release_from_jail()
+            self.move_out_of_jail(player)
+        else:
+            self.retire(player, "fine_unpaid")
+
+    def move_out_of_jail(self, player, dice=None):
+        """Handle movement for a player who gets out of jail."""
+        if dice is None:
+            dice = self.roll_dice()
+        if self.events.enabled:
+            self.events.emit("leave_jail", player=player.name, dice=dice)
+        self.move(player, sum(dice))
+        self.land(player)
+
+    def snapshot(self):
+        """The game as it stands, in a few hundred bytes, for rolling back or forking."""
+        return Snapshot(GameState.capture(self.board, self.seats, self.players, self.round), self.next_seat,
+                        frozenset(self.board.purchased))
+
+    def restore(self, snapshot):
+        """Roll the game back (or forward) to a snapshot taken from this game or one of its forks."""
+        self.players, self.round = snapshot.state.restore(self.board, self.seats)
+        self.next_seat = snapshot.next_seat
+        self.board.purchased = set(snapshot.purchased)
+        self.bankrupt_round = {player: r for player, r in self.bankrupt_round.items() if player not in self.players}
+        self.stopped = False
+        self.rolls = []
+
+    def fork(self, rng=None, snapshot=None):
+        """An independent copy of the game, or of `snapshot`, to play out a what-if.
+
+        The fork gets fresh squares from the compiled board and fresh players with the
+        same names and policies; it reports nothing and writes no journal.
+        """
+        snapshot = snapshot or self.snapshot()
+        board = Board(squares=self.board.compile().build_squares(), rules=self.board.rules)
+        seats = [Player(player.name, policy=player.policy) for player in self.seats]
+        fork = GameEngine(board, [], rng=rng, max_rounds=self.max_rounds, seats=seats)
+        fork.bankrupt_round = {seats[self.seats.index(player)]: r for player, r in self.bankrupt_round.items()}
+        fork.restore(snapshot)
+        return fork
+
+    def winner(self):
+        """The last player standing, or the richest one if the round limit was reached."""
+        if not self.players:
+            return None
+        return max(self.players, key=lambda p: p.money)
+
+    def result(self):
+        winner = self.winner()
+        return {
+            "winner": self.seats.index(winner) if winner is not None else None,
+            "rounds": self.round - 1,
+            "money": [player.money for player in self.seats],
+            "bankrupt_round": [self.bankrupt_round.get(player) for player in self.seats],
+            "bankrupt_order": [self.seats.index(player) for player in self.bankrupt_round],
+            "purchased": sorted(self.board.purchased),
+            "stopped": self.stopped,
+        }
@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+Event = namedtuple("Event", ["kind", "data"])
+
+# How the console shows each kind of event, given the event's fields.
+MESSAGES = {
+    "round": lambda e: f"\n--- Round {e['round']} ---",
+    "rolled": lambda e: f"You rolled {e['dice'][0]} and {e['dice'][1]}.",
+    "moved": lambda e: f"{e['player']} moved to {e['square']}.",
+    "salary": lambda e: f"{e['player']} passed Go and collects ${e['amount']}.",
+    "no_effect": lambda e: f"{e['player']} landed on {e['position']} {e['square']}. No effect.",
+    "bought": lambda e: f"{e['player']} bought {e['square']}.",
+    "rent": lambda e: f"{e['player']} pays ${e['amount']} rent to {e['owner']}.",
+    "chance": lambda e: (f"{e['player']} landed on Chance and "
+                         f"{'gained' if e['amount'] > 0 else 'lost'} ${abs(e['amount'])}."),
+    "tax": lambda e: f"{e['player']} paid ${e['amount']} in taxes.",
+    "go_to_jail": lambda e: f"{e['player']} landed on Jail and is sent to In Jail Square.",
+    "sent_to_jail": lambda e: f"{e['player']} moved to {e['position']}.",
+    "jail_visit": lambda e: f"{e['player']} is in Jail for {e['turns']} times",
+    "jail_forced": lambda e: (f"{e['player']} has reached turn {e['turns']} in jail. "
+                              f"They must pay HKD {e['fine']} to get out."),
+    "jail_rolled": lambda e: f"{e['player']} rolled {e['dice'][0]} and {e['dice'][1]}.",
+    "jail_doubles": lambda e: f"{e['player']} rolled doubles and gets out of jail!",
+    "jail_no_doubles": lambda e: f"{e['player']} did not roll doubles and remains in jail.",
+    "jail_stay": lambda e: "You remain in jail.",
+    "fine_paid": lambda e: f"{e['player']} paid HKD {e['fine']}.",
+    "fine_unpaid": lambda e: f"{e['player']} couldn't pay the fine and goes bankrupt.",
+    "leave_jail": lambda e: f"{e['player']} rolled {e['dice'][0]} and {e['dice'][1]} to move forward.",
+    "bankrupt": lambda e: f"{e['player']} is bankrupt and has retired from the game.",
+}
+
+
+class EventSink:
+    """Receives game events. Callers check `enabled` before building an event, so a
+    disabled sink costs one attribute lookup and nothing is ever formatted for it."""
+
+    enabled = True
+
+    def emit(self, kind, **data):
+        raise NotImplementedError
+
+
+class NullSink(EventSink):
+    enabled = False
+
+    def emit(self, kind, **data):
+        pass
+
+
+class ConsoleSink(EventSink):
+    """Prints every event as the game has always shown it."""
+
+    def emit(self, kind, **data):
+        print(MESSAGES[kind](data))
+
+
+class RecordingSink(EventSink):
+    """Keeps every event as a typed Event, for tests and analysis."""
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, kind, **data):
+        self.events.append(Event(kind, data))
+
+    def of_kind(self, kind):
+        return [event.data for event in self.events if event.kind == kind]
+
+
+NULL = NullSink()
+CONSOLE = ConsoleSink()
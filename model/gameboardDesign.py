@@ -1,4 +1,26 @@
+import argparse
 import csv
+import json
+import multiprocessing
+import os
+import random
+from collections import Counter
+from model.board import Board
+from model.markov import analyze
+from model.rules import STANDARD, load_rules
+
+# Squares on a board made in the interactive designer.
+BOARD_SIZE = 20
+
+# How many of each special square a valid board has: (fewest, most).
+SPECIAL_COUNTS = {
+    "Go": (1, 1),
+    "In Jail": (1, 1),
+    "Go To Jail": (0, 1),
+    "Chance": (0, None),
+    "Income Tax": (0, None),
+    "Free Parking": (0, None),
+}
 
 
 class GameboardDesigner:
@@ -8,7 +30,7 @@ class GameboardDesigner:
         "Chance",
         "Income Tax",
         "Free Parking",
-        "Go to Jail",
+        "Go To Jail",
         "In Jail"
     ]
 
@@ -38,7 +60,7 @@ class GameboardDesigner:
         """Create a new gameboard."""
         print("\n--- Create a New Gameboard ---")
         squares = []
-        while len(squares) <= 20:
+        while len(squares) < BOARD_SIZE:
             position = len(squares)
             
             square_type = self.select_square_type()
@@ -76,9 +98,11 @@ class GameboardDesigner:
             squares = self.load_gameboard_from_csv(filename)
             print("\nGameboard loaded successfully!")
             print(f"{len(squares)} squares found on the gameboard.")
+            rois = self.expected_roi(squares, rules=load_rules(filename))
             for square in squares:
+                roi = f", Expected ROI: {rois[square['position']]:.0%}" if square['position'] in rois else ""
                 print(f"{square['position']}: {square['name']} , "
-                      f"Price: {square['price']}, Rent: {square['rent']})")
+                      f"Price: {square['price']}, Rent: {square['rent']}{roi})")
 
             # Modify the gameboard
             while True:
@@ -116,6 +140,14 @@ class GameboardDesigner:
         except FileNotFoundError:
             print("Gameboard file not found. Please try again.")
 
+    def expected_roi(self, squares, num_players=4, rounds=None, rules=STANDARD):
+        """Expected return on investment of every property, keyed by position, over `rounds`
+        (default: the rules' round limit)."""
+        board = Board(squares=[Board.make_square(square["name"], square["position"],
+                                                 square.get("price"), square.get("rent"))
+                               for square in squares], rules=rules)
+        return {row["position"]: row["roi"] for row in analyze(board, num_players, rounds) if "roi" in row}
+
     def select_square_type(self, default=None):
         """Allow the designer to select a square type."""
         print("\nSelect a square type:")
@@ -136,16 +168,7 @@ class GameboardDesigner:
     def save_gameboard_to_csv(self, squares,filename):
         """Save the gameboard to a CSV file."""
         try:
-            
-            with open(filename, "w", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow(["position", "name", "price", "rent"])
-                for square in squares:
-                    if "price" in square: 
-                        writer.writerow([square["position"], square["name"], square["price"], square["rent"]])
-                    else:
-                        writer.writerow([square["position"], square["name"], None, None])
-
+            write_board(squares, filename)
             print(f"Gameboard saved to {filename}.")
         except FileNotFoundError:
             print("Gameboard file already exist. Please try again.")
@@ -163,3 +186,173 @@ class GameboardDesigner:
                     "rent": int(row["rent"]) if row["rent"] else None
                 })
         return squares
+
+
+def generate_board(spec, seed=0):
+    """Squares of a board built from a parameter spec, in the designer's dict format.
+
+    Spec keys (all optional): size (20), chance (3), tax (1), free_parking (1),
+    go_to_jail (True), min_price (100), max_price (800), rent_ratio (0.1) and
+    name ("Property {position}"). Go is at 0, In Jail a quarter of the way round and
+    Go To Jail three quarters; the other special squares go on random positions.
+    """
+    rng = random.Random(spec.get("seed", seed))
+    size = spec.get("size", BOARD_SIZE)
+    names = {0: "Go", size // 4: "In Jail"}
+    if spec.get("go_to_jail", True):
+        names[3 * size // 4] = "Go To Jail"
+    free = [position for position in range(size) if position not in names]
+    extra = ["Chance"] * spec.get("chance", 3) + ["Income Tax"] * spec.get("tax", 1)
+    extra += ["Free Parking"] * spec.get("free_parking", 1)
+    if len(extra) > len(free):
+        raise ValueError(f"A board of {size} squares has no room for {len(extra)} special squares.")
+    names.update(zip(rng.sample(free, len(extra)), extra))
+
+    low, high = spec.get("min_price", 100), spec.get("max_price", 800)
+    ratio = spec.get("rent_ratio", 0.1)
+    template = spec.get("name", "Property {position}")
+    squares = []
+    for position in range(size):
+        if position in names:
+            squares.append({"position": position, "name": names[position], "price": None, "rent": None})
+        else:
+            price = rng.randrange(low, high + 1, 50) if high >= low + 50 else low
+            squares.append({"position": position, "name": template.format(position=position), "price": price,
+                            "rent": max(1, round(price * ratio))})
+    return squares
+
+
+def validate_board(squares):
+    """Problems that stop a board from playing properly; an empty list means it is valid."""
+    problems = []
+    if len(squares) < 2:
+        problems.append("A board needs at least 2 squares.")
+    for index, square in enumerate(squares):
+        if square["position"] != index:
+            problems.append(f"Square {index} has position {square['position']}.")
+            break
+
+    counts = Counter(square["name"] for square in squares)
+    for name, (fewest, most) in SPECIAL_COUNTS.items():
+        if counts[name] < fewest or (most is not None and counts[name] > most):
+            wanted = fewest if fewest == most else f"at most {most}" if fewest == 0 else f"at least {fewest}"
+            problems.append(f"Expected {wanted} {name} square(s), found {counts[name]}.")
+    if squares and squares[0]["name"] != "Go":
+        problems.append("Go must be at position 0.")
+
+    specials = {name.lower(): name for name in SPECIAL_COUNTS}
+    reported = set()
+    for square in squares:
+        name, price, rent = square["name"], square.get("price"), square.get("rent")
+        if name in SPECIAL_COUNTS:
+            continue
+        if name.lower() in specials:
+            problems.append(f"Square {square['position']} is named {name!r}; the game only knows "
+                            f"{specials[name.lower()]!r}.")
+        elif price or rent:
+            if not (isinstance(price, int) and price > 0 and isinstance(rent, int) and rent > 0):
+                problems.append(f"Property {name!r} needs a positive price and rent.")
+            elif counts[name] > 1 and name not in reported:
+                reported.add(name)
+                problems.append(f"Property name {name!r} is used {counts[name]} times.")
+    return problems
+
+
+def write_board(squares, filename):
+    """Write a board in the CSV layout Board reads, with a single write."""
+    with open(filename, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["position", "name", "price", "rent"])
+        writer.writerows([square["position"], square["name"], square.get("price"), square.get("rent")]
+                         for square in squares)
+
+
+def read_board(filename):
+    """Load a board CSV as designer square dicts, without printing anything."""
+    with open(filename, newline="") as file:
+        return [{"position": int(row["position"]), "name": row["name"],
+                 "price": int(row["price"]) if row.get("price") else None,
+                 "rent": int(row["rent"]) if row.get("rent") else None}
+                for row in csv.DictReader(file)]
+
+
+def build_one(task):
+    """Generate, validate and, if valid, write one board. Runs in a worker process."""
+    spec, seed, filename = task
+    try:
+        squares = generate_board(spec, seed)
+    except ValueError as error:
+        return filename, [str(error)]
+    problems = validate_board(squares)
+    if not problems:
+        write_board(squares, filename)
+    return filename, problems
+
+
+def check_one(filename):
+    try:
+        return filename, validate_board(read_board(filename))
+    except (OSError, KeyError, ValueError) as error:
+        return filename, [f"Cannot read board: {error}"]
+
+
+def run_pool(function, tasks, workers=None, chunk_size=16):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return dict(map(function, tasks))
+    with multiprocessing.Pool(workers) as pool:
+        return dict(pool.imap_unordered(function, tasks, chunk_size))
+
+
+def expand_specs(specs, directory):
+    """(spec, seed, filename) for every board the specs ask for; a spec's "count" makes that many."""
+    for index, spec in enumerate(specs):
+        prefix = spec.get("prefix", f"spec{index}-")
+        first = spec.get("seed", 0)
+        for seed in range(first, first + spec.get("count", 1)):
+            spec_seed = dict(spec, seed=seed)
+            yield spec_seed, seed, os.path.join(directory, f"{prefix}{seed}Board.csv")
+
+
+def build_boards(specs, directory, workers=None):
+    """Generate the boards of a list of specs into `directory`, validating them in parallel.
+
+    Returns {filename: problems}; only boards without problems are written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    return run_pool(build_one, expand_specs(specs, directory), workers)
+
+
+def validate_files(filenames, workers=None):
+    """Validate existing board CSVs in parallel; returns {filename: problems}."""
+    return run_pool(check_one, filenames, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and validate game boards without the interactive designer.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write the boards described by a JSON list of specs")
+    generate.add_argument("specs", help="JSON file with a list of board specs")
+    generate.add_argument("directory", help="where to write the boards")
+    validate = commands.add_parser("validate", help="check board CSV files")
+    validate.add_argument("files", nargs="+")
+    for command in (generate, validate):
+        command.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        with open(args.specs) as file:
+            results = build_boards(json.load(file), args.directory, args.workers)
+    else:
+        results = validate_files(args.files, args.workers)
+    invalid = {filename: problems for filename, problems in results.items() if problems}
+    for filename, problems in sorted(invalid.items()):
+        for problem in problems:
+            print(f"{filename}: {problem}")
+    print(f"{len(results) - len(invalid)} of {len(results)} boards valid.")
+    if invalid:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
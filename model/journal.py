@@ -0,0 +1,145 @@
+import json
+import os
+from array import array
+from time import perf_counter
+from model.board import Board
+from model.player import Player
+from model.state import GameState
+from model.metrics import METRICS
+from model.rules import Rules
+
+
+def player_fields(player):
+    return [player.money, player.position, player.in_jail, player.jail_turns]
+
+
+class GameJournal:
+    """Append-only log of a game, one line per turn, plus a periodic compact snapshot.
+
+    Each turn appends the dice rolled, the seats whose money, position or jail state
+    changed, ownership changes and retirements, so saving costs one small write and a
+    crash loses at most the turn being written. Every `snapshot_every` turns the whole
+    game is packed into `<path>.snapshot` together with the journal offset it covers;
+    resuming loads that snapshot and replays only the turns after it.
+    """
+
+    def __init__(self, path, snapshot_every=50):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.snapshot_every = snapshot_every
+        self.file = None
+        self.last = []
+        self.turns = 0
+
+    def start(self, engine):
+        """Begin a new journal for a game that is about to start, or resume from another save."""
+        self.file = open(self.path, "w")
+        self.last = [player_fields(player) for player in engine.seats]
+        engine.board.owner_changes = []
+        self.write_snapshot(engine, engine.next_seat - 1)
+
+    def attach(self, engine):
+        """Continue appending to the journal of a resumed game."""
+        self.file = open(self.path, "a")
+        self.last = [player_fields(player) for player in engine.seats]
+        engine.board.owner_changes = []
+
+    def record_turn(self, engine, player):
+        timed = METRICS.enabled
+        if timed:
+            start = perf_counter()
+        seat = engine.seats.index(player)
+        record = {"round": engine.round, "seat": seat, "dice": engine.rolls}
+        changed = {}
+        for other, fields in enumerate(map(player_fields, engine.seats)):
+            if fields != self.last[other]:
+                changed[other] = self.last[other] = fields
+        if changed:
+            record["players"] = changed
+        changes = engine.board.owner_changes
+        if changes:
+            record["owners"] = [[position, engine.seats.index(owner) if owner is not None else -1]
+                                for position, owner in changes]
+            changes.clear()
+        if player not in engine.players:
+            record["retired"] = seat
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+        self.turns += 1
+        if self.turns % self.snapshot_every == 0:
+            self.write_snapshot(engine, seat)
+        if timed:
+            METRICS.since("save", start, kind="journal")
+
+    def write_snapshot(self, engine, seat):
+        board = engine.board
+        state = GameState.capture(board, engine.seats, engine.players, engine.round)
+        snapshot = {
+            "board": [[square.name, square.position, getattr(square, "price", None), getattr(square, "rent", None)]
+                      for square in board.squares],
+            "players": [player.name for player in engine.seats],
+            "rules": board.rules.to_dict(),
+            "state": state.values.tolist(),
+            "seat": seat,
+            "offset": self.file.tell(),
+        }
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(snapshot, file)
+        os.replace(temporary, self.snapshot_path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def move(self, path):
+        """Close the journal and move it, with its snapshot, to `path`, replacing the game saved there."""
+        self.close()
+        os.replace(self.path, path)
+        os.replace(self.snapshot_path, path + ".snapshot")
+        self.path, self.snapshot_path = path, path + ".snapshot"
+
+    def delete(self):
+        self.close()
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def resume(path):
+        """Rebuild a game from its journal.
+
+        Returns (board, seats, players, round, next seat), where seats is every player
+        in seat order and players those still in the game.
+        """
+        with open(path + ".snapshot") as file:
+            snapshot = json.load(file)
+        board = Board(squares=[Board.make_square(*square) for square in snapshot["board"]],
+                      rules=Rules.from_dict(snapshot.get("rules", {})))
+        seats = [Player(name) for name in snapshot["players"]]
+        state = GameState(array("q", snapshot["state"]), len(seats))
+        players, current_round = state.restore(board, seats)
+        seat = snapshot["seat"]
+
+        with open(path) as file:
+            file.seek(snapshot["offset"])
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # A turn cut off by a crash.
+                current_round, seat = record["round"], record["seat"]
+                for other, fields in record.get("players", {}).items():
+                    player = seats[int(other)]
+                    player.money, player.position, player.in_jail, player.jail_turns = fields
+                for position, owner in record.get("owners", []):
+                    board.set_owner(board.squares[position], seats[owner] if owner >= 0 else None)
+                if "retired" in record:
+                    players.remove(seats[record["retired"]])
+
+        seat += 1
+        if seat >= len(seats):
+            current_round, seat = current_round + 1, 0
+        return board, seats, players, current_round, seat
@@ -0,0 +1,251 @@
+import hashlib
+from model.squares import PropertySquare, GoJailSquare
+from model.policy import ROLL_DOUBLES, PAY_FINE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# (sum, probability, doubles) for every outcome of two dice.
+DICE = [(a + b, 1 / 36, a == b) for a in range(1, 7) for b in range(1, 7)]
+
+_MATRICES = {}
+_LANDINGS = {}
+
+
+def board_hash(board):
+    """Hash of everything about a board that affects movement and rent."""
+    content = repr([(type(square).__name__, square.name, getattr(square, "price", None),
+                     getattr(square, "rent", None)) for square in board.squares])
+    return hashlib.sha256(f"{board.jail_position}|{content}".encode()).hexdigest()
+
+
+def layout_hash(board):
+    """Hash of the part of a board that decides where players go: its size and where the jail squares are.
+
+    Prices, rents and names do not change any probability, so boards that differ only in
+    those share one transition matrix and one stationary distribution.
+    """
+    types = [isinstance(square, GoJailSquare) for square in board.squares]
+    return hashlib.sha256(f"{board.jail_position}|{types}".encode()).hexdigest()
+
+
+def transition_matrix(board, jail_option=PAY_FINE):
+    """Sparse one-turn transition matrix of a single player's position on a board.
+
+    States 0..n-1 are the squares; with a jail on the board, states n..n+k are "in jail
+    with k failed turns", up to the jail turn limit in the board's rules (one jail state
+    when the rules set no limit). Each row is a list of (next state, landed square,
+    probability), where the landed square is None for a jail turn without a move.
+    Matrices are cached by board layout and jail turn limit, so each is only built once.
+    """
+    key = (layout_hash(board), board.rules.jail_turn_limit, jail_option)
+    if key not in _MATRICES:
+        _MATRICES[key] = _build_matrix(board, jail_option)
+    return _MATRICES[key]
+
+
+def _build_matrix(board, jail_option):
+    size = len(board.squares)
+    jail = board.jail_position
+
+    def landing(square, probability):
+        if jail is not None and isinstance(board.squares[square], GoJailSquare):
+            return size, square, probability
+        return square, square, probability
+
+    def roll_from(position):
+        return [landing((position + steps) % size, p) for steps, p, _ in DICE]
+
+    rows = [roll_from(position) for position in range(size)]
+    if jail is None:
+        return rows
+
+    limit = board.rules.jail_turn_limit
+    states = limit + 1 if limit else 1
+    for turns in range(states):
+        stuck = size + min(turns + 1, states - 1)
+        if (limit and turns == limit) or jail_option == PAY_FINE:
+            rows.append(roll_from(jail))
+        elif jail_option == ROLL_DOUBLES:
+            row = [landing((jail + steps) % size, p) for steps, p, doubles in DICE if doubles]
+            row.append((stuck, None, 30 / 36))
+            rows.append(row)
+        else:
+            rows.append([(stuck, None, 1.0)])
+    return rows
+
+
+def stationary_distribution(rows, size=None):
+    """Solve pi = pi * P with sum(pi) = 1.
+
+    `size` is the number of board squares, the first rows; the rest are jail states.
+    With NumPy a board whose moves only go a few squares forward is solved in time
+    linear in its size, and anything else by a dense solve; without NumPy by Gaussian
+    elimination in Python.
+    """
+    if numpy is None:
+        return _gaussian_stationary(rows)
+    sparse = _sparse(rows)
+    if size is not None:
+        sources, targets, _ = sparse
+        on_board = (sources < size) & (targets < size)
+        offsets = (targets[on_board] - sources[on_board]) % size
+        reach = int(offsets.max(initial=0))
+        if 0 < 4 * reach < size and offsets.min() > 0:
+            return _marched_stationary(sparse, len(rows), size, reach)
+    return _dense_stationary(sparse, len(rows))
+
+
+def _sparse(rows):
+    """The transition probabilities of `rows` as NumPy arrays of source, target and probability."""
+    counts = [len(row) for row in rows]
+    sources = numpy.repeat(numpy.arange(len(rows)), counts)
+    targets = numpy.fromiter((target for row in rows for target, _, _ in row), numpy.int64, len(sources))
+    probabilities = numpy.fromiter((p for row in rows for _, _, p in row), float, len(sources))
+    return sources, targets, probabilities
+
+
+def _dense_stationary(sparse, n):
+    sources, targets, probabilities = sparse
+    a = numpy.zeros((n + 1, n))
+    numpy.add.at(a, (targets, sources), probabilities)
+    a[numpy.arange(n), numpy.arange(n)] -= 1.0
+    a[n] = 1.0
+    b = numpy.zeros(n + 1)
+    b[n] = 1.0
+    return numpy.linalg.lstsq(a, b, rcond=None)[0].tolist()
+
+
+def _marched_stationary(sparse, n, size, reach):
+    """Stationary distribution of a board whose moves go at most `reach` squares forward.
+
+    Every square's probability is a combination of the `reach` squares behind it and the
+    states off the board (jail), so marching once round the board expresses all of them
+    in terms of the first `reach` squares and the jail states. The equations of those few
+    states, with sum(pi) = 1, are then a small linear system. O(size * reach^2).
+    """
+    extra = n - size
+    unknowns = reach + extra
+    sources, targets, probabilities = sparse
+    on_board = (sources < size) & (targets < size)
+    # band[square, column] is the probability of moving from square - reach + column to square.
+    band = numpy.zeros((size, reach))
+    numpy.add.at(band, (targets[on_board], reach - (targets[on_board] - sources[on_board]) % size),
+                 probabilities[on_board])
+    from_jail = (sources >= size) & (targets < size)
+    jail = numpy.zeros((size, unknowns))
+    numpy.add.at(jail, (targets[from_jail], sources[from_jail] - size + reach), probabilities[from_jail])
+
+    # coefficients[state] @ x = pi[state], x being pi of squares 0..reach-1 and of the jail states.
+    coefficients = numpy.zeros((n, unknowns))
+    coefficients[numpy.arange(reach), numpy.arange(reach)] = 1.0
+    coefficients[size + numpy.arange(extra), reach + numpy.arange(extra)] = 1.0
+    for square in range(reach, size):
+        coefficients[square] = band[square] @ coefficients[square - reach:square] + jail[square]
+
+    equations = numpy.zeros((unknowns + 1, unknowns))
+    equations[:reach] = coefficients[:reach] - jail[:reach]
+    for square in range(reach):
+        behind = (square - reach + numpy.arange(reach)) % size
+        equations[square] -= band[square] @ coefficients[behind]
+    into_jail = targets >= size
+    equations[reach:unknowns] = coefficients[size:]
+    numpy.subtract.at(equations, targets[into_jail] - size + reach,
+                      probabilities[into_jail, None] * coefficients[sources[into_jail]])
+    equations[unknowns] = coefficients.sum(axis=0)
+    b = numpy.zeros(unknowns + 1)
+    b[unknowns] = 1.0
+    x = numpy.linalg.lstsq(equations, b, rcond=None)[0]
+    return (coefficients @ x).tolist()
+
+
+def _gaussian_stationary(rows):
+    """Dense Gaussian elimination in Python, for when NumPy is not installed."""
+    n = len(rows)
+    # Equations (P^T - I) pi = 0, with the last one replaced by sum(pi) = 1.
+    a = [[0.0] * n + [0.0] for _ in range(n)]
+    for state, row in enumerate(rows):
+        a[state][state] -= 1.0
+        for target, _, p in row:
+            a[target][state] += p
+    a[n - 1] = [1.0] * n + [1.0]
+
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        lead = a[col][col]
+        if lead == 0:
+            continue
+        pivot_row = [value / lead for value in a[col]]
+        a[col] = pivot_row
+        for r in range(n):
+            factor = a[r][col]
+            if r != col and factor:
+                a[r] = [value - factor * p for value, p in zip(a[r], pivot_row)]
+    return [a[state][n] for state in range(n)]
+
+
+def landing_probabilities(board, jail_option=PAY_FINE):
+    """Long-run probability that a single turn ends with a landing on each square."""
+    key = (layout_hash(board), board.rules.jail_turn_limit, jail_option)
+    if key not in _LANDINGS:
+        rows = transition_matrix(board, jail_option)
+        pi = stationary_distribution(rows, len(board.squares))
+        landings = [0.0] * len(board.squares)
+        for state, row in enumerate(rows):
+            for _, square, p in row:
+                if square is not None:
+                    landings[square] += pi[state] * p
+        _LANDINGS[key] = landings
+    return list(_LANDINGS[key])
+
+
+def analyze(board, num_players=4, rounds=None, jail_option=PAY_FINE):
+    """Landing probability and expected rent income of every square of a board.
+
+    Income is what a property earns from the other players' turns over `rounds`
+    rounds (default: the round cap in the board's rules), and `roi` is that income
+    relative to the price.
+    """
+    rounds = rounds or board.rules.max_rounds
+    analysis = []
+    for square, probability in zip(board.squares, landing_probabilities(board, jail_option)):
+        row = {"position": square.position, "name": square.name, "probability": probability}
+        if isinstance(square, PropertySquare):
+            rent_per_turn = probability * square.rent
+            income = rent_per_turn * (num_players - 1) * rounds
+            row.update(price=square.price, rent=square.rent, rent_per_turn=rent_per_turn,
+                       expected_income=income, roi=(income - square.price) / square.price)
+        analysis.append(row)
+    return analysis
+
+
+def main(argv=None):
+    import argparse
+    import json
+    from model.board import Board
+
+    parser = argparse.ArgumentParser(description="Exact landing probabilities and expected rent of a board.")
+    parser.add_argument("board", help="board CSV file")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=None, help="rounds of rent income (default: the round cap)")
+    parser.add_argument("--jail", choices=[ROLL_DOUBLES, PAY_FINE, "3"], default=PAY_FINE,
+                        help="jail option the player always picks (1 roll, 2 pay, 3 stay)")
+    parser.add_argument("--json", action="store_true", help="print the analysis as JSON")
+    args = parser.parse_args(argv)
+
+    rows = analyze(Board(args.board), args.players, args.rounds, args.jail)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        line = f"{row['position']:>3} {row['name']:<15} {row['probability']:.2%}"
+        if "roi" in row:
+            line += f"  price {row['price']:>5}  rent {row['rent']:>4}  ROI {row['roi']:.0%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
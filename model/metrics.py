@@ -0,0 +1,144 @@
+import json
+import os
+from bisect import bisect_left
+from time import perf_counter
+
+# Upper bounds, in seconds, of the timing histogram buckets; the last bucket is +Inf.
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 0.1, 1.0)
+
+PREFIX = "monopoly_"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        for bucket, count in enumerate(other.counts):
+            self.counts[bucket] += count
+        self.count += other.count
+        self.total += other.total
+
+
+class Metrics:
+    """Counters and timing histograms for the game loop, keyed by name and labels.
+
+    Instrumented code checks `enabled` before it reads the clock or counts anything, the
+    same way it checks an event sink, so with metrics off (the default) the cost is one
+    attribute lookup per call site. Switch on with `METRICS.enable()` at any time.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = {}
+        self.histograms = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+    def since(self, name, start, **labels):
+        """Record the time elapsed since `start`, a perf_counter() reading."""
+        self.observe(name, perf_counter() - start, **labels)
+
+    def merge(self, other):
+        """Add the totals of another Metrics, e.g. one sent back by a worker process."""
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, theirs in other.histograms.items():
+            self.histograms.setdefault(key, Histogram()).merge(theirs)
+        return self
+
+    def to_dict(self):
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(self.counters.items())],
+            "histograms": [{"name": name, "labels": dict(labels), "buckets": list(BUCKETS),
+                            "counts": histogram.counts, "count": histogram.count, "sum": histogram.total}
+                           for (name, labels), histogram in sorted(self.histograms.items())],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls()
+        for counter in data["counters"]:
+            metrics.counters[(counter["name"], tuple(sorted(counter["labels"].items())))] = counter["value"]
+        for entry in data["histograms"]:
+            histogram = Histogram()
+            histogram.counts, histogram.count, histogram.total = list(entry["counts"]), entry["count"], entry["sum"]
+            metrics.histograms[(entry["name"], tuple(sorted(entry["labels"].items())))] = histogram
+        return metrics
+
+    def to_prometheus(self):
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = f"{PREFIX}{name}_total"
+            header(metric, "counter")
+            lines.append(f"{metric}{format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = f"{PREFIX}{name}_seconds"
+            header(metric, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{metric}_sum{format_labels(labels)} {histogram.total}")
+            lines.append(f"{metric}_count{format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to `path` as JSON, or as Prometheus text unless it ends in .json.
+
+        The file is replaced in one step, so a scraper never reads half an export.
+        """
+        if path.endswith(".json"):
+            text = json.dumps(self.to_dict(), indent=2)
+        else:
+            text = self.to_prometheus()
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            file.write(text)
+        os.replace(temporary, path)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+METRICS = Metrics()
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from time import sleep
+from model.board import Board
+from model.player import Player
+from model.engine import GameEngine
+from model.policy import POLICIES
+from model.dice import GameRandom, derive_seed
+
+
+def rollouts(task):
+    """Play games out from a snapshot; return wins per seat plus games without a winner. Runs in a worker."""
+    compiled, rules, names, snapshot, policy, max_rounds, seed, start, stop = task
+    make_policy = POLICIES[policy]
+    seats = [Player(name, policy=make_policy(GameRandom(seed))) for name in names]
+    engine = GameEngine(Board(squares=compiled.build_squares(), rules=rules), [], max_rounds=max_rounds, seats=seats)
+    wins = [0] * (len(names) + 1)
+    for index in range(start, stop):
+        result = engine.fork(GameRandom(derive_seed(seed, index)), snapshot).run()
+        wins[-1 if result["winner"] is None else result["winner"]] += 1
+    return wins
+
+
+class WinOdds:
+    """Estimated win probability of every player, from Monte Carlo rollouts of the current state.
+
+    `update` makes the engine's state the one being estimated and reads the totals so
+    far; it never waits. Batches of rollouts of that state are kept queued on a process
+    pool, one per worker, and each finished batch queues the next from the pool's
+    result thread, so the estimate keeps sharpening while the game waits for input,
+    until `max_games` have been played. Wins are cached per state (the snapshot's bytes),
+    so a state seen again carries on from its totals. Rollouts are played by the
+    `policy` computer player in every seat. With `workers=0` each update plays one batch
+    in this process instead.
+    """
+
+    def __init__(self, workers=None, batch=50, max_games=2000, policy="always-buy", seed=0, cache_size=256):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch = batch
+        self.max_games = max_games
+        self.policy = policy
+        self.seed = seed
+        self.cache_size = cache_size
+        self.wins = OrderedDict()
+        self.submitted = {}
+        self.lock = threading.Lock()
+        self.current = None
+        self.running = 0
+        self.error = None
+        self.pool = None
+        self.latest = None
+
+    def key(self, snapshot):
+        return snapshot.state.values.tobytes() + bytes([snapshot.next_seat])
+
+    def update(self, engine):
+        """Estimate the engine's current state from now on; return the odds so far."""
+        snapshot = engine.snapshot()
+        key = self.key(snapshot)
+        with self.lock:
+            if self.error is not None:
+                raise self.error
+            if self.current is None or self.current[0] != key:
+                self.current = (key, (engine.board.compile(), engine.board.rules,
+                                      [player.name for player in engine.seats], snapshot, self.policy,
+                                      engine.max_rounds, derive_seed(self.seed, key.hex())))
+            self.feed()
+        return self.odds(engine)
+
+    def feed(self):
+        """Queue batches of the current state until every worker has one. Called with the lock held."""
+        key, task = self.current
+        if not self.workers:
+            start = self.submitted.get(key, 0)
+            if start < self.max_games:
+                self.submitted[key] = stop = min(start + self.batch, self.max_games)
+                self.add(key, rollouts(task + (start, stop)))
+            return
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        while self.running < self.workers and self.submitted.get(key, 0) < self.max_games:
+            start = self.submitted.get(key, 0)
+            self.submitted[key] = stop = min(start + self.batch, self.max_games)
+            self.running += 1
+            self.pool.apply_async(rollouts, (task + (start, stop),), callback=partial(self.finished, key),
+                                  error_callback=self.failed)
+
+    def finished(self, key, wins):
+        with self.lock:
+            self.running -= 1
+            self.add(key, wins)
+            if self.pool is not None:
+                self.feed()
+
+    def failed(self, error):
+        with self.lock:
+            self.running -= 1
+            self.error = error
+
+    def add(self, key, wins):
+        totals = self.wins.get(key)
+        if totals is None:
+            self.wins[key] = list(wins)
+        else:
+            self.wins[key] = [total + won for total, won in zip(totals, wins)]
+        self.wins.move_to_end(key)
+        while len(self.wins) > self.cache_size:
+            dropped, _ = self.wins.popitem(last=False)
+            self.submitted.pop(dropped, None)
+
+    def games(self, engine):
+        key = self.key(engine.snapshot())
+        with self.lock:
+            return sum(self.wins.get(key, ()))
+
+    def odds(self, engine):
+        """{player: win probability} for the engine's current state, or the last estimate shown
+        when no rollout of this state has finished yet."""
+        key = self.key(engine.snapshot())
+        with self.lock:
+            wins = self.wins.get(key)
+        if wins is not None:
+            games = sum(wins)
+            self.latest = {player: won / games for player, won in zip(engine.seats, wins)}
+        return self.latest or {}
+
+    def estimate(self, engine, games):
+        """Play rollouts of the current state until `games` have finished; return the odds."""
+        self.max_games = max(self.max_games, games)
+        while self.games(engine) < games:
+            self.update(engine)
+            if self.workers:
+                sleep(0.01)
+        return self.odds(engine)
+
+    def close(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.terminate()
+        self.running = 0
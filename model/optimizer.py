@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+from collections import OrderedDict
+from model.board import Board
+from model.markov import analyze
+from model.gameboardDesign import GameboardDesigner, read_board
+from model.policy import POLICIES
+from model.simulate import SimulationStats, VECTORIZED_POLICIES, play_game
+from model.dice import derive_seed
+from model.rules import STANDARD, load_rules
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def board_key(squares, rules=STANDARD):
+    """Content hash of a board in the designer's dict format, played by `rules`."""
+    content = repr([(square["name"], square.get("price"), square.get("rent")) for square in squares])
+    return hashlib.sha256(f"{content}|{rules!r}".encode()).hexdigest()
+
+
+def to_board(squares, rules=STANDARD):
+    return Board(squares=[Board.make_square(square["name"], square["position"], square.get("price"),
+                                            square.get("rent")) for square in squares], rules=rules)
+
+
+class Targets:
+    """What a balanced board looks like.
+
+    Every seat's win rate within `win_rate_tolerance` of a fair share, the median game
+    `median_rounds` long (None to ignore) and no property with an expected ROI below
+    `min_roi`.
+    """
+
+    def __init__(self, win_rate_tolerance=0.01, median_rounds=None, min_roi=0.0):
+        self.win_rate_tolerance = win_rate_tolerance
+        self.median_rounds = median_rounds
+        self.min_roi = min_roi
+
+    def loss(self, evaluation):
+        """How far an evaluation is from the targets; 0 when every target is met."""
+        fair = 1 / len(evaluation["win_rate"])
+        unfair = max(abs(rate - fair) for rate in evaluation["win_rate"])
+        loss = max(0.0, unfair - self.win_rate_tolerance) * 10
+        if self.median_rounds:
+            loss += abs(evaluation["median_rounds"] - self.median_rounds) / self.median_rounds
+        loss += sum(max(0.0, self.min_roi - roi) for roi in evaluation["roi"].values())
+        return loss
+
+
+def evaluate(task):
+    """Seat win rates, median game length and property ROIs of one board. Runs in a worker.
+
+    Games are played by the NumPy kernel when it is installed and supports the policy,
+    and by the engine otherwise. ROIs come from the exact Markov analysis.
+    """
+    squares, rules, num_players, games, seed, policy, max_rounds = task
+    board = to_board(squares, rules)
+    max_rounds = max_rounds or rules.max_rounds
+    stats = SimulationStats(num_players, len(board.squares), max_rounds)
+    if numpy is not None and policy in VECTORIZED_POLICIES:
+        from model.vectorized import VectorizedGames
+        batch = VectorizedGames(board, num_players, games, seed=derive_seed(seed, "optimize"),
+                                max_rounds=max_rounds, buy=VECTORIZED_POLICIES[policy])
+        while not batch.done.all():
+            batch.play_round()
+        batch.add_to(stats)
+    else:
+        for game_index in range(games):
+            board.reset()
+            stats.add(play_game(board, num_players, seed, game_index, POLICIES[policy], max_rounds))
+    return {
+        "win_rate": [wins / games for wins in stats.wins],
+        "median_rounds": stats.percentile(0.5),
+        "roi": {row["position"]: row["roi"] for row in analyze(board, num_players, max_rounds) if "roi" in row},
+    }
+
+
+class EvaluationCache:
+    """Evaluations by board content hash, dropping the least recently used beyond `maxsize`."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+
+    def get(self, key):
+        evaluation = self.entries.get(key)
+        if evaluation is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return evaluation
+
+    def put(self, key, evaluation):
+        self.entries[key] = evaluation
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+def with_price(square, price=None, rent=None):
+    square = dict(square)
+    if price is not None:
+        square["price"] = max(10, int(round(price / 10)) * 10)
+    if rent is not None:
+        square["rent"] = max(1, int(round(rent)))
+    return square
+
+
+def repaired(squares, evaluation, min_roi):
+    """Raise every rent whose property falls short of `min_roi` just enough to reach it.
+
+    Expected income is linear in the rent, so the needed rent follows from the current ROI.
+    """
+    squares = list(squares)
+    for position, roi in evaluation["roi"].items():
+        if roi < min_roi:
+            square = squares[position]
+            income = (roi + 1) * square["price"]
+            needed = (min_roi + 1) * square["price"] * square["rent"] / income if income > 0 else square["rent"] * 2
+            squares[position] = with_price(square, rent=needed + 1)
+    return squares
+
+
+def mutations(squares, rng, count):
+    """`count` neighbours of a board: a few prices or rents nudged, or all rents scaled together."""
+    properties = [square["position"] for square in squares if square.get("price")]
+    for _ in range(count):
+        candidate = list(squares)
+        if rng.random() < 0.25:
+            factor = rng.uniform(0.85, 1.15)
+            for position in properties:
+                candidate[position] = with_price(candidate[position], rent=candidate[position]["rent"] * factor)
+        else:
+            for position in rng.sample(properties, min(len(properties), rng.randint(1, 3))):
+                square = candidate[position]
+                if rng.random() < 0.5:
+                    candidate[position] = with_price(square, price=square["price"] * rng.uniform(0.8, 1.25))
+                else:
+                    candidate[position] = with_price(square, rent=square["rent"] * rng.uniform(0.8, 1.25))
+        yield candidate
+
+
+def optimize(squares, targets, num_players=4, games=4000, iterations=20, population=8, seed=0, workers=None,
+             policy="always-buy", max_rounds=None, cache=None, progress=None, rules=STANDARD):
+    """Tune the prices and rents of a board towards `targets` by parallel hill climbing.
+
+    Each iteration evaluates `population` neighbours of the best board so far (including
+    one with its under-earning rents repaired) on the process pool, all with the same
+    seed so they are compared on the same dice. Games are played by `rules`, and
+    `max_rounds` defaults to their round cap. Evaluations are memoized in `cache`.
+    Returns (best squares, its evaluation, its loss).
+    """
+    cache = cache if cache is not None else EvaluationCache()
+    rng = random.Random(seed)
+    workers = workers or os.cpu_count() or 1
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    def evaluate_all(candidates):
+        keys = [board_key(candidate, rules) for candidate in candidates]
+        found, missing = {}, {}
+        for key, candidate in zip(keys, candidates):
+            evaluation = cache.get(key)
+            if evaluation is None:
+                missing[key] = candidate
+            else:
+                found[key] = evaluation
+        tasks = [(candidate, rules, num_players, games, seed, policy, max_rounds) for candidate in missing.values()]
+        for key, evaluation in zip(missing, (pool.map if pool else map)(evaluate, tasks)):
+            cache.put(key, evaluation)
+            found[key] = evaluation
+        return [found[key] for key in keys]
+
+    try:
+        best = squares
+        best_evaluation = evaluate_all([best])[0]
+        best_loss = targets.loss(best_evaluation)
+        for iteration in range(iterations):
+            if best_loss == 0:
+                break
+            candidates = [repaired(best, best_evaluation, targets.min_roi)]
+            candidates.extend(mutations(best, rng, population - 1))
+            for candidate, evaluation in zip(candidates, evaluate_all(candidates)):
+                loss = targets.loss(evaluation)
+                if loss < best_loss:
+                    best, best_evaluation, best_loss = candidate, evaluation, loss
+            if progress is not None:
+                progress(iteration, best_loss)
+    finally:
+        if pool is not None:
+            pool.close()
+    return best, best_evaluation, best_loss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune a board's prices and rents towards balance targets.")
+    parser.add_argument("board", help="board CSV file to start from")
+    parser.add_argument("output", help="where to write the best board found")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--games", type=int, default=4000, help="games per evaluation")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--population", type=int, default=8, help="candidates per iteration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="always-buy")
+    parser.add_argument("--win-rate-tolerance", type=float, default=0.01)
+    parser.add_argument("--median-rounds", type=int, default=None)
+    parser.add_argument("--min-roi", type=float, default=0.0)
+    parser.add_argument("--cache-size", type=int, default=4096, help="evaluations to keep")
+    args = parser.parse_args(argv)
+
+    targets = Targets(args.win_rate_tolerance, args.median_rounds, args.min_roi)
+    cache = EvaluationCache(args.cache_size)
+
+    def progress(iteration, loss):
+        print(f"Iteration {iteration + 1}: loss {loss:.4f}")
+
+    best, evaluation, loss = optimize(read_board(args.board), targets, args.players, args.games, args.iterations,
+                                      args.population, args.seed, args.workers, args.policy, cache=cache,
+                                      progress=progress, rules=load_rules(args.board))
+    print(json.dumps({"loss": loss, "win_rate": evaluation["win_rate"],
+                      "median_rounds": evaluation["median_rounds"], "cache_hits": cache.hits}, indent=2))
+    GameboardDesigner().save_gameboard_to_csv(best, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
 class Player:
-    def __init__(self, name, money=1500, position=0, properties=None, in_jail=False, jail_turns=0):
+    __slots__ = ("name", "money", "position", "properties", "in_jail", "jail_turns", "policy", "__weakref__")
+
+    def __init__(self, name, money=1500, position=0, properties=None, in_jail=False, jail_turns=0, policy=None):
         self.name = name
         self.money = money
         self.position = position
         self.properties = properties or []
         self.in_jail = in_jail
         self.jail_turns = jail_turns
+        self.policy = policy
 
-    def pay_jail_fine(self):
-        if self.money >=150:
-            self.money -= 150
+    def pay_jail_fine(self, fine=150):
+        if self.money >= fine:
+            self.money -= fine
             return True
         else: return False
 
@@ -33,7 +36,7 @@ class Player:
             name=data['name'],
             money=data['money'],
             position=data['position'],
-            properties=['properties'],
+            properties=list(data['properties']),
             in_jail=data['in_jail'],
             jail_turns=data['jail_turns']
         )
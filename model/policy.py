@@ -0,0 +1,118 @@
+import random
+from weakref import WeakKeyDictionary, ref
+from model.rules import STANDARD
+
+# Jail options, numbered as in the in-game jail menu.
+ROLL_DOUBLES = "1"
+PAY_FINE = "2"
+STAY_IN_JAIL = "3"
+
+
+class Policy:
+    """Makes the decisions for one player. The base policy never buys and stays in jail."""
+
+    def join(self, engine, player):
+        """Called when the player takes a seat in a game, for policies that look at the whole game."""
+
+    def buy_property(self, player, square):
+        """Return True to buy the unowned square the player landed on."""
+        return False
+
+    def jail_option(self, player):
+        """Return ROLL_DOUBLES, PAY_FINE or STAY_IN_JAIL."""
+        return STAY_IN_JAIL
+
+
+class InteractivePolicy(Policy):
+    """Asks the person at the terminal for every decision."""
+
+    def __init__(self):
+        self.games = WeakKeyDictionary()
+
+    def join(self, engine, player):
+        self.games[player] = ref(engine)  # Weakly: the engine holds on to its players.
+
+    def buy_property(self, player, square):
+        choice = input(f"{square.name} is unowned. Buy for ${square.price}? (y/n): ").lower()
+        return choice == 'y'
+
+    def jail_option(self, player):
+        engine = self.games.get(player, lambda: None)()
+        fine, limit = (engine.jail_fine, engine.jail_turn_limit) if engine else (STANDARD.jail_fine, STANDARD.jail_turn_limit)
+        turn = f"Turn {player.jail_turns + 1}" + (f"/{limit}" if limit != float("inf") else "")
+        print(f"{player.name} is in jail ({turn}).")
+        print("Options:")
+        print("1. Try to roll doubles to get out.")
+        print(f"2. Pay HKD {fine} to get out.")
+        print("3. Remain In Jail.")
+        return input("Enter 1 or 2 or 3: ").strip()
+
+
+class AlwaysBuyPolicy(Policy):
+    """Buys every property it can afford and pays its way out of jail (or takes `jail`)."""
+
+    def __init__(self, jail=PAY_FINE):
+        self.jail = jail
+
+    def buy_property(self, player, square):
+        return True
+
+    def jail_option(self, player):
+        return self.jail
+
+
+class PriceThresholdPolicy(AlwaysBuyPolicy):
+    """Only buys properties priced at or below `max_price`."""
+
+    def __init__(self, max_price=500, jail=PAY_FINE):
+        super().__init__(jail)
+        self.max_price = max_price
+
+    def buy_property(self, player, square):
+        return square.price <= self.max_price
+
+
+class CashReservePolicy(AlwaysBuyPolicy):
+    """Buys only while it keeps at least `reserve` in cash afterwards."""
+
+    def __init__(self, reserve=300, jail=PAY_FINE):
+        super().__init__(jail)
+        self.reserve = reserve
+
+    def buy_property(self, player, square):
+        return player.money - square.price >= self.reserve
+
+
+class RandomPolicy(Policy):
+    """Makes every decision at random, useful for smoke tests and baselines."""
+
+    def __init__(self, rng=None, buy_chance=0.5):
+        self.rng = rng or random.Random()
+        self.buy_chance = buy_chance
+
+    def buy_property(self, player, square):
+        return self.rng.random() < self.buy_chance
+
+    def jail_option(self, player):
+        return self.rng.choice([ROLL_DOUBLES, PAY_FINE, STAY_IN_JAIL])
+
+
+INTERACTIVE = InteractivePolicy()
+
+
+def expectimax(rng):
+    from model.ai import ExpectimaxPolicy
+    return ExpectimaxPolicy()
+
+
+# Policies that batch jobs can select by name, each built from the game's rng.
+POLICIES = {
+    "always-buy": lambda rng: AlwaysBuyPolicy(),
+    "never-buy": lambda rng: Policy(),
+    "random": lambda rng: RandomPolicy(rng),
+    "price-threshold": lambda rng: PriceThresholdPolicy(),
+    "cash-reserve": lambda rng: CashReservePolicy(),
+    "jail-stay": lambda rng: AlwaysBuyPolicy(jail=STAY_IN_JAIL),
+    "jail-roll": lambda rng: AlwaysBuyPolicy(jail=ROLL_DOUBLES),
+    "expectimax": expectimax,
+}
@@ -0,0 +1,68 @@
+import sys
+from time import perf_counter
+from model.metrics import METRICS
+
+
+class BoardRenderer:
+    """Draws the board and player status for the interactive game.
+
+    The text of every square is laid out once up front and each frame indexes the
+    players by position, then goes to the terminal as one write. With `diff` set, the
+    lines of the last frame are kept and only the squares whose player markers changed
+    are redone, and a frame where no marker moved reuses the last text outright. Any
+    other frame still joins and writes the whole board, so drawing is O(squares); the
+    game's output scrolls between frames, which rules out redrawing lines in place.
+    """
+
+    def __init__(self, board, out=None, diff=True):
+        self.board = board
+        self.out = out
+        self.diff = diff
+        self.layout = [f"[{square.name} - ${getattr(square, 'price', 'N/A')}] " for square in board.squares]
+        self.previous = None
+        self.lines = None
+        self.text = None
+
+    def frame(self, players, odds=None):
+        """Text of the next frame: the board followed by the players' status."""
+        return self.board_text(players) + "\n" + self.status_text(players, odds)
+
+    def board_text(self, players):
+        at = {}
+        for player in players:
+            at[player.position] = at.get(player.position, "") + player.name[0]
+
+        if self.diff and self.previous is not None:
+            changed = [p for p in set(at) | set(self.previous) if at.get(p, "") != self.previous.get(p, "")]
+            for p in changed:
+                self.lines[p] = self.layout[p] + at.get(p, "")
+        else:
+            self.lines = [line + at.get(position, "") for position, line in enumerate(self.layout)]
+            changed = True
+        if changed:
+            self.text = "\n".join(["\n--- Game Board ---"] + self.lines)
+        self.previous = at
+        return self.text
+
+    def status_text(self, players, odds=None):
+        """One line per player, with its estimated win probability when `odds` has one."""
+        lines = ["\n--- Players Status ---"]
+        lines.extend(status_line(player, odds) for player in players)
+        return "\n".join(lines) + "\n"
+
+    def draw(self, players, odds=None):
+        timed = METRICS.enabled
+        if timed:
+            start = perf_counter()
+        out = self.out or sys.stdout
+        out.write(self.frame(players, odds))
+        out.flush()
+        if timed:
+            METRICS.since("render", start)
+
+
+def status_line(player, odds=None):
+    line = f"{player.name} - Money: ${player.money}, Position: {player.position}, In Jail: {player.in_jail}"
+    if odds and player in odds:
+        line += f", Win: {odds[player]:.0%}"
+    return line
@@ -0,0 +1,83 @@
+import json
+import os
+
+RULES_SUFFIX = ".rules.json"
+
+
+class Rules:
+    """The house rules of a game, read from a JSON file next to the board.
+
+    `DefaultBoard.rules.json` holds the rules for `DefaultBoard.csv`; any rule it leaves
+    out keeps its standard value, and a board without a rules file plays by the standard
+    rules. A `jail_turn_limit` of 0 lets a player stay in jail for good, and a
+    `go_salary` of 0 pays nothing for passing Go.
+    """
+
+    __slots__ = ("jail_fine", "jail_turn_limit", "tax_percent", "chance_amounts", "max_rounds", "go_salary")
+
+    def __init__(self, jail_fine=150, jail_turn_limit=3, tax_percent=10, chance_amounts=(-300, -200, -100, 100, 200),
+                 max_rounds=100, go_salary=0):
+        self.jail_fine = jail_fine
+        self.jail_turn_limit = jail_turn_limit
+        self.tax_percent = tax_percent
+        self.chance_amounts = tuple(chance_amounts)
+        self.max_rounds = max_rounds
+        self.go_salary = go_salary
+        if not self.chance_amounts:
+            raise ValueError("chance_amounts needs at least one amount.")
+        if max_rounds < 1:
+            raise ValueError("max_rounds must be at least 1.")
+
+    def to_dict(self):
+        return {name: list(value) if isinstance(value, tuple) else value
+                for name, value in ((name, getattr(self, name)) for name in self.__slots__)}
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"Unknown rules: {', '.join(sorted(unknown))}.")
+        return cls(**data)
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.values() == other.values()
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return f"Rules({', '.join(f'{name}={value!r}' for name, value in self.to_dict().items())})"
+
+
+STANDARD = Rules()
+
+_LOADED = {}
+
+
+def rules_file(csv_file):
+    return os.path.splitext(csv_file)[0] + RULES_SUFFIX
+
+
+def load_rules(csv_file):
+    """The rules for a board CSV: its rules file if there is one, the standard rules otherwise.
+
+    Rules files are remembered by path and modification time, like compiled boards.
+    """
+    path = rules_file(csv_file)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return STANDARD
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _LOADED:
+        with open(path) as file:
+            _LOADED[key] = Rules.from_dict(json.load(file))
+    return _LOADED[key]
+
+
+def save_rules(rules, csv_file):
+    with open(rules_file(csv_file), "w") as file:
+        json.dump(rules.to_dict(), file, indent=2)
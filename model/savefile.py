@@ -0,0 +1,115 @@
+import json
+import struct
+from array import array
+from time import perf_counter
+from model.board import Board
+from model.player import Player
+from model.state import GameState
+from model.metrics import METRICS
+from model.rules import Rules, STANDARD
+
+VERSION = 3
+MAGIC = b"MNPY"
+# Magic, version, number of players, number of squares.
+HEADER = struct.Struct("<4sHHI")
+NAME_LENGTH = struct.Struct("<H")
+# Binary saves from before the rules were stored in them.
+NO_RULES_VERSION = 2
+NO_VALUE = -1
+
+
+def encode_json(board, seats, players, current_round=1):
+    """Normalized save: players are listed once and squares refer to owners by seat."""
+    player_data = []
+    for player in seats:
+        data = player.to_dict()
+        data["alive"] = player in players
+        player_data.append(data)
+    data = {"version": VERSION, "round": current_round, "players": player_data, "board": board.to_dict(seats)}
+    if board.rules != STANDARD:
+        data["rules"] = board.rules.to_dict()
+    return data
+
+
+def decode_json(data):
+    """Return (board, seats, players, round); also reads saves from before seat references."""
+    seats = [Player.from_dict(p) for p in data["players"]]
+    board = Board.from_dict(data["board"], seats)
+    if "rules" in data:
+        board.rules = Rules.from_dict(data["rules"])
+    players = [player for player, p in zip(seats, data["players"]) if p.get("alive", True)]
+    return board, seats, players, data.get("round", 1)
+
+
+def encode_binary(board, seats, players, current_round=1):
+    """Fixed-layout save: header, length-prefixed rules (as JSON, empty for the standard rules)
+    and names, price/rent table and a packed GameState."""
+    chunks = [HEADER.pack(MAGIC, VERSION, len(seats), len(board.squares))]
+    rules = json.dumps(board.rules.to_dict(), separators=(",", ":")) if board.rules != STANDARD else ""
+    for name in [rules] + [player.name for player in seats] + [square.name for square in board.squares]:
+        encoded = name.encode()
+        chunks.append(NAME_LENGTH.pack(len(encoded)))
+        chunks.append(encoded)
+    table = array("q")
+    for square in board.squares:
+        price, rent = getattr(square, "price", None), getattr(square, "rent", None)
+        table.append(NO_VALUE if price is None else price)
+        table.append(NO_VALUE if rent is None else rent)
+    chunks.append(table.tobytes())
+    chunks.append(GameState.capture(board, seats, players, current_round).values.tobytes())
+    return b"".join(chunks)
+
+
+def decode_binary(data):
+    magic, version, num_players, num_squares = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (NO_RULES_VERSION, VERSION):
+        raise ValueError("Not a Monopoly binary save.")
+    offset = HEADER.size
+    names = []
+    for _ in range(num_players + num_squares + (version != NO_RULES_VERSION)):
+        (length,) = NAME_LENGTH.unpack_from(data, offset)
+        offset += NAME_LENGTH.size
+        names.append(data[offset:offset + length].decode())
+        offset += length
+
+    table = array("q")
+    table.frombytes(data[offset:offset + 2 * num_squares * table.itemsize])
+    offset += 2 * num_squares * table.itemsize
+    rules = STANDARD
+    if version != NO_RULES_VERSION:
+        text = names.pop(0)
+        rules = Rules.from_dict(json.loads(text)) if text else STANDARD
+    squares = []
+    for position, name in enumerate(names[num_players:]):
+        price, rent = table[2 * position], table[2 * position + 1]
+        squares.append(Board.make_square(name, position, None if price == NO_VALUE else price,
+                                         None if rent == NO_VALUE else rent))
+    board = Board(squares=squares, rules=rules)
+
+    values = array("q")
+    values.frombytes(data[offset:])
+    seats = [Player(name) for name in names[:num_players]]
+    players, current_round = GameState(values, num_players).restore(board, seats)
+    return board, seats, players, current_round
+
+
+def save(path, board, seats, players, current_round=1):
+    """Save a game as JSON, or in the binary layout when the file name ends in .bin."""
+    start = perf_counter()
+    if path.endswith(".bin"):
+        with open(path, "wb") as file:
+            file.write(encode_binary(board, seats, players, current_round))
+    else:
+        with open(path, "w") as file:
+            file.write(json.dumps(encode_json(board, seats, players, current_round), separators=(",", ":")))
+    if METRICS.enabled:
+        METRICS.since("save", start, kind="bin" if path.endswith(".bin") else "json")
+
+
+def load(path):
+    """Load a game saved by `save`; returns (board, seats, players, round)."""
+    if path.endswith(".bin"):
+        with open(path, "rb") as file:
+            return decode_binary(file.read())
+    with open(path) as file:
+        return decode_json(json.load(file))
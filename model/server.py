@@ -0,0 +1,451 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import time
+from model import savefile
+from model.board import Board
+from model.player import Player
+from model.engine import GameEngine
+from model.policy import Policy, POLICIES, PAY_FINE, ROLL_DOUBLES, STAY_IN_JAIL
+from model.squares import PropertySquare
+from model.dice import GameRandom, derive_seed
+from model.metrics import METRICS
+
+ANSWERS = {"buy": ("y", "n"), "jail": (ROLL_DOUBLES, PAY_FINE, STAY_IN_JAIL)}
+
+
+class RemotePolicy(Policy):
+    """Plays whatever the remote player answered to the question the game just asked."""
+
+    def __init__(self):
+        self.answer = None
+
+    def take_answer(self):
+        """The answer to the question just asked; each answer is used for one decision only."""
+        answer, self.answer = self.answer, None
+        return answer
+
+    def buy_property(self, player, square):
+        return self.take_answer() == "y"
+
+    def jail_option(self, player):
+        return self.take_answer()
+
+
+def asks_to_buy(square, player):
+    """Whether landing on `square` leads PropertySquare.land_on to consult the player's policy."""
+    return isinstance(square, PropertySquare) and square.owner is None and player.money >= square.price
+
+
+class HostedGame(GameEngine):
+    """One game on the server, played as a coroutine.
+
+    Moves are made by the ordinary engine and squares; only the player decisions are
+    different. Before a remote player's jail turn, and before they land on a property
+    they could buy, the game sends the question to their connection and awaits the
+    answer. The engine's `land` step is deferred for this, so the answer is known before
+    the square is resolved. A game that waits longer than the server's idle timeout is
+    saved to disk and dropped until the answer arrives.
+    """
+
+    def __init__(self, server, game_id, board, seats, players, policies, current_round=1, next_seat=0, restores=0):
+        rng = GameRandom(derive_seed(server.seed, game_id, restores))
+        for player, policy in zip(seats, policies):
+            player.policy = RemotePolicy() if policy is None else POLICIES[policy](rng)
+        super().__init__(board, players, rng=rng, max_rounds=server.max_rounds, seats=seats,
+                         current_round=current_round, next_seat=next_seat)
+        self.server = server
+        self.id = game_id
+        self.policies = policies
+        self.restores = restores
+        self.landed = False
+        self.question = None
+        self.answer = None
+
+    def land(self, player):
+        self.landed = True
+
+    def is_remote(self, player):
+        return self.policies[self.seats.index(player)] is None
+
+    async def run_async(self, pending=None, answer=None):
+        """Play the game out. `pending` and `answer` finish a turn that was cut short by eviction."""
+        while not self.finished():
+            for player in self.players[:]:
+                if len(self.players) == 1:
+                    break
+                seat = self.seats.index(player)
+                if seat < self.next_seat:
+                    continue
+                self.next_seat = seat
+                if not await self.play_turn_async(player, pending, answer):
+                    return
+                pending = answer = None
+            self.next_seat = 0
+            self.round += 1
+            await asyncio.sleep(0)  # Let the other games move too.
+        self.server.finish(self)
+
+    async def play_turn_async(self, player, pending=None, answer=None):
+        """Play one turn; returns False if the game was evicted while waiting for the player."""
+        if pending != "buy":
+            self.rolls = []
+            self.landed = False
+            if player.in_jail:
+                if player.jail_turns < self.jail_turn_limit and self.is_remote(player):
+                    if pending != "jail":
+                        answer = await self.decide(player, "jail", f"{player.jail_turns}")
+                        if answer is None:
+                            return False
+                    player.policy.answer = answer
+                self.handle_jail(player)
+            else:
+                self.take_turn(player)
+        else:
+            self.landed = True
+
+        if self.landed:
+            square = self.board.squares[player.position]
+            if self.is_remote(player) and asks_to_buy(square, player):
+                if pending != "buy":
+                    answer = await self.decide(player, "buy", f"{square.position} {square.price}")
+                    if answer is None:
+                        return False
+                player.policy.answer = answer
+            self.board.resolve_square(player)
+        if player.money < 0 and player in self.players:
+            self.retire(player)
+        return True
+
+    async def decide(self, player, kind, details):
+        """Ask the player's connection a question and wait for the answer, or None after eviction."""
+        seat = self.seats.index(player)
+        self.question = (seat, kind)
+        self.answer = asyncio.get_running_loop().create_future()
+        self.server.send(self.server.connection(self.id, seat), f"ASK {self.id} {seat} {kind.upper()} {details}")
+        asked = time.perf_counter()
+        try:
+            answer = await asyncio.wait_for(self.answer, self.server.idle_timeout)
+        except asyncio.TimeoutError:
+            self.server.evict(self)
+            return None
+        if METRICS.enabled:
+            METRICS.since("decision_wait", asked, kind=kind)
+        self.question = self.answer = None
+        return answer
+
+
+class GameServer:
+    """Hosts many games at once on one event loop, talking a line protocol over TCP.
+
+    Client commands:
+        NEW <players> [<remote seats> [<bot policy>]]   create a game; you take seat 0
+        JOIN <game>                                     take the next free remote seat
+        ANSWER <game> <seat> <y|n|1|2|3>                answer a question
+        QUIT
+
+    Server messages:
+        GAME <game> <seat>                              the seat you now play
+        ASK <game> <seat> BUY <position> <price>        buy the square you are landing on?
+        ASK <game> <seat> JAIL <turns in jail>          1 roll doubles, 2 pay the fine, 3 stay
+        OVER <game> <result as JSON>
+        ERROR <message>
+
+    A game starts once all of its remote seats are taken; the other seats are bots.
+    """
+
+    def __init__(self, board_file="DefaultBoard.csv", save_dir="hosted_games", idle_timeout=60.0,
+                 max_rounds=None, seed=0):
+        self.board_file = board_file
+        self.save_dir = save_dir
+        self.idle_timeout = idle_timeout
+        self.max_rounds = max_rounds
+        self.seed = seed
+        self.ids = itertools.count(1)
+        self.games = {}
+        self.waiting = {}
+        self.evicted = {}
+        self.seat_connections = {}
+        self.tasks = set()
+        self.served = 0
+        self.evictions = 0
+        self.peak = 0
+
+    async def start(self, host="127.0.0.1", port=8765):
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        """Serve one connection until it closes."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode().split()
+                if words and words[0].upper() == "QUIT":
+                    break
+                if words:
+                    self.command(writer, words)
+        except ConnectionError:
+            pass
+        finally:
+            for key, connection in list(self.seat_connections.items()):
+                if connection is writer:
+                    self.seat_connections[key] = None
+            writer.close()
+
+    def command(self, writer, words):
+        verb, args = words[0].upper(), words[1:]
+        try:
+            if verb == "NEW":
+                self.new_game(writer, *(int(arg) for arg in args[:2]), *args[2:3])
+            elif verb == "JOIN":
+                self.join(writer, int(args[0]))
+            elif verb == "ANSWER":
+                self.receive(writer, int(args[0]), int(args[1]), args[2])
+            else:
+                raise ValueError(f"unknown command {verb}")
+        except (ValueError, IndexError, TypeError, KeyError) as error:
+            self.send(writer, f"ERROR {error}")
+
+    def send(self, writer, line):
+        if writer is not None and not writer.is_closing():
+            writer.write(line.encode() + b"\n")
+
+    def connection(self, game_id, seat):
+        return self.seat_connections.get((game_id, seat))
+
+    def new_game(self, writer, num_players, remote=1, bot_policy="always-buy"):
+        if not 2 <= num_players <= 6 or not 1 <= remote <= num_players:
+            raise ValueError("a game has 2-6 players and at least one remote seat")
+        if bot_policy not in POLICIES:
+            raise ValueError(f"unknown policy {bot_policy}")
+        game_id = next(self.ids)
+        policies = [None] * remote + [bot_policy] * (num_players - remote)
+        self.waiting[game_id] = [policies, 0]
+        self.join(writer, game_id)
+
+    def join(self, writer, game_id):
+        policies, taken = self.waiting[game_id]
+        self.seat_connections[(game_id, taken)] = writer
+        self.waiting[game_id][1] = taken = taken + 1
+        self.send(writer, f"GAME {game_id} {taken - 1}")
+        if taken == policies.count(None):
+            del self.waiting[game_id]
+            board = Board(self.board_file)
+            seats = [Player(f"Player {seat + 1}") for seat in range(len(policies))]
+            self.launch(HostedGame(self, game_id, board, seats, seats, policies))
+
+    def launch(self, game, pending=None, answer=None):
+        self.games[game.id] = game
+        self.peak = max(self.peak, len(self.games))
+        task = asyncio.get_running_loop().create_task(game.run_async(pending, answer))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def receive(self, writer, game_id, seat, answer):
+        """Hand an answer to its game, bringing the game back from disk if it was evicted."""
+        if self.seat_connections.get((game_id, seat)) is None:
+            self.seat_connections[(game_id, seat)] = writer  # A player reconnecting.
+        game = self.games.get(game_id)
+        if game is not None:
+            if game.question is None or game.question[0] != seat or game.answer.done():
+                raise ValueError(f"game {game_id} is not waiting for seat {seat}")
+            if answer not in ANSWERS[game.question[1]]:
+                raise ValueError(f"{answer} is not an answer to {game.question[1]}")
+            game.answer.set_result(answer)
+        elif game_id in self.evicted:
+            self.restore(game_id, seat, answer)
+        else:
+            raise ValueError(f"no game {game_id}")
+
+    def paths(self, game_id):
+        base = os.path.join(self.save_dir, str(game_id))
+        return base + ".bin", base + ".json"
+
+    def evict(self, game):
+        """Save an idle game to disk and drop it from memory."""
+        os.makedirs(self.save_dir, exist_ok=True)
+        state_path, meta_path = self.paths(game.id)
+        savefile.save(state_path, game.board, game.seats, game.players, game.round)
+        with open(meta_path, "w") as file:
+            json.dump({"policies": game.policies, "next_seat": game.next_seat, "question": game.question,
+                       "restores": game.restores, "purchased": sorted(game.board.purchased),
+                       "bankrupt": [[game.seats.index(player), r] for player, r in game.bankrupt_round.items()]},
+                      file)
+        del self.games[game.id]
+        self.evicted[game.id] = True
+        self.evictions += 1
+        if METRICS.enabled:
+            METRICS.count("evictions")
+
+    def restore(self, game_id, seat, answer):
+        state_path, meta_path = self.paths(game_id)
+        with open(meta_path) as file:
+            meta = json.load(file)
+        question_seat, kind = meta["question"]
+        if question_seat != seat or answer not in ANSWERS[kind]:
+            raise ValueError(f"game {game_id} is waiting for seat {question_seat} to answer {kind}")
+        board, seats, players, current_round = savefile.load(state_path)
+        game = HostedGame(self, game_id, board, seats, players, meta["policies"], current_round,
+                          meta["next_seat"], meta["restores"] + 1)
+        # The result reports purchases and bankruptcies from the whole game, not just since the restore.
+        board.purchased = set(meta["purchased"])
+        game.bankrupt_round = {seats[seat]: r for seat, r in meta["bankrupt"]}
+        del self.evicted[game_id]
+        os.remove(state_path)
+        os.remove(meta_path)
+        self.launch(game, kind, answer)
+
+    def finish(self, game):
+        del self.games[game.id]
+        self.served += 1
+        if METRICS.enabled:
+            METRICS.count("games_served")
+        line = f"OVER {game.id} {json.dumps(game.result(), separators=(',', ':'))}"
+        connections = {self.seat_connections.pop((game.id, seat), None)
+                       for seat, policy in enumerate(game.policies) if policy is None}
+        for writer in connections:
+            self.send(writer, line)
+
+
+async def play_client(host, port, games, num_players, remote, concurrency, latencies, rng):
+    """Play `games` games over one connection, at most `concurrency` at a time, answering at random."""
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    started = finished = 0
+    sent = {}
+    joins = {}
+
+    def new_game():
+        nonlocal started
+        started += 1
+        writer.write(f"NEW {num_players} {remote}\n".encode())
+
+    for _ in range(min(concurrency, games)):
+        new_game()
+    while finished < games:
+        line = await reader.readline()
+        if not line:
+            break
+        words = line.decode().split(maxsplit=6)
+        kind, game_id = words[0], words[1]
+        if game_id in sent:
+            latencies.append(time.perf_counter() - sent.pop(game_id))
+        if kind == "GAME":
+            if int(words[2]) == 0:
+                joins[game_id] = remote - 1
+            if joins.get(game_id):
+                joins[game_id] -= 1
+                writer.write(f"JOIN {game_id}\n".encode())
+            sent[game_id] = time.perf_counter()
+        elif kind == "ASK":
+            answer = rng.choice(ANSWERS[words[3].lower()])
+            writer.write(f"ANSWER {game_id} {words[2]} {answer}\n".encode())
+            sent[game_id] = time.perf_counter()
+        elif kind == "OVER":
+            joins.pop(game_id, None)
+            sent.pop(game_id, None)
+            finished += 1
+            if started < games:
+                new_game()
+        elif kind == "ERROR":
+            raise RuntimeError(line.decode().strip())
+    writer.write(b"QUIT\n")
+    writer.close()
+    return finished
+
+
+async def load_test(games=1000, num_players=4, remote=1, connections=10, concurrency=1000, host=None, port=None,
+                    seed=0, **server_options):
+    """Drive a server with simulated remote players and report throughput and decision latency.
+
+    Without `port` a server is started in-process on a free port. Latency is measured by
+    the clients, from sending an answer to receiving the game's next question or result.
+    """
+    server = None
+    if port is None:
+        server = GameServer(seed=seed, **server_options)
+        listener = await server.start(host or "127.0.0.1", 0)
+        host, port = listener.sockets[0].getsockname()[:2]
+    host = host or "127.0.0.1"
+    latencies = []
+    per_connection = [games // connections + (i < games % connections) for i in range(connections)]
+    start = time.perf_counter()
+    served = await asyncio.gather(*(
+        play_client(host, port, count, num_players, remote, max(1, concurrency // connections), latencies,
+                    random.Random(derive_seed(seed, "client", i)))
+        for i, count in enumerate(per_connection) if count))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        listener.close()
+        await listener.wait_closed()
+
+    latencies.sort()
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else 0.0
+
+    report = {
+        "games": sum(served),
+        "seconds": elapsed,
+        "games_per_second": sum(served) / elapsed,
+        "decisions": len(latencies),
+        "decisions_per_second": len(latencies) / elapsed,
+        "latency_ms_p50": percentile(0.5),
+        "latency_ms_p99": percentile(0.99),
+        "latency_ms_max": percentile(1.0),
+    }
+    if server is not None:
+        report["peak_concurrent_games"] = server.peak
+        report["evictions"] = server.evictions
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many Monopoly games over TCP, or load-test a server.")
+    parser.add_argument("mode", choices=("serve", "load"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="server port (load mode: omit to test an in-process server)")
+    parser.add_argument("--board", default="DefaultBoard.csv")
+    parser.add_argument("--save-dir", default="hosted_games", help="where idle games are evicted to")
+    parser.add_argument("--idle-timeout", type=float, default=60.0, help="seconds before an idle game is evicted")
+    parser.add_argument("--metrics", metavar="FILE", help="serve mode: keep per-phase metrics in this file")
+    parser.add_argument("--games", type=int, default=1000, help="load mode: games to play")
+    parser.add_argument("--players", type=int, default=4, help="load mode: players per game")
+    parser.add_argument("--remote", type=int, default=1, help="load mode: remote seats per game")
+    parser.add_argument("--connections", type=int, default=10, help="load mode: client connections")
+    parser.add_argument("--concurrency", type=int, default=1000, help="load mode: games in flight at once")
+    args = parser.parse_args(argv)
+    options = {"board_file": args.board, "save_dir": args.save_dir, "idle_timeout": args.idle_timeout}
+
+    if args.mode == "load":
+        if args.port is not None:
+            options = {}
+        report = asyncio.run(load_test(args.games, args.players, args.remote, args.connections, args.concurrency,
+                                       args.host, args.port, **options))
+        print(json.dumps(report, indent=2))
+        return
+
+    async def serve():
+        server = GameServer(**options)
+        listener = await server.start(args.host, args.port or 8765)
+        print(f"Serving games on {args.host}:{args.port or 8765}")
+        if args.metrics:
+            METRICS.enable()
+        async with listener:
+            while True:
+                await asyncio.sleep(10)
+                if args.metrics:
+                    METRICS.write(args.metrics)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
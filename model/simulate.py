@@ -0,0 +1,261 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+from model.board import Board
+from model.player import Player
+from model.engine import GameEngine
+from model.policy import POLICIES
+from model.dice import GameRandom, derive_seed
+from model.metrics import METRICS, Metrics
+from model.telemetry import TelemetryWriter, append_tables, check_schema
+from model.archive import GameArchive, board_id, pack
+
+
+class SimulationStats:
+    """Running totals for a batch of games. Memory does not grow with the number of games."""
+
+    def __init__(self, num_players, num_squares, max_rounds=100):
+        self.num_players = num_players
+        self.max_rounds = max_rounds
+        self.games = 0
+        self.wins = [0] * num_players
+        self.bankruptcies = [0] * num_players
+        self.rounds = [0] * (max_rounds + 1)
+        self.bankrupt_rounds = [0] * (max_rounds + 1)
+        self.purchases = [0] * num_squares
+        self.metrics = None
+        self.archived = None
+
+    def add(self, result):
+        self.games += 1
+        if result["winner"] is not None:
+            self.wins[result["winner"]] += 1
+        self.rounds[result["rounds"]] += 1
+        for seat, bankrupt_round in enumerate(result["bankrupt_round"]):
+            if bankrupt_round is not None:
+                self.bankruptcies[seat] += 1
+                self.bankrupt_rounds[bankrupt_round] += 1
+        for position in result["purchased"]:
+            self.purchases[position] += 1
+
+    def merge(self, other):
+        self.games += other.games
+        for mine, theirs in ((self.wins, other.wins), (self.bankruptcies, other.bankruptcies),
+                             (self.rounds, other.rounds), (self.bankrupt_rounds, other.bankrupt_rounds),
+                             (self.purchases, other.purchases)):
+            for i, value in enumerate(theirs):
+                mine[i] += value
+        if other.metrics is not None:
+            self.metrics = (self.metrics or Metrics()).merge(other.metrics)
+        return self
+
+    def percentile(self, fraction):
+        """Game length at the given fraction (0-1) of all games."""
+        target = fraction * self.games
+        seen = 0
+        for rounds, count in enumerate(self.rounds):
+            seen += count
+            if count and seen >= target:
+                return rounds
+        return 0
+
+    def summary(self, board=None):
+        games = self.games or 1
+        bankrupt_total = sum(self.bankrupt_rounds) or 1
+        summary = {
+            "games": self.games,
+            "win_rate": [wins / games for wins in self.wins],
+            "bankruptcy_rate": [count / games for count in self.bankruptcies],
+            "mean_rounds": sum(r * c for r, c in enumerate(self.rounds)) / games,
+            "rounds_p50": self.percentile(0.5),
+            "rounds_p90": self.percentile(0.9),
+            "rounds_p99": self.percentile(0.99),
+            "mean_bankruptcy_round": sum(r * c for r, c in enumerate(self.bankrupt_rounds)) / bankrupt_total,
+        }
+        if board is not None:
+            summary["purchase_rate"] = {square.name: self.purchases[square.position] / games
+                                        for square in board.squares if hasattr(square, "price")}
+        return summary
+
+
+# Policies the vectorized kernel implements, mapped to its `buy` flag.
+VECTORIZED_POLICIES = {"always-buy": True, "never-buy": False}
+
+
+def play_chunk(task):
+    """Play games [start, stop) of a run and return their stats. Runs inside a worker process.
+
+    With `metrics` set the chunk is instrumented and its metrics travel back on the stats.
+    With `telemetry` set every turn is written to the columnar table in that directory.
+    With `archive` set the games are packed as archive records and sent back on the stats.
+    """
+    if not task[8]:
+        return play_games(task)
+    # Collect the chunk's metrics on their own; a chunk played in the caller's process
+    # hands back whatever the caller had collected, and its on/off state, afterwards.
+    saved = METRICS.enabled, METRICS.counters, METRICS.histograms
+    METRICS.reset()
+    METRICS.enable()
+    try:
+        stats = play_games(task)
+        stats.metrics = Metrics().merge(METRICS)
+    finally:
+        METRICS.enabled, METRICS.counters, METRICS.histograms = saved
+    return stats
+
+
+def play_games(task):
+    board_file, num_players, start, stop, seed, policy, max_rounds, vectorized, _, telemetry, archive = task
+    board = Board(board_file)
+    stats = SimulationStats(num_players, len(board.squares), max_rounds)
+    if vectorized:
+        from model.vectorized import VectorizedGames
+        games = VectorizedGames(board, num_players, stop - start, seed=derive_seed(seed, "chunk", start),
+                                max_rounds=max_rounds, buy=VECTORIZED_POLICIES[policy])
+        while not games.done.all():
+            games.play_round()
+        return games.add_to(stats)
+    make_policy = POLICIES[policy]
+    writer = TelemetryWriter(telemetry) if telemetry else None
+    if archive:
+        board_key = board_id(board)
+        names = [policy] * num_players
+        stats.archived = bytearray()
+    for game_index in range(start, stop):
+        board.reset()
+        result = play_game(board, num_players, seed, game_index, make_policy, max_rounds, telemetry=writer)
+        stats.add(result)
+        if archive:
+            stats.archived += pack(board_key, seed, game_index, names, result)
+    if writer is not None:
+        writer.close()
+    return stats
+
+
+def play_game(board, num_players, seed, game_index, make_policy, max_rounds=None, events=None, telemetry=None):
+    players = [Player(f"Player {seat + 1}") for seat in range(num_players)]
+    rng = GameRandom(derive_seed(seed, game_index))
+    policies = [make_policy(rng) for _ in players]
+    engine = GameEngine(board, players, policies, rng=rng, max_rounds=max_rounds)
+    if events is not None:
+        engine.events = board.events = events
+    if telemetry is not None:
+        telemetry.start(engine, game_index)
+    return engine.run()
+
+
+def replay(board_file, num_players, seed, game_index, policy="always-buy", max_rounds=None, events=None):
+    """Play one game of a simulate() run again, e.g. with a ConsoleSink to see an outlier move by move."""
+    return play_game(Board(board_file), num_players, seed, game_index, POLICIES[policy], max_rounds, events)
+
+
+def simulate(board_file, num_players, games, seed=0, workers=None, chunk_size=1000,
+             policy="always-buy", max_rounds=None, progress=None, vectorized=False, metrics=False, telemetry=None,
+             archive=None):
+    """Play `games` complete games of a board across a process pool and return the merged stats.
+
+    Games are split into chunks of `chunk_size`; every game is seeded from `seed` and its
+    own index, so the totals are the same for any number of workers. `progress` is called
+    with the running stats after every finished chunk.
+
+    With `vectorized` each chunk is played in lockstep by the NumPy kernel, which is
+    seeded per chunk rather than per game.
+
+    With `metrics` the games are instrumented and the merged per-phase timings and
+    counters are left on the returned stats as `stats.metrics`.
+
+    With `telemetry` every turn is appended to the columnar table in that directory (see
+    model.telemetry). Each chunk writes its own part, and the parts are appended to the
+    table in game order once all are done.
+
+    With `archive` every game is added to the GameArchive in that directory.
+
+    `max_rounds` defaults to the round cap in the board's rules.
+    """
+    if vectorized and policy not in VECTORIZED_POLICIES:
+        raise ValueError(f"The vectorized simulator does not support the {policy} policy.")
+    if vectorized and (telemetry or archive):
+        raise ValueError("The vectorized simulator does not record telemetry or archive games.")
+    board = Board(board_file)
+    max_rounds = max_rounds or board.rules.max_rounds
+    workers = workers or os.cpu_count() or 1
+    starts = range(0, games, chunk_size)
+    if telemetry:
+        check_schema(telemetry)
+    parts = [os.path.join(telemetry, f"part-{start:012d}") for start in starts] if telemetry else [None] * len(starts)
+    for part in filter(None, parts):
+        shutil.rmtree(part, ignore_errors=True)  # Left behind by an interrupted run.
+    tasks = ((board_file, num_players, start, min(start + chunk_size, games), seed, policy, max_rounds,
+              vectorized, metrics, part, archive is not None)
+             for start, part in zip(starts, parts))
+    total = SimulationStats(num_players, len(board.squares), max_rounds)
+    games_archive = GameArchive(archive) if archive else None
+
+    def record(stats):
+        total.merge(stats)
+        if games_archive is not None:
+            games_archive.extend(stats.archived)
+        if progress is not None:
+            progress(total)
+
+    try:
+        if workers == 1:
+            for stats in map(play_chunk, tasks):
+                record(stats)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                for stats in pool.imap_unordered(play_chunk, tasks):
+                    record(stats)
+    finally:
+        if games_archive is not None:
+            games_archive.close()
+    if telemetry:
+        append_tables(parts, telemetry)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many games of a board and report statistics.")
+    parser.add_argument("board", help="board CSV file")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="always-buy")
+    parser.add_argument("--vectorized", action="store_true", help="use the NumPy lockstep simulator")
+    parser.add_argument("--output", help="write the summary as JSON to this file")
+    parser.add_argument("--replay", type=int, metavar="GAME", help="replay one game of the run move by move")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="instrument the games and write per-phase metrics (JSON if FILE ends in .json, "
+                             "Prometheus text otherwise)")
+    parser.add_argument("--telemetry", metavar="DIR", help="record every turn to a columnar table in DIR")
+    parser.add_argument("--archive", metavar="DIR", help="add every game to the game archive in DIR")
+    args = parser.parse_args(argv)
+
+    if args.replay is not None:
+        from model.events import CONSOLE
+        result = replay(args.board, args.players, args.seed, args.replay, args.policy, events=CONSOLE)
+        print(json.dumps(result))
+        return
+
+    def progress(stats):
+        print(f"{stats.games}/{args.games} games played", end="\r", flush=True)
+
+    stats = simulate(args.board, args.players, args.games, args.seed, args.workers,
+                     args.chunk_size, args.policy, progress=progress, vectorized=args.vectorized,
+                     metrics=args.metrics is not None, telemetry=args.telemetry, archive=args.archive)
+    summary = stats.summary(Board(args.board))
+    print()
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2)
+    if args.metrics:
+        (stats.metrics or Metrics()).write(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,100 +1,141 @@
 import random
 from model.player import Player
+from model.policy import INTERACTIVE
+from model.events import CONSOLE
+from model.metrics import METRICS
+from model.rules import STANDARD
 
 class Square:
+    __slots__ = ("name", "position", "board")
+
     def __init__(self, name, position):
         self.name = name
         self.position = position
+        self.board = None
+
+    @property
+    def events(self):
+        """Where this square reports: its board's event sink, or the console for a loose square."""
+        return CONSOLE if self.board is None else self.board.events
+
+    @property
+    def rng(self):
+        return random if self.board is None else self.board.rng
+
+    @property
+    def rules(self):
+        return STANDARD if self.board is None else self.board.rules
 
     def land_on(self, player):
-        print(f"{player.name} landed on {self.position} {self.name}. No effect.")
+        events = self.events
+        if events.enabled:
+            events.emit("no_effect", player=player.name, position=self.position, square=self.name)
 
-    def to_dict(self):
+    def to_dict(self, seats=None):
         return {"name": self.name, "position": self.position}
 
     @classmethod
-    def from_dict(cls, data):
+    def from_dict(cls, data, seats=None):
         return cls(name=data['name'],position=data['position'])
 
 class PropertySquare(Square):
+    __slots__ = ("price", "rent", "owner")
+
     def __init__(self, name, position, price, rent, owner=None):
         super().__init__(name,position)
         self.price = price
         self.rent = rent
         self.owner = owner
 
-    def to_dict(self):
-        if self.owner == None:
-            return {"name": self.name, 
-                    "position": self.position,
-                    "price" : self.price,
-                    "rent" : self.rent,
-                    "owner" : None
-                    }
-        else:
-            return {"name": self.name, 
-                    "position": self.position,
-                    "price" : self.price,
-                    "rent" : self.rent,
-                    "owner" : self.owner.to_dict()
-                    }
+    def to_dict(self, seats=None):
+        """Squares refer to their owner by seat number in `seats` rather than embedding the player."""
+        return {"name": self.name,
+                "position": self.position,
+                "price" : self.price,
+                "rent" : self.rent,
+                "owner" : seats.index(self.owner) if self.owner is not None and seats is not None else None
+                }
 
     @classmethod
-    def from_dict(cls, data):
-        if data['owner'] != None:
-            owner = Player.from_dict(data['owner']),
-            return cls(name=data['name'],
-                    position=data['position'],
-                    price=data['price'],
-                    rent=data['rent'],
-                    owner=owner
-                )
-        else:
-            return cls(name=data['name'],
-                    position=data['position'],
-                    price=data['price'],
-                    rent=data['rent'],
-                    owner=None
-                )
+    def from_dict(cls, data, seats=None):
+        owner = data.get('owner')
+        if isinstance(owner, dict):  # Saves before owners were referenced by seat.
+            owner = next((p for p in seats or [] if p.name == owner['name']), None) or Player.from_dict(owner)
+        elif owner is not None:
+            owner = seats[owner]
+        return cls(name=data['name'],
+                   position=data['position'],
+                   price=data['price'],
+                   rent=data['rent'],
+                   owner=owner
+                   )
 
     def land_on(self, player):
         if self.owner is None:
             if player.money >= self.price:
-                choice = input(f"{self.name} is unowned. Buy for ${self.price}? (y/n): ").lower()
-                if choice == 'y':
+                policy = player.policy or INTERACTIVE
+                if policy.buy_property(player, self):
                     player.money -= self.price
-                    self.owner = player
-                    player.properties.append(self.name)
-                    print(f"{player.name} bought {self.name}.")
-        elif self.owner != player.name:
-            print(f"{player.name} pays ${self.rent} rent to {self.owner.name}.")
+                    if self.board is None:
+                        self.owner = player
+                        player.properties.append(self.name)
+                    else:
+                        self.board.set_owner(self, player)
+                    events = self.events
+                    if events.enabled:
+                        events.emit("bought", player=player.name, square=self.name)
+                    if METRICS.enabled:
+                        METRICS.count("purchases")
+                        METRICS.count("purchase_money", self.price)
+        elif self.owner is not player:
+            events = self.events
+            if events.enabled:
+                events.emit("rent", player=player.name, amount=self.rent, owner=self.owner.name)
             player.money -= self.rent
             self.owner.money += self.rent
+            if METRICS.enabled:
+                METRICS.count("rent_transfers")
+                METRICS.count("rent_money", self.rent)
 
 class ChanceSquare(Square):
+    __slots__ = ()
+
     def land_on(self, player):
-        amount = random.choice([-300, -200, -100, 100, 200])
+        amount = self.rng.choice(self.rules.chance_amounts)
         player.money += amount
-        action = "gained" if amount > 0 else "lost"
-        print(f"{player.name} landed on Chance and {action} ${abs(amount)}.")
+        events = self.events
+        if events.enabled:
+            events.emit("chance", player=player.name, amount=amount)
 
 class TaxSquare(Square):
+    __slots__ = ()
+
     def land_on(self, player):
-        tax = player.money // 10
+        tax = player.money * self.rules.tax_percent // 100
         player.money -= tax
-        print(f"{player.name} paid ${tax} in taxes.")
+        events = self.events
+        if events.enabled:
+            events.emit("tax", player=player.name, amount=tax)
 
 class GoJailSquare(Square):
+    __slots__ = ()
+
     def land_on(self,player):
         player.in_jail = True
-        print(f"{player.name} landed on Jail and is sent to In Jail Square.")
+        events = self.events
+        if events.enabled:
+            events.emit("go_to_jail", player=player.name)
 
 
 class InJailSqaure (Square):
+    __slots__ = ()
+
     def land_on(self, player):
+        events = self.events
         if player.in_jail == True:
             player.jail_turns += 1
-            print(f"{player.name} is in Jail for {player.jail_turns} times")
-        else:
-            print(f"{player.name} landed on {self.position} {self.name}. No effect.")
+            if events.enabled:
+                events.emit("jail_visit", player=player.name, turns=player.jail_turns)
+        elif events.enabled:
+            events.emit("no_effect", player=player.name, position=self.position, square=self.name)
         
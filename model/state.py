@@ -0,0 +1,63 @@
+from array import array
+
+# Fields stored for every seat, in layout order.
+MONEY, POSITION, IN_JAIL, JAIL_TURNS, ALIVE = range(5)
+SEAT_FIELDS = 5
+NOBODY = -1
+
+
+class GameState:
+    """Everything that changes during a game, packed into one flat array.
+
+    The layout is [round, seat 0 fields, seat 1 fields, ..., owner seat of every square],
+    with NOBODY for unowned squares. Names, prices and rents live on the shared board,
+    so a state costs a few hundred bytes however many are kept alive.
+    """
+
+    __slots__ = ("values", "num_players")
+
+    def __init__(self, values, num_players):
+        self.values = values
+        self.num_players = num_players
+
+    @classmethod
+    def capture(cls, board, seats, players, current_round=1):
+        """Pack a game: `seats` is every player in seat order, `players` those still playing."""
+        values = [current_round]
+        for player in seats:
+            values.extend((player.money, player.position, player.in_jail, player.jail_turns, player in players))
+        owners = {player: seat for seat, player in enumerate(seats)}
+        values.extend(owners.get(getattr(square, "owner", None), NOBODY) for square in board.squares)
+        return cls(array("q", values), len(seats))
+
+    def restore(self, board, seats):
+        """Write this state back onto a board and its players; return (players still playing, round).
+
+        Only squares whose owner differs from the state are handed over, so rolling a game
+        back a few turns costs a pass over the array and a handful of ownership changes.
+        """
+        values = self.values
+        for seat, player in enumerate(seats):
+            base = 1 + seat * SEAT_FIELDS
+            player.money = values[base + MONEY]
+            player.position = values[base + POSITION]
+            player.in_jail = bool(values[base + IN_JAIL])
+            player.jail_turns = values[base + JAIL_TURNS]
+        offset = 1 + self.num_players * SEAT_FIELDS
+        for index, square in enumerate(board.squares):
+            seat = values[offset + index]
+            owner = seats[seat] if seat != NOBODY else None
+            if getattr(square, "owner", None) is not owner:
+                board.set_owner(square, owner)
+        players = [player for seat, player in enumerate(seats)
+                   if values[1 + seat * SEAT_FIELDS + ALIVE]]
+        return players, values[0]
+
+    def field(self, seat, field):
+        return self.values[1 + seat * SEAT_FIELDS + field]
+
+    def owner(self, index):
+        return self.values[1 + self.num_players * SEAT_FIELDS + index]
+
+    def copy(self):
+        return GameState(array("q", self.values), self.num_players)
@@ -0,0 +1,186 @@
+import json
+import mmap
+import os
+import shutil
+from array import array
+
+# One file per column, each a raw array of the given typecode in native byte order.
+COLUMNS = [
+    ("game", "q"),
+    ("round", "i"),
+    ("seat", "b"),
+    ("die1", "b"),
+    ("die2", "b"),
+    ("from_square", "i"),
+    ("to_square", "i"),  # Square landed on; -1 when the turn was spent in jail without moving.
+    ("square_type", "b"),  # model.compiled type code of to_square, -1 without a move.
+    ("cash_delta", "i"),
+    ("purchase", "b"),
+    ("rent_to", "b"),  # Seat the rent went to, -1 for none.
+    ("rent", "i"),
+    ("in_jail", "b"),  # Jail state at the end of the turn.
+    ("jail_turns", "i"),  # Unbounded when the rules set no jail turn limit.
+]
+SCHEMA = "schema.json"
+
+
+class TelemetryWriter:
+    """Appends one row per turn to a columnar table: a directory with one array file per column.
+
+    Rows collect in typed arrays and go to disk `block_rows` at a time, so memory stays
+    at one block however many turns are recorded. Set an engine's `telemetry` to the
+    writer (`start` does this) and every turn it plays is recorded. Turns recorded after
+    the last `flush` are lost if the process dies.
+    """
+
+    def __init__(self, directory, block_rows=65536):
+        self.directory = directory
+        self.block_rows = block_rows
+        os.makedirs(directory, exist_ok=True)
+        check_schema(directory)
+        self.files = [open(os.path.join(directory, f"{name}.col"), "ab") for name, _ in COLUMNS]
+        self.buffers = [array(code) for _, code in COLUMNS]
+        self.appends = [buffer.append for buffer in self.buffers]
+        self.rows = rows_in(directory)
+        self.game = None
+        self.money = []
+        self.positions = []
+        self.owners = {}
+        self.types = ()
+
+    def next_game(self):
+        """A game id after every game already in the table."""
+        if not self.rows:
+            return 0
+        with open(os.path.join(self.directory, "game.col"), "rb") as file:
+            file.seek(-8, os.SEEK_END)
+            return array("q", file.read(8))[0] + 1
+
+    def start(self, engine, game):
+        """Record the turns `engine` plays under the game id `game`."""
+        engine.telemetry = self
+        self.game = game
+        self.money = [player.money for player in engine.seats]
+        self.positions = [player.position for player in engine.seats]
+        self.types = engine.board.compile().types
+        self.owners = {position: engine.seats.index(owner) for position, owner in
+                       ((square.position, getattr(square, "owner", None)) for square in engine.board.squares)
+                       if owner is not None}
+
+    def record_turn(self, engine, player):
+        seat = engine.seats.index(player)
+        dice = engine.rolls[-1] if engine.rolls else (0, 0)
+        landing = engine.landing
+        purchase = rent = 0
+        rent_to = square_type = -1
+        if landing is not None:
+            square = engine.board.squares[landing]
+            square_type = self.types[landing]
+            owner = self.owners.get(landing)
+            if getattr(square, "owner", None) is player and owner != seat:
+                purchase = 1
+                self.owners[landing] = seat
+            elif owner is not None and owner != seat:
+                rent_to, rent = owner, square.rent
+        if player not in engine.players:
+            self.owners = {position: owner for position, owner in self.owners.items() if owner != seat}
+        row = (self.game, engine.round, seat, dice[0], dice[1], self.positions[seat],
+               -1 if landing is None else landing, square_type, player.money - self.money[seat],
+               purchase, rent_to, rent, player.in_jail, player.jail_turns)
+        for append, value in zip(self.appends, row):
+            append(value)
+        self.positions[seat] = player.position
+        self.money[seat] = player.money
+        if rent_to >= 0:
+            self.money[rent_to] = engine.seats[rent_to].money
+        if len(self.buffers[0]) >= self.block_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows to the column files and the row count to the schema."""
+        for file, buffer in zip(self.files, self.buffers):
+            buffer.tofile(file)
+            file.flush()
+            del buffer[:]
+        self.rows = rows_in(self.directory)
+        write_schema(self.directory, self.rows)
+
+    def close(self):
+        self.flush()
+        for file in self.files:
+            file.close()
+
+
+def rows_in(directory):
+    """Rows on disk in a table, from the length of its column files; 0 for a new table."""
+    path = os.path.join(directory, "game.col")
+    return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+
+def check_schema(directory):
+    """Refuse to add to a table whose columns were written with other types."""
+    path = os.path.join(directory, SCHEMA)
+    if os.path.exists(path):
+        with open(path) as file:
+            columns = [tuple(column) for column in json.load(file)["columns"]]
+        if columns != COLUMNS:
+            raise ValueError(f"The telemetry table in {directory} has other columns; record to a new directory.")
+
+
+def write_schema(directory, rows):
+    path = os.path.join(directory, SCHEMA)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        json.dump({"columns": COLUMNS, "rows": rows}, file)
+    os.replace(temporary, path)
+
+
+def append_tables(parts, directory):
+    """Append the tables in `parts` to the table in `directory`, in order, and delete them."""
+    os.makedirs(directory, exist_ok=True)
+    check_schema(directory)
+    for part in parts:
+        for name, _ in COLUMNS:
+            with open(os.path.join(part, f"{name}.col"), "rb") as source, \
+                    open(os.path.join(directory, f"{name}.col"), "ab") as target:
+                shutil.copyfileobj(source, target, 1 << 22)
+        shutil.rmtree(part)
+    write_schema(directory, rows_in(directory))
+
+
+class TelemetryTable:
+    """Reads a table written by TelemetryWriter, one memory-mapped column at a time.
+
+    `column` maps only that column's file and returns a typed memoryview over it, so
+    reading the cash deltas of a billion turns touches nothing else and copies nothing;
+    `numpy.asarray(view)` wraps it without a copy as well.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, SCHEMA)) as file:
+            schema = json.load(file)
+        self.types = dict((name, code) for name, code in schema["columns"])
+        self.rows = schema["rows"]
+        self.maps = []
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        code = self.types[name]
+        with open(os.path.join(self.directory, f"{name}.col"), "rb") as file:
+            length = self.rows * array(code).itemsize
+            if not length:
+                return memoryview(array(code))
+            mapped = mmap.mmap(file.fileno(), length, access=mmap.ACCESS_READ)
+        self.maps.append(mapped)
+        return memoryview(mapped).cast(code)
+
+    def close(self):
+        for mapped in self.maps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # A view of it is still in use; it closes when that is released.
+        self.maps = []
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+from model.board import Board
+from model.player import Player
+from model.engine import GameEngine
+from model.policy import POLICIES
+from model.dice import GameRandom, derive_seed
+
+COLUMNS = ["board", "lineup", "start", "stop", "wins", "money", "money_squares", "bankruptcies", "rounds"]
+Z = 1.96  # Two-sided 95% normal quantile.
+
+
+def lineups(policies, num_players):
+    """Every choice of `num_players` policies, in each of its seat rotations."""
+    for group in itertools.combinations(policies, num_players):
+        for shift in range(num_players):
+            yield group[shift:] + group[:shift]
+
+
+def chunks(boards, policies, num_players, games, chunk_size):
+    """The tournament's work as (board, lineup, start, stop); `games` are played per board and lineup."""
+    for board_file in boards:
+        for lineup in lineups(policies, num_players):
+            for start in range(0, games, chunk_size):
+                yield board_file, lineup, start, min(start + chunk_size, games)
+
+
+def play_chunk(task):
+    """Play one chunk and return its CSV row, with per-seat totals joined by ';'. Runs in a worker."""
+    board_file, lineup, start, stop, seed, max_rounds = task
+    board = Board(board_file)
+    seats = len(lineup)
+    wins, money, squares, bankruptcies = [0] * seats, [0] * seats, [0] * seats, [0] * seats
+    rounds = 0
+    group = ",".join(sorted(lineup))
+    for game_index in range(start, stop):
+        board.reset()
+        # Every rotation of a group replays the same dice, so seat order is the only difference.
+        rng = GameRandom(derive_seed(seed, board_file, group, game_index))
+        players = [Player(f"Player {seat + 1}") for seat in range(seats)]
+        engine = GameEngine(board, players, [POLICIES[name](rng) for name in lineup], rng=rng,
+                            max_rounds=max_rounds)
+        result = engine.run()
+        if result["winner"] is not None:
+            wins[result["winner"]] += 1
+        for seat, (final, bankrupt_round) in enumerate(zip(result["money"], result["bankrupt_round"])):
+            money[seat] += final
+            squares[seat] += final * final
+            bankruptcies[seat] += bankrupt_round is not None
+        rounds += result["rounds"]
+    join = lambda values: ";".join(map(str, values))
+    return [board_file, join(lineup), start, stop, join(wins), join(money), join(squares), join(bankruptcies), rounds]
+
+
+class Standings:
+    """Per-policy running totals. Memory depends on the number of policies only."""
+
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, row):
+        fields = dict(zip(COLUMNS, row))
+        games = int(fields["stop"]) - int(fields["start"])
+        per_seat = zip(*(str(fields[column]).split(";")
+                         for column in ("lineup", "wins", "money", "money_squares", "bankruptcies")))
+        for name, wins, money, squares, bankruptcies in per_seat:
+            total = self.totals.setdefault(name, {"games": 0, "wins": 0, "money": 0, "money_squares": 0,
+                                                  "bankruptcies": 0})
+            total["games"] += games
+            total["wins"] += int(wins)
+            total["money"] += int(money)
+            total["money_squares"] += int(squares)
+            total["bankruptcies"] += int(bankruptcies)
+
+    def summary(self):
+        """Win rate, bankruptcy rate and final money per policy, each with a 95% confidence interval."""
+        summary = {}
+        for name, total in sorted(self.totals.items()):
+            games = total["games"]
+            mean = total["money"] / games
+            variance = max(total["money_squares"] / games - mean * mean, 0) * games / max(games - 1, 1)
+            margin = Z * math.sqrt(variance / games)
+            summary[name] = {
+                "games": games,
+                "win_rate": total["wins"] / games,
+                "win_rate_ci": wilson(total["wins"], games),
+                "bankruptcy_rate": total["bankruptcies"] / games,
+                "bankruptcy_rate_ci": wilson(total["bankruptcies"], games),
+                "mean_money": mean,
+                "mean_money_ci": [mean - margin, mean + margin],
+            }
+        return summary
+
+
+def wilson(successes, trials):
+    """95% Wilson score interval of a proportion."""
+    if not trials:
+        return [0.0, 1.0]
+    p = successes / trials
+    centre = (p + Z * Z / (2 * trials)) / (1 + Z * Z / trials)
+    margin = Z * math.sqrt(p * (1 - p) / trials + Z * Z / (4 * trials * trials)) / (1 + Z * Z / trials)
+    return [max(0.0, centre - margin), min(1.0, centre + margin)]
+
+
+def completed_chunks(output, standings):
+    """Read the rows already in `output` into `standings` and return their chunk keys.
+
+    A row cut short by an interrupted run is dropped from the file, so new rows can be
+    appended after the last complete one. A file that is not a tournament's results is
+    left alone and raises ValueError.
+    """
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output, "rb") as file:
+        end = 0
+        header = file.readline()
+        if header.decode(errors="replace").strip().split(",") == COLUMNS:
+            end = file.tell()
+            for line in iter(file.readline, b""):
+                row = next(csv.reader([line.decode()]))
+                if not line.endswith(b"\n") or len(row) != len(COLUMNS):
+                    break
+                standings.add(row)
+                done.add(tuple(row[:4]))
+                end = file.tell()
+        elif header.endswith(b"\n") or not ",".join(COLUMNS).encode().startswith(header.rstrip(b"\r")):
+            # Only a header cut short by an interrupted run may be thrown away.
+            raise ValueError(f"{output} exists and is not a tournament results file")
+    with open(output, "rb+") as file:
+        file.truncate(end)
+    return done
+
+
+def run_tournament(boards, policies, num_players, games, output, seed=0, chunk_size=250, workers=None,
+                   max_rounds=None, progress=None):
+    """Play a round-robin tournament, appending one CSV row per finished chunk to `output`.
+
+    Each board is played by its own rules; `max_rounds` overrides their round cap.
+
+    Chunks already in `output` are skipped, so an interrupted tournament picks up where
+    it stopped when run again with the same arguments. Returns the per-policy Standings.
+    """
+    for name in policies:
+        if name not in POLICIES:
+            raise ValueError(f"Unknown policy {name}.")
+    if not 2 <= num_players <= len(policies):
+        raise ValueError("Each game needs between 2 and len(policies) players.")
+
+    standings = Standings()
+    done = completed_chunks(output, standings)
+    tasks = ((board_file, lineup, start, stop, seed, max_rounds)
+             for board_file, lineup, start, stop in chunks(boards, policies, num_players, games, chunk_size)
+             if (board_file, ";".join(lineup), str(start), str(stop)) not in done)
+
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    with open(output, "a", newline="") as file:
+        writer = csv.writer(file)
+        if new_file:
+            writer.writerow(COLUMNS)
+
+        def record(row):
+            writer.writerow(row)
+            file.flush()
+            standings.add(row)
+            if progress is not None:
+                progress(standings)
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for row in map(play_chunk, tasks):
+                record(row)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                for row in pool.imap_unordered(play_chunk, tasks):
+                    record(row)
+    return standings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play policies against each other in every seat order.")
+    parser.add_argument("--boards", nargs="+", default=["DefaultBoard.csv"], help="board CSV files")
+    parser.add_argument("--policies", nargs="+", default=["always-buy", "price-threshold", "cash-reserve", "jail-stay"],
+                        choices=sorted(POLICIES))
+    parser.add_argument("--players", type=int, default=None, help="players per game (default: every policy)")
+    parser.add_argument("--games", type=int, default=1000, help="games per board and seat order")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--output", default="tournament.csv", help="results CSV; rerun to resume")
+    parser.add_argument("--summary", help="also write the summary as JSON to this file")
+    args = parser.parse_args(argv)
+
+    def progress(standings):
+        games = sum(total["games"] for total in standings.totals.values()) // (args.players or len(args.policies))
+        print(f"{games} games played", end="\r", flush=True)
+
+    standings = run_tournament(args.boards, args.policies, args.players or len(args.policies), args.games,
+                               args.output, args.seed, args.chunk_size, args.workers, progress=progress)
+    summary = standings.summary()
+    print()
+    for name, row in sorted(summary.items(), key=lambda item: -item[1]["win_rate"]):
+        low, high = row["win_rate_ci"]
+        print(f"{name:<16} win rate {row['win_rate']:.3f} [{low:.3f}, {high:.3f}]  "
+              f"bankrupt {row['bankruptcy_rate']:.3f}  mean money {row['mean_money']:.0f}")
+    if args.summary:
+        with open(args.summary, "w") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
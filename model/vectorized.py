@@ -0,0 +1,188 @@
+import numpy as np
+from model.compiled import PROPERTY, CHANCE, TAX, GO_JAIL, IN_JAIL
+
+
+def square_types(board):
+    """Type code, price and rent arrays for the squares of a board."""
+    compiled = board.compile()
+    return (np.array(compiled.types, dtype=np.int8), np.array(compiled.prices, dtype=np.int64),
+            np.array(compiled.rents, dtype=np.int64))
+
+
+class VectorizedGames:
+    """K games of the same board advanced in lockstep, one seat at a time.
+
+    Every piece of game state is a NumPy array with one row per game, and each turn
+    rolls the dice for all games at once, so the rules in `Board` and the squares are
+    applied as masks instead of per-object method calls. Decisions follow the
+    "always-buy" policy (buy when affordable, pay out of jail) or, with
+    `buy=False`, the "never-buy" policy (never buy, stay in jail until forced to pay).
+    Results have the same format as `GameEngine.result()`. The board's rules apply as
+    they do in the engine.
+    """
+
+    def __init__(self, board, num_players, num_games, seed=None, max_rounds=None, buy=True, money=1500):
+        self.types, self.prices, self.rents = square_types(board)
+        self.num_squares = len(self.types)
+        self.jail_position = board.jail_position
+        rules = board.rules
+        self.chance_amounts = np.array(rules.chance_amounts, dtype=np.int64)
+        self.jail_fine = rules.jail_fine
+        self.jail_turn_limit = rules.jail_turn_limit or np.iinfo(np.int64).max
+        self.tax_percent = rules.tax_percent
+        self.go_salary = rules.go_salary
+        self.num_players = num_players
+        self.num_games = num_games
+        self.max_rounds = rules.max_rounds if max_rounds is None else max_rounds
+        self.buy = buy
+        self.rng = np.random.default_rng(seed)
+
+        shape = (num_games, num_players)
+        self.position = np.zeros(shape, dtype=np.int64)
+        self.money = np.full(shape, money, dtype=np.int64)
+        self.in_jail = np.zeros(shape, dtype=bool)
+        self.jail_turns = np.zeros(shape, dtype=np.int64)
+        self.alive = np.ones(shape, dtype=bool)
+        self.bankrupt_round = np.zeros(shape, dtype=np.int64)
+        self.owner = np.full((num_games, self.num_squares), -1, dtype=np.int64)
+        self.purchased = np.zeros((num_games, self.num_squares), dtype=bool)
+        self.round = np.ones(num_games, dtype=np.int64)
+        self.done = np.zeros(num_games, dtype=bool)
+
+    def run(self):
+        while not self.done.all():
+            self.play_round()
+        return self.results()
+
+    def add_to(self, stats):
+        """Add every finished game to a SimulationStats without building per-game results."""
+        def add(totals, counts):
+            for i, count in enumerate(counts[:len(totals)].tolist()):
+                totals[i] += count
+
+        stats.games += self.num_games
+        add(stats.wins, np.bincount(self.winners(), minlength=self.num_players))
+        add(stats.rounds, np.bincount(self.round - 1, minlength=len(stats.rounds)))
+        add(stats.bankruptcies, (~self.alive).sum(axis=0))
+        add(stats.bankrupt_rounds, np.bincount(self.bankrupt_round[~self.alive], minlength=len(stats.bankrupt_rounds)))
+        add(stats.purchases, self.purchased.sum(axis=0))
+        return stats
+
+    def play_round(self):
+        playing = ~self.done
+        for seat in range(self.num_players):
+            # A game stops mid-round as soon as a single player is left.
+            active = playing & self.alive[:, seat] & (self.alive.sum(axis=1) > 1)
+            games = np.nonzero(active)[0]
+            if len(games):
+                self.play_turn(games, seat)
+        self.round[playing] += 1
+        self.done |= (self.round > self.max_rounds) | (self.alive.sum(axis=1) <= 1)
+
+    def roll(self, count):
+        dice = self.rng.integers(1, 7, size=(2, count))
+        return dice[0], dice[1]
+
+    def play_turn(self, games, seat):
+        jailed = self.in_jail[games, seat]
+        free = games[~jailed]
+        jailed = games[jailed]
+
+        movers = [free]
+        steps = [sum(self.roll(len(free)))]
+        if len(jailed):
+            moved, moved_steps = self.handle_jail(jailed, seat)
+            movers.append(moved)
+            steps.append(moved_steps)
+        games = np.concatenate(movers)
+        self.move(games, seat, np.concatenate(steps))
+        self.resolve(games, seat)
+        self.retire(games[self.money[games, seat] < 0], seat)
+
+    def handle_jail(self, games, seat):
+        """Settle jailed players; return the games whose player leaves jail and their steps."""
+        if self.buy:
+            paying = games
+        else:
+            paying = games[self.jail_turns[games, seat] >= self.jail_turn_limit]
+            staying = games[self.jail_turns[games, seat] < self.jail_turn_limit]
+            self.jail_turns[staying, seat] += 1
+
+        can_pay = self.money[paying, seat] >= self.jail_fine
+        self.retire(paying[~can_pay], seat)
+        paying = paying[can_pay]
+        self.money[paying, seat] -= self.jail_fine
+        self.in_jail[paying, seat] = False
+        self.jail_turns[paying, seat] = 0
+        return paying, sum(self.roll(len(paying)))
+
+    def move(self, games, seat, steps):
+        moved = self.position[games, seat] + steps
+        if self.go_salary:
+            self.money[games, seat] += moved // self.num_squares * self.go_salary
+        self.position[games, seat] = moved % self.num_squares
+
+    def resolve(self, games, seat):
+        squares = self.position[games, seat]
+        types = self.types[squares]
+
+        on_property = types == PROPERTY
+        if on_property.any():
+            self.land_on_property(games[on_property], squares[on_property], seat)
+
+        on_chance = games[types == CHANCE]
+        amounts = self.chance_amounts[self.rng.integers(0, len(self.chance_amounts), size=len(on_chance))]
+        self.money[on_chance, seat] += amounts
+
+        on_tax = games[types == TAX]
+        self.money[on_tax, seat] -= self.money[on_tax, seat] * self.tax_percent // 100
+
+        to_jail = games[types == GO_JAIL]
+        self.in_jail[to_jail, seat] = True
+        self.position[to_jail, seat] = self.jail_position
+
+        in_jail = games[types == IN_JAIL]
+        self.jail_turns[in_jail, seat] += self.in_jail[in_jail, seat]
+
+    def land_on_property(self, games, squares, seat):
+        owners = self.owner[games, squares]
+        unowned = owners < 0
+        if self.buy:
+            buying = unowned & (self.money[games, seat] >= self.prices[squares])
+            self.money[games[buying], seat] -= self.prices[squares[buying]]
+            self.owner[games[buying], squares[buying]] = seat
+            self.purchased[games[buying], squares[buying]] = True
+
+        owned = (owners >= 0) & (owners != seat)
+        games, squares, owners = games[owned], squares[owned], owners[owned]
+        rent = self.rents[squares]
+        self.money[games, seat] -= rent
+        self.money[games, owners] += rent
+
+    def retire(self, games, seat):
+        self.alive[games, seat] = False
+        self.bankrupt_round[games, seat] = self.round[games]
+        owners = self.owner[games]
+        owners[owners == seat] = -1
+        self.owner[games] = owners
+
+    def winners(self):
+        """Seat of the last player standing, or of the richest one left, per game."""
+        money = np.where(self.alive, self.money, np.iinfo(np.int64).min)
+        return np.argmax(money, axis=1)
+
+    def results(self):
+        winners = self.winners()
+        rounds = self.round - 1
+        for game in range(self.num_games):
+            yield {
+                "winner": int(winners[game]),
+                "rounds": int(rounds[game]),
+                "money": self.money[game].tolist(),
+                "bankrupt_round": [int(r) if not alive else None
+                                   for r, alive in zip(self.bankrupt_round[game], self.alive[game])],
+                "bankrupt_order": sorted(np.nonzero(~self.alive[game])[0].tolist(),
+                                         key=lambda seat: self.bankrupt_round[game, seat]),
+                "purchased": np.nonzero(self.purchased[game])[0].tolist(),
+                "stopped": False,
+            }
@@ -4,6 +4,40 @@ from model.player import Player
 from model.squares import Square,TaxSquare,ChanceSquare,PropertySquare,GoJailSquare,InJailSqaure
 from model.board import Board
 from model.gameboardDesign import GameboardDesigner
+from model.engine import GameEngine
+from model.policy import Policy, AlwaysBuyPolicy, INTERACTIVE, PAY_FINE, STAY_IN_JAIL
+from model.simulate import simulate, replay, play_chunk
+from model.dice import GameRandom, derive_seed
+from model.state import GameState, MONEY
+from model.journal import GameJournal
+from model import savefile
+from model.render import BoardRenderer
+from model.events import RecordingSink, ConsoleSink, NULL
+from model.metrics import METRICS, Metrics
+from model.server import GameServer, load_test
+from model.tournament import COLUMNS, lineups, run_tournament
+from model.gameboardDesign import (BOARD_SIZE, generate_board, validate_board, read_board, build_boards,
+                                   validate_files)
+from model.optimizer import EvaluationCache, Targets, optimize, board_key
+from model.ai import ExpectimaxPolicy, TranspositionTable
+from model.odds import WinOdds
+from model.telemetry import TelemetryWriter, TelemetryTable
+from model.archive import GameArchive, board_id
+from model.rules import Rules, STANDARD, save_rules
+import csv
+import shutil
+import asyncio
+import json
+import game
+import os
+import tempfile
+import time
+from model.markov import landing_probabilities, analyze, transition_matrix
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import random
 
 class TestPlayer(unittest.TestCase):
     def test_player_initialization(self):
@@ -149,6 +183,90 @@ class TestBoard(unittest.TestCase):
             self.assertEqual(player.position, 1)
             mocked_print.assert_called_with("Alice moved to Park Place.")
 
+    def test_move_player_wraps_any_board_size(self):
+        board = Board(squares=[Square(f"Square {i}", i) for i in range(30)])
+        player = Player("Alice", position=25)
+        with patch("builtins.print"):
+            board.move_player(player, 7)
+        self.assertEqual(player.position, 2)
+
+    def test_compiled_board_is_cached(self):
+        from model import compiled
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "TinyBoard.csv")
+            with open(path, "w") as file:
+                file.write("position,name,price,rent\n0,Go,,\n1,Central,800,90\n2,In Jail,,\n3,Free Parking\n")
+            first = compiled.load(path)
+            self.assertIs(compiled.load(path), first)
+            self.assertEqual(list(first.types), [compiled.PLAIN, compiled.PROPERTY, compiled.IN_JAIL, compiled.PLAIN])
+            self.assertEqual(first.jail_position, 2)
+            self.assertEqual(len(os.listdir(os.path.join(directory, compiled.CACHE_DIR))), 1)
+
+            compiled._LOADED.clear()
+            board = Board(path)
+            self.assertEqual(board.compiled.names, first.names)
+            self.assertIsInstance(board.squares[1], PropertySquare)
+            self.assertEqual(board.jail_position, 2)
+
+    def test_board_cache_is_data_not_code(self):
+        import hashlib
+        import pickle
+        from model import compiled
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "TinyBoard.csv")
+            content = "position,name,price,rent\n0,Go,,\n1,Central,800,90\n2,In Jail,,\n"
+            with open(path, "w") as file:
+                file.write(content)
+            os.mkdir(os.path.join(directory, compiled.CACHE_DIR))
+            cache_path = os.path.join(directory, compiled.CACHE_DIR,
+                                      hashlib.sha256(content.encode()).hexdigest() + ".json")
+            with open(cache_path, "wb") as file:
+                file.write(pickle.dumps(compiled.CompiledBoard.from_rows([])))
+            board = compiled.load(path)
+            self.assertEqual(board.names, ("Go", "Central", "In Jail"))
+            with open(cache_path) as file:
+                self.assertEqual(compiled.CompiledBoard.from_json(file.read()).names, board.names)
+
+    def test_blank_lines_in_board_csv_are_skipped(self):
+        from model.compiled import parse_csv
+        rows = list(parse_csv("position,name,price,rent\n0,Go,,\n\n   \n1,Central,800,90\n\n"))
+        self.assertEqual(rows, [["0", "Go", "", ""], ["1", "Central", "800", "90"]])
+
+    def test_ownership_index(self):
+        board = Board("DefaultBoard.csv")
+        alice, bob = Player("Alice"), Player("Bob")
+        board.set_owner(board.squares[1], alice)
+        board.set_owner(board.squares[2], alice)
+        self.assertEqual(board.properties_of(alice), {1, 2})
+        self.assertIs(board.owner_of(1), alice)
+        self.assertEqual(board.property_value(alice), 1500)
+        self.assertEqual(board.rent_exposure(alice), 155)
+        self.assertEqual(board.net_worth(alice), 3000)
+
+        board.set_owner(board.squares[2], bob)
+        self.assertEqual(board.property_value(alice), 800)
+        self.assertEqual(alice.properties, ["Central"])
+        self.assertEqual(bob.properties, ["Wan Chai"])
+        self.assertEqual(board.standings([bob, alice]), [alice, bob])
+
+    def test_release_on_bankruptcy(self):
+        board = Board("DefaultBoard.csv")
+        alice = Player("Alice")
+        board.set_owner(board.squares[1], alice)
+        board.release(alice)
+        self.assertIsNone(board.squares[1].owner)
+        self.assertEqual(board.properties_of(alice), set())
+        self.assertEqual(alice.properties, [])
+        self.assertEqual(board.property_value(alice), 0)
+
+    def test_owner_pays_no_rent_to_self(self):
+        board = Board("DefaultBoard.csv")
+        alice = Player("Alice", money=500)
+        board.set_owner(board.squares[1], alice)
+        with patch("builtins.print"):
+            board.squares[1].land_on(alice)
+        self.assertEqual(alice.money, 500)
+
     def test_board_resolve_square(self):
         square_mock = MagicMock()
         square_mock.name = "Chance"
@@ -177,5 +295,1028 @@ class TestGameboardDesigner(unittest.TestCase):
         mock_print.assert_any_call("Gameboard modified and saved successfully!")
 
 
+    @patch("builtins.print")
+    def test_create_gameboard_makes_twenty_squares(self, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            with patch("builtins.input", side_effect=["3"] * BOARD_SIZE + [os.path.join(directory, "new")]):
+                GameboardDesigner().create_gameboard()
+            self.assertEqual(len(read_board(os.path.join(directory, "newBoard.csv"))), 20)
+
+
+class TestBoardGeneration(unittest.TestCase):
+    def test_generated_boards_are_valid_and_playable(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = build_boards([{"count": 5, "size": 36, "chance": 4}, {"size": 4}], directory, workers=1)
+            self.assertEqual(sum(not problems for problems in results.values()), 5)
+            written = [filename for filename, problems in results.items() if not problems]
+            self.assertEqual(validate_files(written, workers=1), dict.fromkeys(written, []))
+            path = os.path.join(directory, "spec0-3Board.csv")
+            self.assertEqual(read_board(path), generate_board({"size": 36, "chance": 4}, seed=3))
+            board = Board(path)
+            self.assertEqual((len(board.squares), board.jail_position), (36, 9))
+
+    def test_validation_finds_problems(self):
+        squares = generate_board({})
+        self.assertEqual(validate_board(squares), [])
+        squares[2]["name"] = "Go to Jail"
+        squares[3] = dict(squares[4], position=3)
+        squares[8] = {"position": 8, "name": "Go", "price": None, "rent": None}
+        problems = validate_board(squares)
+        self.assertEqual(len(problems), 3)
+        self.assertTrue(any("'Go To Jail'" in problem for problem in problems))
+        self.assertTrue(any("used 2 times" in problem for problem in problems))
+
+class TestGameEngine(unittest.TestCase):
+    def test_run_headless_game(self):
+        board = Board("DefaultBoard.csv")
+        players = [Player("Alice"), Player("Bob"), Player("Carol")]
+        engine = GameEngine(board, players, [AlwaysBuyPolicy()] * 3, rng=random.Random(7))
+        with patch("builtins.input") as mocked_input, patch("builtins.print") as mocked_print:
+            result = engine.run()
+            mocked_input.assert_not_called()
+            mocked_print.assert_not_called()
+        self.assertTrue(result["rounds"] <= 100)
+        self.assertEqual(len(result["money"]), 3)
+        self.assertIn(result["winner"], [0, 1, 2])
+
+    def test_same_seed_replays_same_game(self):
+        results = []
+        for _ in range(2):
+            players = [Player("Alice"), Player("Bob")]
+            engine = GameEngine(Board("DefaultBoard.csv"), players, [AlwaysBuyPolicy()] * 2, rng=random.Random(3))
+            results.append(engine.run())
+        self.assertEqual(results[0], results[1])
+
+    def test_policy_declines_purchase(self):
+        property_square = PropertySquare("Boardwalk", 1, price=400, rent=50)
+        player = Player("Alice", money=500, policy=Policy())
+        property_square.land_on(player)
+        self.assertIsNone(property_square.owner)
+        self.assertEqual(player.money, 500)
+
+    def test_jail_fine_paid_by_policy(self):
+        board = Board("DefaultBoard.csv")
+        player = Player("Alice", money=500, position=5, in_jail=True, policy=AlwaysBuyPolicy())
+        engine = GameEngine(board, [player, Player("Bob")], rng=random.Random(1))
+        engine.handle_jail(player)
+        self.assertFalse(player.in_jail)
+        self.assertTrue(player.money <= 350)
+
+
+class TestForking(unittest.TestCase):
+    def midgame(self):
+        players = [Player(f"Player {seat + 1}", policy=AlwaysBuyPolicy()) for seat in range(3)]
+        engine = GameEngine(Board("DefaultBoard.csv"), players, rng=GameRandom(4))
+        for _ in range(8):
+            engine.play_round()
+        return engine
+
+    def test_rollback_replays_identically(self):
+        engine = self.midgame()
+        snapshot = engine.snapshot()
+        engine.rng = GameRandom(9)
+        first = engine.run()
+        engine.restore(snapshot)
+        self.assertEqual(engine.snapshot().state.values, snapshot.state.values)
+        engine.rng = engine.board.rng = GameRandom(9)
+        self.assertEqual(engine.run(), first)
+
+    def test_fork_is_independent(self):
+        engine = self.midgame()
+        before = engine.snapshot()
+        fork = engine.fork(GameRandom(1))
+        self.assertEqual(fork.snapshot().state.values, before.state.values)
+        self.assertEqual(fork.board.properties_of(fork.seats[0]),
+                         engine.board.properties_of(engine.seats[0]))
+        fork.run()
+        self.assertEqual(engine.snapshot().state.values, before.state.values)
+        owners = {getattr(square, "owner", None) for square in fork.board.squares} - {None}
+        self.assertTrue(owners <= set(fork.seats))
+
+    def test_fork_part_way_through_a_round(self):
+        players = [Player(f"Player {seat + 1}", policy=AlwaysBuyPolicy()) for seat in range(3)]
+        engine = GameEngine(Board("DefaultBoard.csv"), players, rng=GameRandom(4))
+        engine.play_round()
+        forks = []
+
+        def before_turn(engine, player):
+            if engine.seats.index(player) == 1:
+                forks.append(engine.fork(GameRandom(1)))
+                return False
+            return True
+
+        engine.before_turn = before_turn
+        engine.play_round()
+        fork, played = forks[0], []
+        self.assertEqual((fork.round, fork.next_seat), (engine.round, 1))
+        fork.before_turn = lambda engine, player: played.append(engine.seats.index(player))
+        fork.play_round()
+        self.assertEqual(played, [1, 2])
+
+    def test_fork_a_saved_game(self):
+        engine = self.midgame()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.json")
+            savefile.save(path, engine.board, engine.seats, engine.players, engine.round)
+            board, seats, players, current_round = savefile.load(path)
+        loaded = GameEngine(board, players, [AlwaysBuyPolicy()] * len(players), seats=seats,
+                            current_round=current_round)
+        results = {loaded.fork(GameRandom(seed)).run()["winner"] for seed in range(20)}
+        self.assertTrue(results <= {seats.index(player) for player in players})
+        self.assertEqual(loaded.snapshot().state.values, engine.snapshot().state.values)
+
+
+class TestExpectimaxPolicy(unittest.TestCase):
+    def game(self, ai, seed=0):
+        players = [Player(f"Player {seat + 1}") for seat in range(3)]
+        return GameEngine(Board("DefaultBoard.csv"), players, [ai, AlwaysBuyPolicy(), AlwaysBuyPolicy()],
+                          rng=GameRandom(seed))
+
+    def test_table_evicts_least_recently_used(self):
+        table = TranspositionTable(maxsize=2)
+        table.put("a", 1.0)
+        table.put("b", 2.0)
+        table.get("a")
+        table.put("c", 3.0)
+        self.assertEqual(list(table.entries), ["a", "c"])
+        self.assertEqual(table.hits, 1)
+
+    def test_decisions_stay_within_the_time_budget(self):
+        ai = ExpectimaxPolicy(max_depth=10, time_budget=0.005)
+        engine = self.game(ai)
+        player = engine.seats[0]
+        square = next(square for square in engine.board.squares if isinstance(square, PropertySquare))
+        player.position = square.position
+        start = time.perf_counter()
+        decision = ai.buy_property(player, square)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertIn(decision, (True, False))
+        self.assertLess(ai.depth, 10)
+
+    def test_keeps_money_for_the_jail_fine(self):
+        ai = ExpectimaxPolicy(max_depth=1)
+        engine = self.game(ai)
+        player = engine.seats[0]
+        player.money = 100
+        player.in_jail = True
+        self.assertNotEqual(ai.jail_option(player), PAY_FINE)
+
+    def test_forks_are_not_kept_alive(self):
+        import gc
+        ai = ExpectimaxPolicy()
+        engine = self.game(ai)
+        for seed in range(50):
+            engine.fork(GameRandom(seed))
+        gc.collect()
+        self.assertEqual(len(ai.games), 1)
+        self.assertEqual(len(ai.models), 1)
+
+    def test_plays_whole_games(self):
+        ai = ExpectimaxPolicy(time_budget=0.002)
+        for seed in range(3):
+            result = self.game(ai, seed).run()
+            self.assertIn(result["winner"], (0, 1, 2, None))
+        self.assertTrue(ai.table.entries)
+
+
+class TestWinOdds(unittest.TestCase):
+    def engine(self):
+        players = [Player(f"Player {seat + 1}", policy=AlwaysBuyPolicy()) for seat in range(3)]
+        engine = GameEngine(Board("DefaultBoard.csv"), players, rng=GameRandom(4))
+        engine.play_round()
+        return engine
+
+    def test_estimates_are_refined_not_restarted(self):
+        engine = self.engine()
+        odds = WinOdds(workers=0, batch=20)
+        first = odds.update(engine)
+        self.assertEqual(odds.games(engine), 20)
+        self.assertLessEqual(sum(first.values()), 1.0)
+        odds.update(engine)
+        self.assertEqual(odds.games(engine), 40)
+        self.assertEqual(odds.estimate(engine, 60), WinOdds(workers=0, batch=60).estimate(engine, 60))
+
+    def test_rollouts_start_from_the_player_about_to_move(self):
+        engine = self.engine()
+        odds = WinOdds(workers=0, batch=20)
+        first_turns = {}
+        play_turn = GameEngine.play_turn
+
+        def record(rollout, player):
+            first_turns.setdefault(id(rollout), rollout.seats.index(player))
+            return play_turn(rollout, player)
+
+        def before_turn(engine, player):
+            if engine.seats.index(player) == 0:
+                return True
+            with patch.object(GameEngine, "play_turn", record):
+                odds.update(engine)
+            return False
+
+        engine.before_turn = before_turn
+        engine.play_round()
+        self.assertEqual(odds.games(engine), 20)
+        self.assertEqual(set(first_turns.values()), {1})
+
+    def test_pool_keeps_refining_between_updates(self):
+        engine = self.engine()
+        odds = WinOdds(workers=1, batch=5, max_games=30)
+        try:
+            odds.update(engine)
+            deadline = time.time() + 30
+            while odds.games(engine) < 30 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(odds.games(engine), 30)
+            self.assertLessEqual(sum(odds.odds(engine).values()), 1.0)
+            self.assertEqual(odds.running, 0)
+        finally:
+            odds.close()
+
+    def test_keeps_showing_the_last_estimate_until_the_new_state_has_one(self):
+        engine = self.engine()
+        odds = WinOdds(workers=0, batch=10)
+        shown = odds.update(engine)
+        engine.play_round()
+        self.assertEqual(odds.odds(engine), shown)
+
+    def test_status_shows_win_probability(self):
+        engine = self.engine()
+        odds = {engine.seats[0]: 0.25}
+        text = BoardRenderer(engine.board).status_text(engine.seats, odds)
+        self.assertIn("Player 1 - Money", text)
+        self.assertIn("Win: 25%", text)
+        self.assertEqual(text.count("Win:"), 1)
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_columns_match_the_game(self):
+        with tempfile.TemporaryDirectory() as directory:
+            writer = TelemetryWriter(directory, block_rows=64)
+            events = RecordingSink()
+            players = [Player(f"Player {seat + 1}", policy=AlwaysBuyPolicy()) for seat in range(3)]
+            board = Board("DefaultBoard.csv")
+            engine = GameEngine(board, players, rng=GameRandom(2), events=events)
+            writer.start(engine, 7)
+            engine.run()
+            writer.close()
+            table = TelemetryTable(directory)
+            self.assertEqual(sum(square >= 0 for square in table.column("to_square")), len(events.of_kind("moved")))
+            self.assertEqual(set(table.column("game")), {7})
+            self.assertEqual(sum(table.column("purchase")), len(events.of_kind("bought")))
+            self.assertEqual(sum(table.column("rent")), sum(event["amount"] for event in events.of_kind("rent")))
+            deltas = [0] * 3
+            for seat, delta, rent_to, rent in zip(table.column("seat"), table.column("cash_delta"),
+                                                  table.column("rent_to"), table.column("rent")):
+                deltas[seat] += delta
+                if rent_to >= 0:
+                    deltas[rent_to] += rent
+            self.assertEqual(deltas, [player.money - 1500 for player in players])
+            table.close()
+
+    def test_large_boards_and_long_jail_stays_fit(self):
+        from model.policy import STAY_IN_JAIL
+        games = [(Board(squares=[Square("Go", 0)] + [Square(f"Square {i}", i) for i in range(1, 40000)]),
+                  39990, False),
+                 (Board(squares=[Square("Go", 0), GoJailSquare("Go To Jail", 1), InJailSqaure("In Jail", 2)],
+                        rules=Rules(jail_turn_limit=0, max_rounds=200)), 0, True)]
+        for board, position, long_jail in games:
+            with tempfile.TemporaryDirectory() as directory, patch("builtins.print"):
+                writer = TelemetryWriter(directory)
+                players = [Player(f"Player {seat + 1}", position=position, policy=AlwaysBuyPolicy(jail=STAY_IN_JAIL))
+                           for seat in range(2)]
+                engine = GameEngine(board, players, rng=GameRandom(1), max_rounds=board.rules.max_rounds)
+                writer.start(engine, 0)
+                engine.run()
+                writer.close()
+                table = TelemetryTable(directory)
+                self.assertEqual(list(table.column("from_square"))[:2], [position] * 2)
+                self.assertEqual(max(table.column("jail_turns")) > 127, long_jail)
+                table.close()
+
+    def test_appending_to_a_table_with_other_columns_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "schema.json"), "w") as file:
+                json.dump({"columns": [["game", "q"], ["from_square", "h"]], "rows": 0}, file)
+            with self.assertRaises(ValueError):
+                TelemetryWriter(directory)
+
+    def test_simulate_appends_parts_in_game_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            simulate("DefaultBoard.csv", 2, 6, workers=1, chunk_size=4, telemetry=directory)
+            simulate("DefaultBoard.csv", 2, 6, workers=1, chunk_size=4, telemetry=directory)
+            table = TelemetryTable(directory)
+            games = table.column("game")
+            self.assertEqual(sorted(set(games)), list(range(6)))
+            self.assertEqual(list(games[:len(games) // 2]), list(games[len(games) // 2:]))
+            self.assertEqual(sorted(os.listdir(directory)),
+                             sorted([name + ".col" for name in table.types] + ["schema.json"]))
+            del games
+            table.close()
+
+
+class TestGameArchive(unittest.TestCase):
+    def test_indexes_answer_queries_like_a_scan(self):
+        with tempfile.TemporaryDirectory() as directory:
+            simulate("DefaultBoard.csv", 3, 40, workers=1, chunk_size=15, archive=directory)
+            simulate("DefaultBoard.csv", 2, 10, seed=1, workers=1, archive=directory)
+            archive = GameArchive(directory)
+            records = [archive.record(number) for number in range(len(archive))]
+            self.assertEqual(len(records), 50)
+            self.assertEqual(records[0], archive.games(board="DefaultBoard.csv", rounds=range(records[0].rounds,
+                                                                                        records[0].rounds + 1))[0])
+            short = sorted(number for number, record in enumerate(records) if record.rounds < 30)
+            self.assertEqual(sorted(archive.query(board="DefaultBoard.csv", rounds=range(30))), short)
+            wins = [number for number, record in enumerate(records) if record.winner == 1]
+            self.assertEqual(sorted(archive.query(winner=1)), wins)
+            self.assertEqual(sorted(archive.query(board=board_id("DefaultBoard.csv"), winner=1)), wins)
+            self.assertEqual(archive.query(board=b"\0" * 16), [])
+            archive.close()
+
+    def test_records_round_trip(self):
+        result = replay("DefaultBoard.csv", 3, 0, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            archive = GameArchive(directory)
+            archive.add(board_id("DefaultBoard.csv"), 0, 2, ["Ann", "Bo", "Cy"], result)
+            record = archive.record(0)
+            archive.close()
+        self.assertEqual((record.game, record.players, record.rounds, record.names), (2, 3, result["rounds"],
+                                                                                      ["Ann", "Bo", "Cy"]))
+        self.assertEqual(record.winner, result["winner"])
+        self.assertEqual(record.money, result["money"])
+        self.assertEqual(record.bankrupt_round, result["bankrupt_round"])
+        self.assertEqual(record.bankrupt_order, result["bankrupt_order"])
+
+    def test_six_long_names_fit_and_longer_ones_fail(self):
+        result = replay("DefaultBoard.csv", 6, 0, 1, policy="price-threshold")
+        names = ["price-threshold"] * 5 + ["Zoë"]
+        with tempfile.TemporaryDirectory() as directory:
+            archive = GameArchive(directory)
+            archive.add(board_id("DefaultBoard.csv"), 0, 1, names, result)
+            self.assertEqual(archive.record(0).names, names)
+            with self.assertRaises(ValueError):
+                archive.add(board_id("DefaultBoard.csv"), 0, 1, ["é" * 40] * 6, result)
+            archive.close()
+
+    def test_board_id_covers_the_rules(self):
+        board = Board("DefaultBoard.csv")
+        house = Board("DefaultBoard.csv", rules=Rules(jail_fine=50))
+        self.assertNotEqual(board_id(board), board_id(house))
+        self.assertEqual(board_id(board), board_id("DefaultBoard.csv"))
+
+
+class TestRules(unittest.TestCase):
+    def board_with_rules(self, directory, **rules):
+        path = os.path.join(directory, "HouseBoard.csv")
+        shutil.copy("DefaultBoard.csv", path)
+        save_rules(Rules(**rules), path)
+        return path
+
+    def test_rules_file_is_loaded_alongside_the_board(self):
+        self.assertIs(Board("DefaultBoard.csv").rules, STANDARD)
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.board_with_rules(directory, jail_fine=50, max_rounds=20)
+            board = Board(path)
+            self.assertEqual((board.rules.jail_fine, board.rules.max_rounds, board.rules.tax_percent), (50, 20, 10))
+            self.assertEqual(GameEngine(board, [Player("A"), Player("B")]).max_rounds, 20)
+            stats = simulate(path, 2, 5, workers=1)
+            self.assertEqual(len(stats.rounds), 21)
+            self.assertTrue(all(not count for count in stats.rounds[21:]))
+        with self.assertRaises(ValueError):
+            Rules.from_dict({"jail_fee": 10})
+
+    def test_square_and_jail_rules(self):
+        board = Board("DefaultBoard.csv", rules=Rules(jail_fine=40, jail_turn_limit=1, tax_percent=50,
+                                                      chance_amounts=[7]))
+        player = Player("A", money=1000, in_jail=True, jail_turns=1)
+        events = RecordingSink()
+        engine = GameEngine(board, [player, Player("B")], [Policy(), Policy()], rng=GameRandom(3), events=events)
+        engine.handle_jail(player)
+        self.assertEqual(events.of_kind("jail_forced"), [{"player": "A", "fine": 40, "turns": 1}])
+        self.assertEqual(events.of_kind("fine_paid"), [{"player": "A", "fine": 40}])
+        self.assertFalse(player.in_jail)
+        chance = next(square for square in board.squares if isinstance(square, ChanceSquare))
+        tax = next(square for square in board.squares if isinstance(square, TaxSquare))
+        other = Player("C", money=100)
+        chance.land_on(other)
+        tax.land_on(other)
+        self.assertEqual(other.money, 107 - 53)
+
+    def test_go_salary_only_when_enabled(self):
+        for salary, expected in ((0, 1500), (200, 1700)):
+            board = Board("DefaultBoard.csv", rules=Rules(go_salary=salary), events=NULL)
+            player = Player("A", position=len(board.squares) - 2)
+            engine = GameEngine(board, [player, Player("B")])
+            engine.move(player, 4)
+            self.assertEqual((player.position, player.money), (2, expected))
+
+    @patch("builtins.input", return_value="3")
+    @patch("builtins.print")
+    def test_jail_prompt_shows_the_rules(self, mock_print, mock_input):
+        board = Board("DefaultBoard.csv", rules=Rules(jail_fine=40, jail_turn_limit=5))
+        player = Player("A", in_jail=True, jail_turns=3)
+        engine = GameEngine(board, [player, Player("B", policy=AlwaysBuyPolicy())], rng=GameRandom(1))
+        engine.handle_jail(player)
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertIn("A is in jail (Turn 4/5).", printed)
+        self.assertIn("2. Pay HKD 40 to get out.", printed)
+
+    def test_forks_of_interactive_games_are_not_kept_alive(self):
+        import gc
+        players = [Player("A"), Player("B", policy=AlwaysBuyPolicy())]
+        engine = GameEngine(Board("DefaultBoard.csv"), players, rng=GameRandom(1))
+        gc.collect()
+        before = len(INTERACTIVE.games)
+        for seed in range(50):
+            engine.fork(GameRandom(seed))
+        gc.collect()
+        self.assertEqual(len(INTERACTIVE.games), before)
+
+    def test_saved_games_keep_their_rules(self):
+        rules = Rules(go_salary=100, max_rounds=30)
+        board = Board("DefaultBoard.csv", rules=rules)
+        seats = [Player("A"), Player("B")]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.json")
+            savefile.save(path, board, seats, seats)
+            self.assertEqual(savefile.load(path)[0].rules, rules)
+            binary = os.path.join(directory, "game.bin")
+            savefile.save(binary, board, seats, seats)
+            self.assertEqual(savefile.load(binary)[0].rules, rules)
+            savefile.save(binary, Board("DefaultBoard.csv"), seats, seats)
+            self.assertIs(savefile.load(binary)[0].rules, STANDARD)
+            engine = GameEngine(board, seats, [AlwaysBuyPolicy()] * 2, rng=GameRandom(1),
+                                journal=GameJournal(os.path.join(directory, "game.journal")))
+            engine.journal.start(engine)
+            engine.play_round()
+            engine.journal.close()
+            self.assertEqual(GameJournal.resume(os.path.join(directory, "game.journal"))[0].rules, rules)
+            self.assertEqual(engine.fork().board.rules, rules)
+
+
+class TestEvents(unittest.TestCase):
+    def test_recording_sink_keeps_typed_events(self):
+        sink = RecordingSink()
+        players = [Player("Alice"), Player("Bob")]
+        GameEngine(Board("DefaultBoard.csv"), players, [AlwaysBuyPolicy()] * 2, rng=random.Random(5),
+                   events=sink).run()
+        self.assertEqual(sink.events[0].kind, "round")
+        self.assertTrue(sink.of_kind("moved"))
+        for bought in sink.of_kind("bought"):
+            self.assertIn(bought["player"], ["Alice", "Bob"])
+
+    def test_console_sink_reproduces_messages(self):
+        board = Board("DefaultBoard.csv", events=ConsoleSink())
+        owner, player = Player("Bob"), Player("Alice", money=500)
+        board.set_owner(board.squares[1], owner)
+        with patch("builtins.print") as mocked_print:
+            board.squares[1].land_on(player)
+            mocked_print.assert_called_with("Alice pays $90 rent to Bob.")
+            board.squares[8].land_on(player)
+            self.assertRegex(mocked_print.call_args[0][0], r"^Alice landed on Chance and (gained|lost) \$\d+\.$")
+
+    def test_null_sink_never_formats(self):
+        board = Board("DefaultBoard.csv", events=NULL)
+        with patch.dict("model.events.MESSAGES", clear=True), patch("builtins.print") as mocked_print:
+            board.squares[3].land_on(Player("Alice"))
+            board.move_player(Player("Alice"), 3)
+            mocked_print.assert_not_called()
+
+
+class TestDice(unittest.TestCase):
+    def test_same_seed_same_stream(self):
+        first, second = GameRandom(42), GameRandom(42)
+        self.assertEqual([first.roll_dice() for _ in range(5000)], [second.roll_dice() for _ in range(5000)])
+        self.assertEqual([first.choice("abcde") for _ in range(100)], [second.choice("abcde") for _ in range(100)])
+
+    def test_rolls_are_fair(self):
+        rng = GameRandom(1)
+        counts = [0] * 13
+        for _ in range(36000):
+            a, b = rng.roll_dice()
+            self.assertTrue(1 <= a <= 6 and 1 <= b <= 6)
+            counts[a + b] += 1
+        self.assertAlmostEqual(counts[7] / 36000, 6 / 36, delta=0.01)
+        self.assertAlmostEqual(counts[2] / 36000, 1 / 36, delta=0.005)
+
+    def test_derived_streams_are_independent(self):
+        self.assertEqual(derive_seed(7, 3), derive_seed(7, 3))
+        self.assertNotEqual(derive_seed(7, 3), derive_seed(7, 4))
+        self.assertNotEqual(derive_seed(7, 3), derive_seed(8, 3))
+
+    def test_replay_reproduces_simulated_game(self):
+        stats = play_chunk(("DefaultBoard.csv", 3, 5, 6, 11, "always-buy", 100, False, False, None, False))
+        result = replay("DefaultBoard.csv", 3, 11, 5)
+        self.assertEqual(stats.rounds[result["rounds"]], 1)
+        self.assertEqual(stats.wins[result["winner"]], 1)
+        sink = RecordingSink()
+        self.assertEqual(replay("DefaultBoard.csv", 3, 11, 5, events=sink), result)
+        self.assertTrue(sink.events)
+
+
+class TestSimulate(unittest.TestCase):
+    def test_simulate_aggregates_games(self):
+        stats = simulate("DefaultBoard.csv", 3, 40, seed=1, workers=1, chunk_size=15)
+        summary = stats.summary()
+        self.assertEqual(summary["games"], 40)
+        self.assertEqual(sum(stats.rounds), 40)
+        self.assertAlmostEqual(sum(summary["win_rate"]), 1.0)
+
+    def test_results_do_not_depend_on_chunking(self):
+        first = simulate("DefaultBoard.csv", 2, 30, seed=9, workers=1, chunk_size=7)
+        second = simulate("DefaultBoard.csv", 2, 30, seed=9, workers=1, chunk_size=30)
+        self.assertEqual(first.summary(), second.summary())
+
+
+class TestGameState(unittest.TestCase):
+    def test_slotted_objects_have_no_dict(self):
+        self.assertFalse(hasattr(Player("Alice"), "__dict__"))
+        self.assertFalse(hasattr(PropertySquare("Boardwalk", 1, 400, 50), "__dict__"))
+        self.assertFalse(hasattr(ChanceSquare("Chance", 2), "__dict__"))
+
+    def test_capture_and_restore(self):
+        board = Board("DefaultBoard.csv")
+        alice, bob = Player("Alice", money=900, position=3), Player("Bob", in_jail=True, jail_turns=2)
+        board.squares[1].owner = bob
+        state = GameState.capture(board, [alice, bob], [bob], current_round=7)
+        self.assertEqual(state.field(0, MONEY), 900)
+        self.assertEqual(state.owner(1), 1)
+
+        alice.money, bob.in_jail, board.squares[1].owner = 0, False, None
+        players, current_round = state.restore(board, [alice, bob])
+        self.assertEqual(players, [bob])
+        self.assertEqual(current_round, 7)
+        self.assertEqual(alice.money, 900)
+        self.assertTrue(bob.in_jail)
+        self.assertIs(board.squares[1].owner, bob)
+        self.assertEqual(bob.properties, ["Central"])
+
+
+class TestBoardRenderer(unittest.TestCase):
+    def test_first_frame_is_full_board(self):
+        board = Board("DefaultBoard.csv")
+        text = BoardRenderer(board).frame([Player("Alice"), Player("Bob", position=1)])
+        self.assertIn("[Go - $N/A] A\n", text)
+        self.assertIn("[Central - $800] B\n", text)
+        self.assertEqual(text.count("\n["), 20)
+        self.assertIn("Bob - Money: $1500, Position: 1, In Jail: False", text)
+
+    def test_later_frames_redraw_the_whole_board(self):
+        board = Board("DefaultBoard.csv")
+        alice, bob = Player("Alice"), Player("Bob", position=1)
+        renderer = BoardRenderer(board)
+        renderer.frame([alice, bob])
+        alice.position = 4
+        text = renderer.board_text([alice, bob])
+        self.assertEqual(text, BoardRenderer(board, diff=False).board_text([alice, bob]))
+        self.assertEqual(len(text.split("\n")), 2 + len(board.squares))
+        self.assertEqual(text.split("\n")[2], "[Go - $N/A] ")
+        self.assertEqual(text.split("\n")[6], "[Stanley - $600] A")
+        self.assertIs(renderer.board_text([alice, bob]), text)
+
+    def test_draw_is_a_single_write(self):
+        out = MagicMock()
+        BoardRenderer(Board("DefaultBoard.csv"), out=out).draw([Player("Alice")])
+        out.write.assert_called_once()
+
+
+class TestGameJournal(unittest.TestCase):
+    def play_and_stop(self, path, turns, snapshot_every=7):
+        players = [Player("Alice"), Player("Bob"), Player("Carol")]
+        played = []
+
+        def before_turn(engine, player):
+            played.append(player)
+            return len(played) <= turns
+
+        engine = GameEngine(Board("DefaultBoard.csv"), players, [AlwaysBuyPolicy()] * 3, rng=random.Random(4),
+                            before_turn=before_turn, journal=GameJournal(path, snapshot_every))
+        engine.journal.start(engine)
+        engine.run()
+        engine.journal.close()
+        return engine, played[-1]
+
+    def assert_resumes(self, path, engine, next_player):
+        board, seats, players, current_round, next_seat = GameJournal.resume(path)
+        self.assertEqual(current_round, engine.round)
+        self.assertEqual(seats[next_seat].name, next_player.name)
+        self.assertEqual([p.name for p in players], [p.name for p in engine.players])
+        expected = GameState.capture(engine.board, engine.seats, engine.players, engine.round)
+        self.assertEqual(GameState.capture(board, seats, players, current_round).values, expected.values)
+
+    def test_resume_replays_tail_after_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.journal")
+            engine, next_player = self.play_and_stop(path, 40)
+            self.assert_resumes(path, engine, next_player)
+
+    def test_resume_ignores_torn_last_line(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "game.journal")
+            engine, next_player = self.play_and_stop(path, 12, snapshot_every=100)
+            with open(path, "a") as file:
+                file.write('{"round": 5, "se')
+            self.assert_resumes(path, engine, next_player)
+
+    @patch("builtins.print")
+    @patch("builtins.input", return_value="n")
+    def test_save_load_save_load_keeps_round_and_seat(self, mock_input, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "saved_game.journal")
+            turns = []
+
+            def menu(stop_after):
+                def choose(player):
+                    turns.append(player.name)
+                    return 2 if len(turns) == stop_after else 1
+                return choose
+
+            with patch("game.JOURNAL_FILE", path):
+                with patch("game.player_turn_menu", side_effect=menu(5)):
+                    game.play_game("DefaultBoard.csv", names=["Ann", "Bo", "Cy"], load=False, seed=1, odds=False)
+                self.assertEqual(GameJournal.resume(path)[3:], (2, 1))
+                with patch("game.player_turn_menu", side_effect=menu(12)):
+                    game.play_game(load=True, seed=2, odds=False)
+                self.assertEqual(turns[4:6], ["Bo", "Bo"])
+                self.assertEqual(GameJournal.resume(path)[3:], (4, 1))
+
+                with open(path) as file:
+                    saved = file.read()
+                with patch("game.player_turn_menu", side_effect=KeyboardInterrupt):
+                    with self.assertRaises(KeyboardInterrupt):
+                        game.play_game("DefaultBoard.csv", names=["Di", "Ed"], load=False, odds=False)
+                with open(path) as file:
+                    self.assertEqual(file.read(), saved)
+                self.assertEqual(GameJournal.resume(path)[3:], (4, 1))
+
+    @patch("builtins.print")
+    @patch("builtins.input", return_value="y")
+    def test_interrupted_game_is_recovered_and_deleted_when_over(self, mock_input, mock_print):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "saved_game.journal")
+            turns = []
+
+            def choose(player):
+                turns.append(player.name)
+                if len(turns) == 3:
+                    raise KeyboardInterrupt
+                return 1
+
+            with patch("game.JOURNAL_FILE", path), patch("game.player_turn_menu", side_effect=choose):
+                with self.assertRaises(KeyboardInterrupt):
+                    game.play_game("DefaultBoard.csv", names=["Di", "Ed"], load=False, seed=1, odds=False)
+                self.assertEqual(GameJournal.resume(path + ".new")[3:], (2, 0))
+                game.play_game(load=True, seed=2, odds=False)
+            self.assertEqual(turns[3], "Di")
+            self.assertEqual(os.listdir(directory), [])
+
+
+class TestSaveFile(unittest.TestCase):
+    def make_game(self):
+        board = Board("DefaultBoard.csv")
+        alice, bob, carol = Player("Alice", money=700, position=4), Player("Bob", in_jail=True), Player("Carol")
+        board.set_owner(board.squares[1], alice)
+        board.set_owner(board.squares[2], bob)
+        return board, [alice, bob, carol], [alice, bob]
+
+    def assert_round_trip(self, path):
+        board, seats, players = self.make_game()
+        savefile.save(path, board, seats, players, current_round=12)
+        loaded_board, loaded_seats, loaded_players, current_round = savefile.load(path)
+        self.assertEqual(current_round, 12)
+        self.assertEqual([p.name for p in loaded_players], ["Alice", "Bob"])
+        self.assertIs(loaded_board.squares[1].owner, loaded_seats[0])
+        self.assertIs(loaded_board.squares[2].owner, loaded_seats[1])
+        self.assertIsInstance(loaded_board.squares[8], ChanceSquare)
+        self.assertEqual(loaded_seats[0].properties, ["Central"])
+        self.assertEqual(loaded_board.jail_position, 5)
+        self.assertEqual(GameState.capture(loaded_board, loaded_seats, loaded_players, 12).values,
+                         GameState.capture(board, seats, players, 12).values)
+
+    def test_json_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assert_round_trip(os.path.join(directory, "game.json"))
+
+    def test_binary_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assert_round_trip(os.path.join(directory, "game.bin"))
+
+    def test_binary_saves_without_rules_still_load(self):
+        board, seats, players = self.make_game()
+        data = savefile.encode_binary(board, seats, players, 12)
+        header = savefile.HEADER.size
+        old = savefile.HEADER.pack(savefile.MAGIC, savefile.NO_RULES_VERSION, len(seats), len(board.squares))
+        old += data[header + savefile.NAME_LENGTH.size:]  # Without the empty rules entry.
+        loaded_board, loaded_seats, loaded_players, current_round = savefile.decode_binary(old)
+        self.assertEqual((current_round, [p.name for p in loaded_players]), (12, ["Alice", "Bob"]))
+        self.assertIs(loaded_board.rules, STANDARD)
+
+    def test_json_refers_to_owner_by_seat(self):
+        board, seats, players = self.make_game()
+        data = savefile.encode_json(board, seats, players)
+        self.assertEqual(data["board"][1]["owner"], 0)
+        self.assertEqual(data["board"][2]["owner"], 1)
+
+    def test_load_legacy_save(self):
+        board, seats, players, current_round = savefile.load("saved_game.json")
+        owners = [square.owner for square in board.squares if getattr(square, "owner", None)]
+        self.assertEqual(len(owners), 2)
+        for owner in owners:
+            self.assertIn(owner, seats)
+
+
+class TestMarkov(unittest.TestCase):
+    def test_landing_probabilities_sum_to_one(self):
+        board = Board("DefaultBoard.csv")
+        self.assertAlmostEqual(sum(landing_probabilities(board)), 1.0)
+
+    def test_uniform_board_without_jail(self):
+        board = Board(squares=[Square("Go", i) for i in range(10)])
+        for probability in landing_probabilities(board):
+            self.assertAlmostEqual(probability, 0.1)
+
+    @unittest.skipUnless(numpy, "NumPy is not installed")
+    def test_large_boards_solve_like_gaussian_elimination(self):
+        from model.markov import stationary_distribution, _gaussian_stationary
+        from model.policy import ROLL_DOUBLES
+        squares = [Square("Go", 0)] + [Square(f"Square {i}", i) for i in range(1, 100)]
+        squares[25], squares[75] = InJailSqaure("In Jail", 25), GoJailSquare("Go To Jail", 75)
+        rows = transition_matrix(Board(squares=squares), ROLL_DOUBLES)
+        for solved, exact in zip(stationary_distribution(rows, 100), _gaussian_stationary(rows)):
+            self.assertAlmostEqual(solved, exact, places=12)
+        squares = [Square(f"Square {i}", i) for i in range(20000)]
+        squares[5000], squares[15000] = InJailSqaure("In Jail", 5000), GoJailSquare("Go To Jail", 15000)
+        started = time.perf_counter()
+        self.assertAlmostEqual(sum(landing_probabilities(Board(squares=squares))), 1.0)
+        self.assertLess(time.perf_counter() - started, 5)
+
+    def test_matrix_is_cached_by_content(self):
+        self.assertIs(transition_matrix(Board("DefaultBoard.csv")), transition_matrix(Board("DefaultBoard.csv")))
+
+    def test_jail_turn_limit_comes_from_the_rules(self):
+        from model.policy import STAY_IN_JAIL
+        standard = Board("DefaultBoard.csv")
+        short = Board("DefaultBoard.csv", rules=Rules(jail_turn_limit=1, max_rounds=10))
+        self.assertEqual(len(transition_matrix(standard, STAY_IN_JAIL)), len(standard.squares) + 4)
+        self.assertEqual(len(transition_matrix(short, STAY_IN_JAIL)), len(short.squares) + 2)
+        self.assertGreater(sum(landing_probabilities(short, STAY_IN_JAIL)),
+                           sum(landing_probabilities(standard, STAY_IN_JAIL)))
+        self.assertAlmostEqual(analyze(short)[1]["expected_income"], analyze(short, rounds=10)[1]["expected_income"])
+
+    def test_property_roi(self):
+        rows = analyze(Board("DefaultBoard.csv"), num_players=2, rounds=10)
+        central = rows[1]
+        self.assertEqual(central["name"], "Central")
+        self.assertAlmostEqual(central["expected_income"], central["probability"] * 90 * 10)
+        self.assertAlmostEqual(central["roi"], (central["expected_income"] - 800) / 800)
+
+    @patch("builtins.print")
+    def test_designer_expected_roi(self, mock_print):
+        squares = GameboardDesigner().load_gameboard_from_csv("DefaultBoard.csv")
+        rois = GameboardDesigner().expected_roi(squares)
+        self.assertEqual(len(rois), 12)
+        self.assertNotIn(0, rois)
+        self.assertEqual(rois, GameboardDesigner().expected_roi(squares, rounds=STANDARD.max_rounds))
+        short = GameboardDesigner().expected_roi(squares, rules=Rules(max_rounds=10))
+        self.assertTrue(all(short[position] < roi for position, roi in rois.items()))
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        METRICS.disable()
+        METRICS.reset()
+
+    def test_nothing_is_recorded_while_disabled(self):
+        simulate("DefaultBoard.csv", 2, 5, workers=1)
+        self.assertEqual(METRICS.counters, {})
+        self.assertEqual(METRICS.histograms, {})
+
+    def test_simulation_collects_phases(self):
+        stats = simulate("DefaultBoard.csv", 2, 20, workers=1, chunk_size=10, metrics=True)
+        self.assertFalse(METRICS.enabled)
+        data = stats.metrics.to_dict()
+        counters = {counter["name"]: counter["value"] for counter in data["counters"]}
+        self.assertGreater(counters["dice_rolls"], 0)
+        self.assertEqual(counters["purchases"], sum(stats.purchases))
+        timed = {(entry["name"], entry["labels"].get("square")) for entry in data["histograms"]}
+        self.assertIn(("move_player", None), timed)
+        self.assertIn(("resolve_square", "PropertySquare"), timed)
+
+    def test_in_process_simulation_leaves_the_callers_metrics_alone(self):
+        METRICS.enable()
+        METRICS.count("requests", 3)
+        stats = simulate("DefaultBoard.csv", 2, 10, workers=1, metrics=True)
+        self.assertEqual(METRICS.counters, {("requests", ()): 3})
+        self.assertEqual(METRICS.histograms, {})
+        self.assertTrue(METRICS.enabled)
+        self.assertNotIn(("requests", ()), stats.metrics.counters)
+
+    def test_prometheus_export(self):
+        metrics = Metrics(enabled=True)
+        metrics.count("purchases", 2)
+        metrics.observe("render", 0.003)
+        text = metrics.to_prometheus()
+        self.assertIn("monopoly_purchases_total 2\n", text)
+        self.assertIn('monopoly_render_seconds_bucket{le="0.001"} 0\n', text)
+        self.assertIn('monopoly_render_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("monopoly_render_seconds_count 1\n", text)
+        self.assertEqual(Metrics.from_dict(metrics.to_dict()).to_prometheus(), text)
+
+
+class TestGameServer(unittest.TestCase):
+    def test_idle_game_is_evicted_and_resumed(self):
+        async def scenario(directory):
+            server = GameServer(save_dir=directory, idle_timeout=0.05)
+            listener = await server.start("127.0.0.1", 0)
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+            writer.write(b"NEW 2\n")
+            self.assertEqual((await reader.readline()).split(), [b"GAME", b"1", b"0"])
+            while True:
+                words = (await reader.readline()).decode().split()
+                if words[0] == "OVER":
+                    break
+                if not server.evictions:
+                    await asyncio.sleep(0.2)
+                    self.assertEqual((server.evictions, server.games), (1, {}))
+                writer.write(f"ANSWER {words[1]} {words[2]} {'y' if words[3] == 'BUY' else '2'}\n".encode())
+            writer.close()
+            listener.close()
+            return server
+
+        with tempfile.TemporaryDirectory() as directory:
+            server = asyncio.run(scenario(directory))
+            self.assertEqual(server.served, 1)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_restored_game_keeps_its_history(self):
+        from model.server import HostedGame
+        with tempfile.TemporaryDirectory() as directory:
+            server = GameServer(save_dir=directory)
+            board = Board("DefaultBoard.csv")
+            seats = [Player("A"), Player("B"), Player("C"), Player("D")]
+            game = HostedGame(server, 1, board, seats, [seats[0], seats[2]], [None, "always-buy", "always-buy", None])
+            game.bankrupt_round = {seats[3]: 2, seats[1]: 5}
+            board.purchased = {1, 3}
+            game.question = (0, "buy")
+            server.games[1] = game
+            server.evict(game)
+            launched = []
+            server.launch = lambda game, pending, answer: launched.append(game)
+            server.restore(1, 0, "y")
+        result = launched[0].result()
+        self.assertEqual(result["bankrupt_order"], [3, 1])
+        self.assertEqual(result["bankrupt_round"], [None, 5, None, 2])
+        self.assertEqual(result["purchased"], [1, 3])
+
+    def test_remote_jail_question_follows_the_rules(self):
+        from model.server import HostedGame
+        board = Board("DefaultBoard.csv", rules=Rules(jail_turn_limit=5))
+        seats = [Player("A", in_jail=True, jail_turns=3, position=5), Player("B")]
+        game = HostedGame(GameServer(), 1, board, seats, list(seats), [None, "always-buy"])
+        asked = []
+
+        async def decide(player, kind, details):
+            asked.append((kind, details))
+            return STAY_IN_JAIL
+
+        game.decide = decide
+        self.assertTrue(asyncio.run(game.play_turn_async(seats[0])))
+        self.assertEqual(asked, [("jail", "3")])
+        self.assertEqual(seats[0].jail_turns, 4)
+        self.assertIsNone(seats[0].policy.answer)
+
+    def test_load_test_plays_every_game(self):
+        report = asyncio.run(load_test(games=30, num_players=3, remote=2, connections=3, concurrency=10))
+        self.assertEqual(report["games"], 30)
+        self.assertGreater(report["decisions"], 30)
+
+
+class TestTournament(unittest.TestCase):
+    def test_every_policy_takes_every_seat(self):
+        rotations = list(lineups(["a", "b", "c"], 2))
+        self.assertEqual(len(rotations), 6)
+        for name in "abc":
+            self.assertEqual(sorted(seat for lineup in rotations for seat, n in enumerate(lineup) if n == name),
+                             [0, 0, 1, 1])
+
+    def test_interrupted_tournament_resumes_to_the_same_result(self):
+        args = (["DefaultBoard.csv"], ["always-buy", "cash-reserve", "jail-stay"], 2, 20)
+        with tempfile.TemporaryDirectory() as directory:
+            clean, resumed = os.path.join(directory, "clean.csv"), os.path.join(directory, "resumed.csv")
+            expected = run_tournament(*args, clean, chunk_size=10, workers=1).summary()
+            with open(clean) as file:
+                lines = file.readlines()
+            with open(resumed, "w") as file:
+                file.writelines(lines[:5] + [lines[5][:20]])  # Killed while writing a row.
+            self.assertEqual(run_tournament(*args, resumed, chunk_size=10, workers=1).summary(), expected)
+            with open(resumed) as file:
+                self.assertEqual(len(file.readlines()), len(lines))
+        self.assertEqual(expected["always-buy"]["games"], 80)
+        low, high = expected["cash-reserve"]["win_rate_ci"]
+        self.assertLess(low, expected["cash-reserve"]["win_rate"])
+        self.assertGreater(high, expected["cash-reserve"]["win_rate"])
+
+    def test_other_files_are_not_overwritten(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.csv")
+            with open(output, "w") as file:
+                file.write("name,score\nAnn,3\n")
+            with self.assertRaises(ValueError):
+                run_tournament(["DefaultBoard.csv"], ["always-buy", "never-buy"], 2, 10, output, workers=1)
+            with open(output) as file:
+                self.assertEqual(file.read(), "name,score\nAnn,3\n")
+            with open(output, "w") as file:
+                file.write("board,lin")  # Killed while writing the header.
+            run_tournament(["DefaultBoard.csv"], ["always-buy", "never-buy"], 2, 10, output, workers=1)
+            with open(output) as file:
+                self.assertEqual(next(csv.reader(file)), COLUMNS)
+
+    def test_boards_are_played_by_their_rules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            board = os.path.join(directory, "HouseBoard.csv")
+            shutil.copy("DefaultBoard.csv", board)
+            save_rules(Rules(max_rounds=3), board)
+            output = os.path.join(directory, "results.csv")
+            run_tournament([board], ["always-buy", "never-buy"], 2, 10, output, workers=1)
+            with open(output) as file:
+                rows = list(csv.DictReader(file))
+        self.assertTrue(all(int(row["rounds"]) <= 3 * 10 for row in rows))
+
+
+class TestOptimizer(unittest.TestCase):
+    def test_cache_drops_least_recently_used(self):
+        cache = EvaluationCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.hits, 1)
+
+    def test_repairs_negative_roi(self):
+        squares = read_board("DefaultBoard.csv")
+        targets = Targets(win_rate_tolerance=1.0, min_roi=0.0)
+        cache = EvaluationCache()
+        best, evaluation, loss = optimize(squares, targets, num_players=2, games=50, iterations=3, population=3,
+                                          workers=1, cache=cache)
+        self.assertEqual(loss, 0)
+        self.assertTrue(all(roi >= 0 for roi in evaluation["roi"].values()))
+        self.assertEqual([square["price"] for square in best], [square["price"] for square in squares])
+        self.assertEqual(cache.get(board_key(best)), evaluation)
+
+    def test_evaluations_follow_the_rules(self):
+        from model.optimizer import evaluate
+        squares = read_board("DefaultBoard.csv")
+        rules = Rules(max_rounds=5)
+        self.assertNotEqual(board_key(squares, rules), board_key(squares))
+        evaluation = evaluate((squares, rules, 2, 20, 0, "always-buy", None))
+        self.assertLessEqual(evaluation["median_rounds"], 5)
+
+
+class TestCommandLine(unittest.TestCase):
+    @patch("builtins.input", side_effect=AssertionError("should not prompt"))
+    def test_play_flags_skip_the_prompts(self, mock_input):
+        board, seats, players, current_round, next_seat = game.initialize_game("DefaultBoard.csv", names=["Ann", "Bo"],
+                                                                              load=False)
+        self.assertEqual([player.name for player in players], ["Ann", "Bo"])
+        self.assertEqual((len(board.squares), current_round, next_seat), (20, 1, 0))
+
+    @patch("builtins.print")
+    def test_subcommands_dispatch(self, mock_print):
+        game.main(["replay", "DefaultBoard.csv", "3", "--players", "2"])
+        result = json.loads(mock_print.call_args_list[-1].args[0])
+        self.assertEqual(result, replay("DefaultBoard.csv", 2, 0, 3))
+        game.main(["analyze", "DefaultBoard.csv", "--json"])
+        self.assertEqual(len(json.loads(mock_print.call_args_list[-1].args[0])), 20)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_compare_flags_regressions_in_either_direction(self):
+        from benchmark import compare, metric
+        baseline = {"turns": metric(1000, "turns/s"), "load": metric(10, "ms", False), "gone": metric(1, "ms", False)}
+        self.assertEqual(compare({"turns": metric(900, "turns/s"), "load": metric(11, "ms", False)}, baseline), [])
+        self.assertEqual(compare({"turns": metric(700, "turns/s"), "load": metric(13, "ms", False)}, baseline),
+                         ["turns", "load"])
+
+
+@unittest.skipUnless(numpy, "NumPy is not installed")
+class TestVectorizedGames(unittest.TestCase):
+    def test_results_match_engine_format(self):
+        from model.vectorized import VectorizedGames
+        results = list(VectorizedGames(Board("DefaultBoard.csv"), 3, 50, seed=1).run())
+        self.assertEqual(len(results), 50)
+        for result in results:
+            self.assertTrue(1 <= result["rounds"] <= 100)
+            self.assertEqual(len(result["money"]), 3)
+            alive = [seat for seat, r in enumerate(result["bankrupt_round"]) if r is None]
+            self.assertIn(result["winner"], alive)
+
+    def test_statistically_matches_engine(self):
+        engine = simulate("DefaultBoard.csv", 3, 2000, seed=2, workers=1).summary()
+        vectorized = simulate("DefaultBoard.csv", 3, 2000, seed=2, workers=1, vectorized=True).summary()
+        self.assertAlmostEqual(engine["mean_rounds"], vectorized["mean_rounds"], delta=1.0)
+        for engine_rate, vectorized_rate in zip(engine["win_rate"], vectorized["win_rate"]):
+            self.assertAlmostEqual(engine_rate, vectorized_rate, delta=0.05)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file